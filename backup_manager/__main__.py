@@ -0,0 +1,5 @@
+import sys
+from backup_manager.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
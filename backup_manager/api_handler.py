@@ -1,56 +1,223 @@
 import asyncio
 import logging
-from aiohttp import ClientSession, ClientTimeout, TCPConnector
+import time
+import aiohttp
+from backup_manager.concurrency import AdjustableLimiter
+from backup_manager.http_session import HTTPSessionManager
+from backup_manager.rate_limiter import AdaptiveRateLimiter
+from backup_manager.response_cache import ResponseCache
+from backup_manager.retry_policy import RetryPolicy, CircuitBreaker
+
+def parse_link_header(header: str) -> dict:
+    """Parse an RFC 5988 ``Link`` header into ``{rel: url}``."""
+    links = {}
+    for part in header.split(","):
+        segments = part.split(";")
+        url = segments[0].strip()
+        if not (url.startswith("<") and url.endswith(">")):
+            continue
+        for param in segments[1:]:
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "rel":
+                for rel in value.strip().strip('"').split():
+                    links[rel] = url[1:-1]
+    return links
+
 
 class CanvasAPIHandler:
-    def __init__(self, base_url: str, api_token: str, concurrency_limit: int = 10):
+    def __init__(self, base_url: str, api_token: str, concurrency_limit: int = 10,
+                 session_manager: HTTPSessionManager = None, rate_limiter: AdaptiveRateLimiter = None,
+                 retry_policy: RetryPolicy = None, circuit_breaker: CircuitBreaker = None,
+                 response_cache: ResponseCache = None):
         self.base_url = base_url.rstrip("/")
         self.api_token = api_token
         self.headers = {
             "Authorization": f"Bearer {api_token}"
         }
-        self.semaphore = asyncio.Semaphore(concurrency_limit)  # Concurrency control
-        self.session = ClientSession(
-            headers=self.headers, 
-            timeout=ClientTimeout(total=30),
-            connector=TCPConnector(ssl=False)
-            )
-
-    async def make_request(self, endpoint: str, method: str = "GET", params: dict = None, data: dict = None):
-        """Reusable function for making async API calls."""
-        url = f"{self.base_url}{endpoint}"
-
-        async with self.semaphore:  # Concurrency control
-            await asyncio.sleep(0.09)  # Rate limiting (90ms delay)
-            try:
-                if method.upper() == "GET":
-                    async with self.session.get(url, params=params) as response:
-                        return await self._handle_response(response)
-                elif method.upper() == "POST":
-                    async with self.session.post(url, json=data) as response:
-                        return await self._handle_response(response)
-                else:
-                    raise ValueError("Unsupported HTTP method")
+        self.semaphore = AdjustableLimiter(concurrency_limit)  # Concurrency control; resized by the tuner
+        self.tuner = None  # Optional ConcurrencyTuner fed with latencies and throttling
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter()  # Paced by Canvas quota headers
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()  # Shared pause when Canvas is failing
+        self.response_cache = response_cache  # Optional; only GETs made with use_cache=True consult it
+        self._in_flight = {}  # Identical concurrent GETs share one request
+        self.coalesced = 0
+        # Connection pool shared with BackupRunner downloads; closed by whoever created it
+        self._owns_session = session_manager is None
+        self.session_manager = session_manager or HTTPSessionManager()
+
+    @property
+    def session(self):
+        return self.session_manager.session
+
+    async def make_request(self, endpoint: str, method: str = "GET", params: dict = None, data: dict = None,
+                           idempotent: bool = None, use_cache: bool = False, cache_ttl: float = None):
+        """
+        Reusable function for making async API calls.
+
+        Transient failures are retried according to ``retry_policy``. Waiting
+        between attempts happens outside the concurrency semaphore so retries
+        never hold a permit. Pass ``idempotent=True`` to allow a POST to be
+        replayed after a connection error.
+
+        With ``use_cache=True`` and a ``response_cache`` configured, a GET is
+        answered from the cache while younger than ``cache_ttl`` seconds (the
+        cache's TTL by default; 0 always revalidates) and is otherwise sent as
+        a conditional request.
+        """
+        body, _ = await self._request(endpoint, method, params, data, idempotent, use_cache, cache_ttl)
+        return body
+
+    async def paginate(self, endpoint: str, params=None, per_page: int = 100, use_cache: bool = False,
+                       cache_ttl: float = None):
+        """
+        Yield the items of a Canvas list endpoint one at a time, following the
+        ``Link: <...>; rel="next"`` header from page to page. Pages are only
+        requested as the caller consumes items, so breaking out of the loop
+        stops the traversal.
+        """
+        # A list of pairs allows repeated keys such as state[]
+        params = list(params.items()) if isinstance(params, dict) else list(params or [])
+        if not any(key == "per_page" for key, _ in params):
+            params.append(("per_page", per_page))
+        url = endpoint
+        while url:
+            body, headers = await self._request(url, params=params, use_cache=use_cache, cache_ttl=cache_ttl)
+            for item in body if isinstance(body, list) else []:
+                yield item
+            url = parse_link_header(headers.get("Link", "")).get("next")
+            params = None  # The next link already carries the query string
+
+    async def _request(self, endpoint: str, method: str = "GET", params: dict = None, data: dict = None,
+                       idempotent: bool = None, use_cache: bool = False, cache_ttl: float = None):
+        """
+        Send a request with retries and return ``(json_body, response_headers)``.
 
+        A GET identical to one already in flight waits for that request's
+        result instead of sending its own, so the body may be shared between
+        callers and must not be modified.
+        """
+        url = endpoint if endpoint.startswith("http") else f"{self.base_url}{endpoint}"
+        method = method.upper()
+        if method not in ("GET", "POST"):
+            raise ValueError("Unsupported HTTP method")
+        if method != "GET":
+            return await self._send(url, method, params, data, idempotent, use_cache, cache_ttl)
+
+        pairs = params.items() if isinstance(params, dict) else params or []
+        key = (url, tuple(sorted((str(k), str(v)) for k, v in pairs)))
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._send(url, method, params, data, idempotent, use_cache, cache_ttl))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+            logging.debug(f"Joined in-flight request for {url}")
+        # Shielded so one caller being cancelled does not cancel the request for the others
+        return await asyncio.shield(task)
+
+    async def _send(self, url: str, method: str, params, data, idempotent, use_cache, cache_ttl):
+        """Send one request, retrying transient failures, and return ``(json_body, response_headers)``."""
+        cache = self.response_cache if use_cache and method == "GET" else None
+        cache_key = cached = None
+        headers = self.headers
+        if cache:
+            cache_key = cache.make_key(url, params, self.api_token)
+            cached = cache.lookup(cache_key)
+            if cached and cache.is_fresh(cached, cache_ttl):
+                cache.hits += 1  # No request, so no rate-limit cost
+                return cached["body"], cached["headers"]
+            if cached:
+                headers = dict(self.headers, **cache.conditional_headers(cached))
+
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            await self.circuit_breaker.wait_until_closed()
+            await self.rate_limiter.acquire()  # Rate limiting
+            try:
+                async with self.semaphore:  # Concurrency control
+                    kwargs = {"params": params} if method == "GET" else {"json": data}
+                    sent = time.monotonic()
+                    async with self.session.request(method, url, headers=headers, **kwargs) as response:
+                        if self.tuner and response.status < 400:
+                            self.tuner.record(latency=time.monotonic() - sent)
+                        delay = await self._handle_response(response, method, attempt, started, idempotent)
+                        if delay is None:
+                            if response.status == 304 and cached:
+                                cache.revalidated += 1
+                                cache.refresh(cache_key, response.headers)
+                                return cached["body"], cached["headers"]
+                            body = await response.json()
+                            if cache:
+                                cache.misses += 1
+                                cache.store(cache_key, url, body, response.headers, cache_ttl)
+                            return body, response.headers
+                        status = response.status
+            except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError) as e:
+                self.circuit_breaker.record_failure()
+                if self.tuner:
+                    self.tuner.record_error()
+                delay = self.retry_policy.next_delay(
+                    method, attempt, time.monotonic() - started, connection_error=True, idempotent=idempotent
+                )
+                if delay is None:
+                    logging.error(f"API Request failed: {e}")
+                    raise
+                status = type(e).__name__
             except Exception as e:
                 logging.error(f"API Request failed: {e}")
                 raise
 
-    async def _handle_response(self, response):
-        """Handle the API response, including retries for 429 errors."""
-        if response.status == 429:  # Rate limiting
-            retry_after = int(response.headers.get("Retry-After", 1))
-            logging.warning(f"Rate limit reached. Retrying after {retry_after} seconds...")
-            await asyncio.sleep(retry_after)
-            return await self.make_request(response.url)
+            logging.warning(f"{method} {url} failed ({status}); retry {attempt} in {delay:.1f} seconds...")
+            await asyncio.sleep(delay)
+
+    def _forget(self, key, task: asyncio.Future):
+        self._in_flight.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # Retrieved here in case every caller was cancelled
+
+    async def _handle_response(self, response, method: str, attempt: int, started: float, idempotent: bool):
+        """
+        Classify a response. Returns None when it succeeded, the delay before
+        the next attempt when it should be retried, and raises otherwise.
+        """
+        self.rate_limiter.update(response.headers)
+        status = response.status
+        if status < 400:
+            self.circuit_breaker.record_success()
+            return None
+
+        if status == 429 or (status == 403 and response.headers.get("X-Rate-Limit-Remaining", "").startswith("0")):
+            status = 429  # Canvas reports an exhausted quota as 403 Rate Limit Exceeded
+            self.rate_limiter.on_throttled()
+            self.circuit_breaker.record_failure()
+            if self.tuner:
+                self.tuner.record_throttled()
+        elif status >= 500:
+            self.circuit_breaker.record_failure()
+            if self.tuner:
+                self.tuner.record_error()
+        else:
+            self.circuit_breaker.record_success()  # Canvas is healthy; the request itself is wrong
 
-        response.raise_for_status()
-        return await response.json()
+        retry_after = response.headers.get("Retry-After")
+        retry_after = float(retry_after) if retry_after and retry_after.replace(".", "", 1).isdigit() else None
+        delay = self.retry_policy.next_delay(
+            method, attempt, time.monotonic() - started, status=status,
+            retry_after=retry_after, idempotent=idempotent,
+        )
+        if delay is None:
+            response.raise_for_status()
+        return delay
 
     async def validate_token(self):
         """Validates the provided API token by calling a test endpoint."""
         try:
-            user_info = await self.make_request("/api/v1/users/self")
+            # Always revalidated, so a revoked token is still rejected
+            user_info = await self.make_request("/api/v1/users/self", use_cache=True, cache_ttl=0)
             logging.info(f"Token validated. Logged in as: {user_info.get('name')} ({user_info.get('email')})")
             return True
         except Exception as e:
@@ -63,7 +230,7 @@ class CanvasAPIHandler:
             # Extract course ID from the URL
             course_id = course_url.split("/courses/")[-1]
             endpoint = f"/api/v1/courses/{course_id}"
-            course_data = await self.make_request(endpoint)
+            course_data = await self.make_request(endpoint, use_cache=True)
 
             course_name = course_data.get("name", "Unknown Course")
             logging.info(f"Fetched course details: {course_name} (ID: {course_id})")
@@ -74,5 +241,6 @@ class CanvasAPIHandler:
             return None
 
     async def close_session(self):
-        """Closes the aiohttp session."""
-        await self.session.close()
+        """Closes the aiohttp session if this handler created it."""
+        if self._owns_session:
+            await self.session_manager.close()
@@ -1,172 +1,605 @@
 import asyncio
+import json
 import os
 import logging
 import time
-from datetime import datetime
+from datetime import datetime, timezone
 import aiohttp
 import aiofiles
 from backup_manager.api_handler import CanvasAPIHandler
+from backup_manager.http_session import HTTPSessionManager
+from backup_manager.export_poller import ExportPoller
+from backup_manager.change_detector import ChangeDetector
+from backup_manager.export_reuse import ExportReusePolicy, EXPORTED_STATE, parse_canvas_timestamp
+from backup_manager.course_store import CourseStore
+from backup_manager.concurrency import AdjustableLimiter, ConcurrencySettings, ConcurrencyTuner
+from backup_manager.worker_pool import CoursePool
+from backup_manager.scheduler import (
+    SCHEDULE_FIFO, SCHEDULES, DurationModel, order_courses, makespan_lower_bound, plan_deadline, probe_course_size,
+)
+from backup_manager.job_journal import (
+    JobJournal, PHASE_PENDING, PHASE_EXPORT_STARTED, PHASE_EXPORT_READY, PHASE_DOWNLOADED, PHASE_COMPLETED,
+)
 from backup_manager.system_compat import configure_platform_settings
 
+PART_SUFFIX = ".part"  # Suffix for downloads that have not been verified yet
+META_SUFFIX = ".json"  # Sidecar with the source URL and validators of a .part file
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024  # 1 MB chunk size
+DOWNLOAD_SEGMENTS = 4  # Concurrent byte ranges per large download
+
+
+def plan_segments(total_size, max_segments: int, min_segment_size: int) -> list:
+    """
+    Split ``total_size`` bytes into at most ``max_segments`` byte ranges of at
+    least ``min_segment_size`` bytes. Each range is ``[start, end, done]``
+    with an inclusive ``end``. Returns an empty list when the size is unknown.
+    """
+    if not total_size or max_segments < 1:
+        return []
+    count = max(1, min(max_segments, total_size // max(min_segment_size, 1)))
+    size = -(-total_size // count)  # Ceiling division so the last range is the shortest
+    return [[start, min(start + size, total_size) - 1, 0] for start in range(0, total_size, size)]
+
+
+class RangeMismatchError(IOError):
+    """The server answered a range request with bytes that do not fit the partial file."""
+
+
+def parse_content_range(header: str):
+    """Parse ``bytes start-end/total`` (or ``bytes */total``) into a tuple of ints/None."""
+    if not header or not header.startswith("bytes "):
+        return None, None, None
+    byte_range, _, total = header[len("bytes "):].partition("/")
+    total = int(total) if total.isdigit() else None
+    if byte_range == "*":
+        return None, None, total
+    start, _, end = byte_range.partition("-")
+    return int(start), int(end), total
+
+
+def _read_json(path: str):
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path: str, data: dict):
+    with open(path, "w") as f:
+        json.dump(data, f)
+
+class _DownloadProgress:
+    """Tracks bytes downloaded for one course and reports percentage changes."""
+
+    def __init__(self, runner, status_callback, course_name, course_id):
+        self.runner = runner
+        self.status_callback = status_callback
+        self.course_name = course_name
+        self.course_id = course_id
+        self.downloaded = 0
+        self.last_percent = None
+
+    async def add(self, size: int, total_size):
+        self.downloaded += size
+        if self.runner.download_tuner:
+            self.runner.download_tuner.record(size)  # Download throughput in bytes
+        if self.runner.course_store:
+            self.runner.course_store.update(self.course_id, bytes_downloaded=self.downloaded)
+        if total_size:
+            percent = int((self.downloaded / total_size) * 100)
+            if percent != self.last_percent:
+                self.last_percent = percent
+                await self.runner._notify(self.status_callback, self.course_name, self.course_id, "Downloading", percent)
+
+
 class BackupRunner:
-    def __init__(self, api_handler: CanvasAPIHandler, output_dir: str, stop_event: asyncio.Event, concurrency_limit: int = 5):
+    def __init__(self, api_handler: CanvasAPIHandler, output_dir: str, stop_event: asyncio.Event, concurrency_limit: int = 5,
+                 journal: JobJournal = None, download_segments: int = DOWNLOAD_SEGMENTS, min_segment_size: int = 64 * 1024 * 1024,
+                 session_manager: HTTPSessionManager = None, export_timeout: float = 3600.0,
+                 export_concurrency: int = None, download_concurrency: int = None,
+                 change_detector: ChangeDetector = None, skip_unchanged: bool = False,
+                 export_reuse: ExportReusePolicy = None, course_store: CourseStore = None,
+                 schedule: str = SCHEDULE_FIFO, size_probe: bool = False, deadline: float = None,
+                 tuning: ConcurrencySettings = None):
         self.api_handler = api_handler
         self.output_dir = output_dir
         self.stop_event = stop_event  # Add stop event
         self.concurrency_limit = concurrency_limit
-        self.semaphore = asyncio.Semaphore(concurrency_limit)
+        # Exports are built by Canvas, so far more can be in flight than downloads
+        self.export_concurrency = export_concurrency or concurrency_limit * 4
+        self.download_concurrency = download_concurrency or concurrency_limit
+        # Downloads in progress; the auto-tuner moves this between the configured bounds
+        self.download_limiter = AdjustableLimiter(self.download_concurrency)
+        self.download_workers = self.download_concurrency
+        self.download_tuner = None
+        self.tuners = []
+        if tuning and tuning.auto_tune:
+            self.download_workers = max(self.download_concurrency, tuning.download_max)
+            self.download_tuner = ConcurrencyTuner("downloads", self.download_limiter,
+                                                   tuning.download_min, tuning.download_max)
+            self.tuners.append(self.download_tuner)
+            if isinstance(getattr(api_handler, "semaphore", None), AdjustableLimiter):
+                api_handler.tuner = ConcurrencyTuner("api", api_handler.semaphore, tuning.api_min, tuning.api_max)
+                self.tuners.append(api_handler.tuner)
+        self.journal = journal  # Optional durable state so interrupted runs resume
+        self._journaled_status = {}
+        # Large exports are fetched as several concurrent byte ranges
+        self.download_segments = download_segments
+        self.min_segment_size = min_segment_size
+        # Downloads reuse the API handler's connection pool unless one is given
+        session_manager = session_manager or getattr(api_handler, "session_manager", None)
+        self._owns_session = session_manager is None
+        self.session_manager = session_manager or HTTPSessionManager()
+        # One polling loop serves every export in flight
+        self.export_poller = ExportPoller(api_handler, stop_event, export_timeout=export_timeout)
+        # Courses unchanged since their last backup are skipped only when asked; signatures live in the journal
+        self.change_detector = change_detector or ChangeDetector(api_handler)
+        self.skip_unchanged = skip_unchanged
+        self._signatures = {}
+        self._signature_times = {}  # When each pending signature was taken
+        self._changed_after = {}  # Courses that changed since their last backup, and when that was
+        self.export_reuse = export_reuse or ExportReusePolicy()
+        self.course_store = course_store  # Optional live state shared with the GUI
+        # Order courses by predicted duration; probe sizes of courses with no history
+        if schedule not in SCHEDULES:
+            raise ValueError(f"Unknown schedule: {schedule}")
+        self.schedule = schedule
+        self.size_probe = size_probe
+        self._created_exports = set()  # Export times are only learned from exports this run built
+        self.duration_model = None
+        # Deadline mode (time.time() value): start only what can finish, stop at the cutoff
+        self.deadline = deadline
+        self.deadline_reached = False
 
         # Configure platform-specific settings on initialization
         configure_platform_settings()
 
+    async def _notify(self, status_callback, course_name, course_id, status, progress):
+        """Forward a status change to the course store, the callback and the journal."""
+        if status == "Stopped" and self.deadline_reached:
+            # Cut off by the deadline rather than the user: first in line next run
+            status = "Deferred"
+            if self.journal:
+                self.journal.defer(course_id, course_name)
+                self._journaled_status[course_id] = status
+        if self.course_store:
+            self.course_store.update(course_id, status=status, progress=progress)
+        if self.journal and self._journaled_status.get(course_id) != status:
+            self._journaled_status[course_id] = status
+            self.journal.record(course_id, course_name, status=status, progress=progress)
+        if status_callback:
+            if asyncio.iscoroutinefunction(status_callback):
+                await status_callback(course_name, course_id, status, progress)
+            else:
+                status_callback(course_name, course_id, status, progress)
+
+    def _journal(self, course_id, **fields):
+        if self.course_store and "last_error" in fields:
+            self.course_store.update(course_id, last_error=fields["last_error"])
+        if self.journal:
+            self.journal.record(course_id, **fields)
+
     async def run_backup(self, course_name: str, course_id: str, status_callback=None):
+        """Back up one course end to end: export, download and retention."""
+        ready = await self.prepare_export(course_name, course_id, status_callback)
+        if not ready:
+            return False
+        phase, export_url = ready
+        if phase == PHASE_COMPLETED:
+            return True  # Up to date, nothing to download
+        return await self.finish_download(course_name, course_id, phase, export_url, status_callback)
+
+    async def prepare_export(self, course_name: str, course_id: str, status_callback=None):
+        """
+        Export stage: trigger (or resume) the Canvas export and wait for it.
+        Returns ``(phase, export_url)`` for the download stage, or None when
+        the course failed or was stopped (its status has been reported).
+        Unchanged courses return ``(PHASE_COMPLETED, None)``.
+        """
+        resume = self.journal.resume_point(course_id) if self.journal else None
+        phase = resume["phase"] if resume else PHASE_PENDING
+        export_started = None
         try:
-            if status_callback:
-                if asyncio.iscoroutinefunction(status_callback):
-                    await status_callback(course_name, course_id, "Backing up", 0)
-                else:
-                    status_callback(course_name, course_id, "Backing up", 0)
-
-            logging.info(f"Starting export for course: {course_name} (ID: {course_id})")
-            export_id = await self.trigger_course_export(course_id)
+            await self._notify(status_callback, course_name, course_id, "Backing up", 0)
+
+            export_id = resume.get("export_id") if resume else None
+            export_url = resume.get("attachment_url") if resume else None
+
+            if phase in (PHASE_EXPORT_READY, PHASE_DOWNLOADED) and export_url:
+                logging.info(f"Resuming course {course_name} (ID: {course_id}) from phase '{phase}'")
+                return phase, export_url
+
+            if phase == PHASE_EXPORT_STARTED and export_id:
+                logging.info(f"Resuming export {export_id} for course: {course_name} (ID: {course_id})")
+            else:
+                if await self._is_unchanged(course_name, course_id):
+                    logging.info(f"Course unchanged since last backup, skipping: {course_name} (ID: {course_id})")
+                    self._journal(course_id, phase=PHASE_COMPLETED, last_error=None, priority=0)
+                    await self._notify(status_callback, course_name, course_id, "Up to date", 100)
+                    return PHASE_COMPLETED, None
+
+                logging.info(f"Starting export for course: {course_name} (ID: {course_id})")
+                export_started = time.monotonic()
+                export_id = await self.trigger_course_export(course_id)
+                phase = PHASE_EXPORT_STARTED
+                self._journal(course_id, phase=phase, export_id=str(export_id),
+                              attachment_url=None, bytes_downloaded=0, last_error=None)
 
             export_url = await self.poll_export_status(course_id, export_id, status_callback, course_name)
             if not export_url:
+                if self.stop_event.is_set():
+                    await self._notify(status_callback, course_name, course_id, "Stopped", 0)
+                    return None
                 logging.error(f"Export failed for course: {course_name} (ID: {course_id})")
-                if status_callback:
-                    if asyncio.iscoroutinefunction(status_callback):
-                        await status_callback(course_name, course_id, "Failed", 0)
-                    else:
-                        status_callback(course_name, course_id, "Failed", 0)
+                # Start a fresh export next time rather than polling the same one again
+                self._journal(course_id, phase=PHASE_PENDING, export_id=None, last_error="Export failed or timed out")
+                await self._notify(status_callback, course_name, course_id, "Failed", 0)
+                return None
+            phase = PHASE_EXPORT_READY
+            self._journal(course_id, phase=phase, attachment_url=export_url)
+            created = str(course_id) in self._created_exports
+            self._created_exports.discard(str(course_id))
+            if self.journal and created and export_started is not None:
+                self.journal.record_duration(course_id, export_seconds=time.monotonic() - export_started)
+            return phase, export_url
+
+        except Exception as e:
+            logging.error(f"Backup failed for course: {course_name} (ID: {course_id}): {e}")
+            self._journal(course_id, **self._rollback_fields(phase, e))
+            await self._notify(status_callback, course_name, course_id, "Failed", 0)
+            return None
+
+    async def finish_download(self, course_name: str, course_id: str, phase: str, export_url: str,
+                              status_callback=None):
+        """Download stage: fetch the finished export and apply retention."""
+        try:
+            if self.stop_event.is_set():
+                await self._notify(status_callback, course_name, course_id, "Stopped", 0)
                 return False
 
-            if status_callback:
-                if asyncio.iscoroutinefunction(status_callback):
-                    await status_callback(course_name, course_id, "Downloading", 0)
-                else:
-                    status_callback(course_name, course_id, "Downloading", 0)
+            if phase != PHASE_DOWNLOADED:
+                await self._notify(status_callback, course_name, course_id, "Downloading", 0)
+                await self.download_backup(course_name, export_url, status_callback, course_id)
+                if self.stop_event.is_set():  # Check stop event
+                    logging.info(f"Backup Stopped by User")
+                    await self._notify(status_callback, course_name, course_id, "Stopped", 0)
+                    return False
+                phase = PHASE_DOWNLOADED
+                self._journal(course_id, phase=phase)
 
-            await self.download_backup(course_name, export_url, status_callback, course_id)
             await self.manage_backups(course_name)
 
             logging.info(f"Backup completed for course: {course_name} (ID: {course_id})")
-            if status_callback:
-                if self.stop_event.is_set():  # Check stop event
-                    logging.info(f"Backup Stopped by User")
-                    if asyncio.iscoroutinefunction(status_callback):
-                        await status_callback(course_name, course_id, "Stopped", 0)
-                    else:
-                        status_callback(course_name, course_id, "Stopped", 0)
-                else:
-                    if asyncio.iscoroutinefunction(status_callback):
-                        await status_callback(course_name, course_id, "Completed", 100)
-                    else:
-                        status_callback(course_name, course_id, "Completed", 100)
+            completed = {"phase": PHASE_COMPLETED, "last_error": None, "last_backup_at": time.time(), "priority": 0}
+            if course_id in self._signatures:
+                completed["content_signature"] = self._signatures.pop(course_id)
+            self._journal(course_id, **completed)
+            await self._notify(status_callback, course_name, course_id, "Completed", 100)
             return True
 
         except Exception as e:
             logging.error(f"Backup failed for course: {course_name} (ID: {course_id}): {e}")
-            if status_callback:
-                if asyncio.iscoroutinefunction(status_callback):
-                    await status_callback(course_name, course_id, "Failed", 0)
-                else:
-                    status_callback(course_name, course_id, "Failed", 0)
+            self._journal(course_id, **self._rollback_fields(phase, e))
+            await self._notify(status_callback, course_name, course_id, "Failed", 0)
             return False
 
-    async def trigger_course_export(self, course_id: str):
-        endpoint = f"/api/v1/courses/{course_id}/content_exports"
+    async def _is_unchanged(self, course_name: str, course_id) -> bool:
+        """
+        Compare the course's current content signature with the one saved at
+        its last successful backup. The new signature is kept so it can be
+        saved once this backup completes. Detection problems never block a backup.
+        """
+        if not self.skip_unchanged or not self.journal or not self.change_detector:
+            return False
+        try:
+            signature = await self.change_detector.signature(course_id)
+        except Exception as e:
+            logging.warning(f"Change detection failed for course {course_id}, backing up anyway: {e}")
+            return False
+        self._signatures[course_id] = signature
+        self._signature_times[course_id] = datetime.now(timezone.utc)
+
+        job = self.journal.get(course_id)
+        if job and job.get("content_signature") and job["content_signature"] != signature and job.get("last_backup_at"):
+            # Exports from before the last backup cannot contain the change
+            self._changed_after[course_id] = datetime.fromtimestamp(job["last_backup_at"], timezone.utc)
+        if not job or job.get("content_signature") != signature:
+            return False
+        return self._has_local_backup(course_name)
+
+    def _has_local_backup(self, course_name: str) -> bool:
+        course_dir = os.path.join(self.output_dir, course_name)
+        try:
+            return any(f.endswith(".zip") and not f.startswith("._") for f in os.listdir(course_dir))
+        except OSError:
+            return False
 
-        # Make a GET request to check for existing content exports
-        response = await self.api_handler.make_request(endpoint, method="GET")
-        exports = response if isinstance(response, list) else response.get("content_exports", [])
+    @staticmethod
+    def _rollback_fields(phase: str, error: Exception) -> dict:
+        """
+        Journal fields to store after a failure. Transient errors keep the
+        phase so the next attempt resumes; a 4xx from Canvas or the file store
+        means the saved export or download URL is no longer usable, so the
+        course steps back one phase.
+        """
+        fields = {"last_error": str(error)}
+        if isinstance(error, aiohttp.ClientResponseError) and 400 <= error.status < 500:
+            if phase == PHASE_EXPORT_STARTED:
+                fields.update(phase=PHASE_PENDING, export_id=None)
+            elif phase == PHASE_EXPORT_READY:
+                fields.update(phase=PHASE_EXPORT_STARTED, attachment_url=None)
+        return fields
 
-        # Check if there is an export created today
-        current_date = datetime.now().strftime("%Y-%m-%d")
-        for export in exports:
-            created_at = export.get("created_at", "")
-            if created_at.startswith(current_date):
-                logging.info(f"Found existing export for course ID: {course_id} created on {current_date}")
-                return export.get("id")
+    async def trigger_course_export(self, course_id: str):
+        endpoint = f"/api/v1/courses/{course_id}/content_exports"
 
-        # If no export found for today, create a new one
-        data = {"export_type": "common_cartridge"}
+        # Walk existing exports (newest first) only as far as the reuse window reaches
+        candidates = []
+        changed_after = self._changed_after.pop(course_id, None)
+        # Export states change, so the listing is always revalidated rather than served stale
+        async for export in self.api_handler.paginate(endpoint, per_page=10, use_cache=True, cache_ttl=0):
+            if self.export_reuse.is_reusable(export, created_after=changed_after):
+                candidates.append(export)
+                if export.get("workflow_state") == EXPORTED_STATE:
+                    break  # The newest finished export; nothing older is better
+            elif self.export_reuse.is_outside_window(export):
+                break
+
+        # Attach to an export still being built or reuse a recently finished one
+        existing = self.export_reuse.select(candidates, created_after=changed_after)
+        if existing:
+            logging.info(f"Found existing export for course ID: {course_id}")
+            created_at = parse_canvas_timestamp(existing.get("created_at"))
+            taken_at = self._signature_times.get(course_id)
+            if course_id in self._signatures and (created_at is None or (taken_at and created_at < taken_at)):
+                # The export may predate the content the signature describes; check again next run
+                logging.info(f"Not saving the content signature of course ID {course_id}: reused export is older")
+                self._signatures.pop(course_id, None)
+            return existing.get("id")
+
+        # If no reusable export was found, create a new one
+        data = {"export_type": self.export_reuse.export_type}
         response = await self.api_handler.make_request(endpoint, method="POST", data=data)
+        self._created_exports.add(str(course_id))
         return response.get("id")
 
     async def poll_export_status(self, course_id: str, export_id: str, status_callback, course_name):
-        endpoint = f"/api/v1/courses/{course_id}/content_exports/{export_id}"
-        response = await self.api_handler.make_request(endpoint)
-        progress_url = response.get("progress_url")
-
-        if not progress_url:
-            logging.error(f"No progress URL found for course ID: {course_id}")
-            return None
-
-        for _ in range(600):  # Polling for up to 300 seconds (5 minutes)
-            if self.stop_event.is_set():  # Check stop event
-                logging.info(f"Backup stopped for course: {course_name} (ID: {course_id})")
-                return None
-
-            stripped_progress_url = progress_url.replace("https://byui.instructure.com", "")
-            progress_response = await self.api_handler.make_request(stripped_progress_url)
-            progress = progress_response.get("completion", 0)
-            workflow_state = progress_response.get("workflow_state")
-
-            if status_callback:
-                if asyncio.iscoroutinefunction(status_callback):
-                    await status_callback(course_name, course_id, "Backing up", progress)
-                else:
-                    status_callback(course_name, course_id, "Backing up", progress)
-
-            logging.info(f"Polling progress status: {progress}% completed...")
-
-            if workflow_state == "completed":
-                final_response = await self.api_handler.make_request(endpoint)
-                attachment = final_response.get("attachment")
-                if attachment and "url" in attachment:
-                    return attachment["url"]
-
-            await asyncio.sleep(1)
-
-        logging.error(f"Export timed out for course ID: {course_id}")
-        return None
+        """Wait for the export through the shared poller and return its download URL."""
+        async def on_progress(completion):
+            await self._notify(status_callback, course_name, course_id, "Backing up", int(completion))
+
+        history = self.journal.duration(course_id) if self.journal else None
+        expected = history["export_seconds"] if history else None  # Past exports pace the polling
+        export_url = await self.export_poller.wait_for_export(course_id, export_id, on_progress,
+                                                              expected_duration=expected)
+        if not export_url and self.stop_event.is_set():
+            logging.info(f"Backup stopped for course: {course_name} (ID: {course_id})")
+        return export_url
 
     async def download_backup(self, course_name: str, file_url: str, status_callback, course_id):
-        timeout = aiohttp.ClientTimeout(total=3600)  # Set a timeout of 1 hour
-        connector = aiohttp.TCPConnector(ssl=False)  # Disable SSL verification
-        chunk_size = 1024 * 1024 # 1 MB chunk size
-        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
-            async with session.get(file_url) as response:
-                response.raise_for_status()
+        """
+        Download an export to ``<course>_<date>.zip``.
+
+        Data goes to a ``.part`` file first. If a previous attempt left a
+        ``.part`` for the same URL, it is resumed with Range requests; the
+        file is only renamed into place once its size matches the expected
+        length. Large files on servers that accept ranges are fetched as
+        several concurrent byte ranges (see ``download_segments``).
+        Returns the final path, or None if the download was stopped.
+        """
+        course_dir = os.path.join(self.output_dir, course_name)
+        os.makedirs(course_dir, exist_ok=True)
+
+        timestamp = datetime.now().strftime("%Y-%m-%d")
+        file_name = f"{course_name}_{timestamp}.zip"
+        file_path = os.path.join(course_dir, file_name)
+
+        part_path, meta = self._find_partial_download(course_dir, file_url)
+        if not part_path:
+            part_path = file_path + PART_SUFFIX
+            meta = {"url": file_url}
+
+        progress = _DownloadProgress(self, status_callback, course_name, course_id)
+        resumed = os.path.exists(part_path)
+        download_started = time.monotonic()
+        session = self.session_manager.session
+        if not meta.get("segments") and not os.path.exists(part_path) and self.download_segments > 1:
+            total_size, validators = await self._probe_range_support(session, file_url)
+            segments = plan_segments(total_size, self.download_segments, self.min_segment_size)
+            if len(segments) > 1:
+                meta.update(total_size=total_size, segments=segments, **validators)
+
+        if meta.get("segments"):
+            finished = await self._download_segmented(session, file_url, part_path, meta, progress)
+        else:
+            finished = await self._download_stream(session, file_url, part_path, meta, progress)
+
+        self._journal(course_id, bytes_downloaded=progress.downloaded)
+        if not finished:
+            logging.info(f"Download stopped for course: {course_name} (ID: {course_id})")
+            return None
 
+        total_size = meta.get("total_size")
+        if total_size is not None and progress.downloaded != total_size:
+            # Keep the .part so the next attempt resumes where this one ended
+            raise IOError(f"Incomplete download for {course_name}: {progress.downloaded} of {total_size} bytes")
+
+        os.replace(part_path, file_path)
+        self._discard_partial_download(part_path)
+        logging.info(f"Downloaded backup: {file_path}")
+        if self.journal:
+            # A resumed download only timed part of the file
+            self.journal.record_duration(
+                course_id, size_bytes=os.path.getsize(file_path),
+                download_seconds=None if resumed else time.monotonic() - download_started,
+            )
+        return file_path
+
+    async def _download_stream(self, session, file_url: str, part_path: str, meta: dict, progress) -> bool:
+        """Fetch the file as one stream, resuming an existing ``.part`` with a Range request."""
+        resume_from = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {}
+        if resume_from:
+            headers["Range"] = f"bytes={resume_from}-"
+            validator = meta.get("etag") or meta.get("last_modified")
+            if validator:
+                headers["If-Range"] = validator  # Server sends the whole file if it changed
+
+        async with session.get(file_url, headers=headers, timeout=self.session_manager.download_timeout) as response:
+            if response.status == 416:
+                # Nothing left to fetch if the part already holds the whole file
+                _, _, total_size = parse_content_range(response.headers.get("Content-Range"))
+                if total_size is None or total_size != resume_from:
+                    self._discard_partial_download(part_path)
+                    raise RangeMismatchError(f"Partial download {part_path} no longer matches the server copy")
+                meta["total_size"] = total_size
+                progress.downloaded = resume_from
+                return True
+
+            response.raise_for_status()
+            if response.status == 206:
+                start, _, total_size = parse_content_range(response.headers.get("Content-Range"))
+                if start != resume_from:
+                    self._discard_partial_download(part_path)
+                    raise RangeMismatchError(f"Server resumed {part_path} at byte {start}, expected {resume_from}")
+                mode = "ab"
+                progress.downloaded = resume_from
+                logging.info(f"Resuming download of {part_path} at {resume_from} bytes")
+            else:
                 content_length = response.headers.get("Content-Length")
-                total_size = int(content_length) if content_length and content_length.isdigit() else 0
-                downloaded_size = 0
-
-                course_dir = os.path.join(self.output_dir, course_name)
-                os.makedirs(course_dir, exist_ok=True)
-
-                timestamp = datetime.now().strftime("%Y-%m-%d")
-                file_name = f"{course_name}_{timestamp}.zip"
-                file_path = os.path.join(course_dir, file_name)
-
-                async with aiofiles.open(file_path, "wb") as f:
-                    async for chunk in response.content.iter_chunked(chunk_size):
+                total_size = int(content_length) if content_length and content_length.isdigit() else None
+                mode = "wb"
+                progress.downloaded = 0
+
+            meta.update(
+                url=file_url,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+                total_size=total_size,
+            )
+            _write_json(part_path + META_SUFFIX, meta)
+
+            async with aiofiles.open(part_path, mode) as f:
+                async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                    if chunk:
+                        await f.write(chunk)
+                        await progress.add(len(chunk), total_size)
+                        if self.stop_event.is_set():  # Check stop event
+                            return False
+        return True
+
+    async def _probe_range_support(self, session, file_url: str):
+        """
+        Ask for the first byte of the file. Returns ``(total_size, validators)``:
+        the total size if the server answers with a ranged response (otherwise
+        None), and the ETag/Last-Modified that segments send as ``If-Range``.
+        """
+        async with session.get(file_url, headers={"Range": "bytes=0-0"}, timeout=self.session_manager.api_timeout) as response:
+            response.raise_for_status()
+            if response.status != 206:
+                return None, {}  # Leaving the body unread closes the connection instead of pulling the whole file
+            await response.read()
+            _, _, total_size = parse_content_range(response.headers.get("Content-Range"))
+            if response.headers.get("Accept-Ranges", "bytes").lower() == "none":
+                return None, {}
+            validators = {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+            return total_size, validators
+
+    async def _download_segmented(self, session, file_url: str, part_path: str, meta: dict, progress) -> bool:
+        """
+        Fetch the byte ranges in ``meta["segments"]`` concurrently into one
+        preallocated ``.part`` file. Each segment is ``[start, end, done]``;
+        ``done`` is saved to the sidecar so an interrupted download resumes
+        every segment where it stopped.
+        """
+        total_size = meta["total_size"]
+        segments = meta["segments"]
+        if not os.path.exists(part_path):
+            with open(part_path, "wb") as f:
+                f.truncate(total_size)  # Preallocate so segments can write at their offsets
+        _write_json(part_path + META_SUFFIX, meta)
+        progress.downloaded = sum(segment[2] for segment in segments)
+        logging.info(f"Downloading {part_path} in {len(segments)} segments ({total_size} bytes)")
+
+        async def fetch(segment):
+            start, end, done = segment
+            if start + done > end:
+                return True
+            headers = {"Range": f"bytes={start + done}-{end}"}
+            validator = meta.get("etag") or meta.get("last_modified")
+            if validator:
+                headers["If-Range"] = validator
+            async with session.get(file_url, headers=headers, timeout=self.session_manager.download_timeout) as response:
+                response.raise_for_status()
+                if response.status != 206:
+                    raise RangeMismatchError(f"Server ignored the byte range for {part_path}; the file may have changed")
+                range_start, _, _ = parse_content_range(response.headers.get("Content-Range"))
+                if range_start != start + done:
+                    raise RangeMismatchError(f"Server sent {part_path} from byte {range_start}, expected {start + done}")
+                if meta.get("etag") is None:
+                    meta["etag"] = response.headers.get("ETag")
+                    meta["last_modified"] = response.headers.get("Last-Modified")
+                async with aiofiles.open(part_path, "r+b") as f:
+                    await f.seek(start + done)
+                    async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
                         if chunk:
+                            chunk = chunk[:end + 1 - start - segment[2]]
                             await f.write(chunk)
-                            downloaded_size += len(chunk)
-                            if status_callback and total_size > 0:
-                                progress = int((downloaded_size / total_size) * 100)
-                                if asyncio.iscoroutinefunction(status_callback):
-                                    await status_callback(course_name, course_id, "Downloading", progress)
-                                else:
-                                    status_callback(course_name, course_id, "Downloading", progress)
-
+                            segment[2] += len(chunk)
+                            await progress.add(len(chunk), total_size)
                             if self.stop_event.is_set():  # Check stop event
-                                logging.info(f"Download stopped for course: {course_name} (ID: {course_id})")
-                                return
+                                return False
+            return True
 
-                logging.info(f"Downloaded backup: {file_path}")
+        tasks = [asyncio.create_task(fetch(segment)) for segment in segments]
+        try:
+            results = await asyncio.gather(*tasks)
+        except Exception as e:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            # Network errors and timeouts keep the .part so each segment resumes where it stopped
+            if isinstance(e, RangeMismatchError):
+                self._discard_partial_download(part_path)
+            raise
+        finally:
+            if os.path.exists(part_path):  # Not when a mismatch discarded it
+                _write_json(part_path + META_SUFFIX, meta)
+        return all(results)
+
+    def _find_partial_download(self, course_dir: str, file_url: str):
+        """
+        Return ``(part_path, meta)`` for a leftover ``.part`` downloaded from
+        ``file_url``. Partial files from other URLs belong to an older export
+        and are removed so they are never mixed with new data.
+        """
+        found = (None, None)
+        for name in os.listdir(course_dir):
+            if not name.endswith(PART_SUFFIX):
+                continue
+            part_path = os.path.join(course_dir, name)
+            meta = _read_json(part_path + META_SUFFIX)
+            if meta and meta.get("url") == file_url and not found[0]:
+                found = (part_path, meta)
+            else:
+                self._discard_partial_download(part_path)
+        return found
+
+    @staticmethod
+    def _discard_partial_download(part_path: str):
+        for path in (part_path, part_path + META_SUFFIX):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logging.warning(f"Could not remove partial download {path}: {e}")
+
+    async def close(self):
+        """Closes the HTTP session if this runner created it."""
+        if self._owns_session:
+            await self.session_manager.close()
 
     async def manage_backups(self, course_name: str):
         course_dir = os.path.join(self.output_dir, course_name)
@@ -193,20 +626,194 @@ class BackupRunner:
             logging.error(f"Error managing backups for {course_name}: {e}")
 
     async def process_queue(self, queue: asyncio.Queue):
-        """Process tasks from the queue concurrently with a concurrency limit."""
-        async def worker():
-            while not queue.empty():
+        """Process the ``(course_name, course_id, status_callback)`` tasks already in the queue."""
+        courses = []
+        while not queue.empty():
+            courses.append(queue.get_nowait())
+            queue.task_done()
+        pool = CoursePool(self)
+        for course in await self.plan_courses(courses):
+            if not await pool.submit(*course):
+                break
+        await pool.drain()
+
+    async def process_source(self, courses, status_callback=None, source_done=None) -> int:
+        """
+        Back up courses from an iterable or async iterable of rows (dicts
+        with ``sanitized_name`` and ``course_id``, as produced by CSVValidator
+        or CourseDiscovery). Rows are pulled only as export workers free up,
+        so work starts before the source is exhausted. With a schedule other
+        than FIFO, or a deadline, the whole source is read first so it can be
+        planned. ``source_done`` is called once the source has been read
+        (or the run stopped taking courses), while queued courses may still run.
+        Returns the number of courses taken from the source.
+        """
+        pool = CoursePool(self).start()
+        source_error = None
+        planned_out = 0  # Deferred while planning, so never submitted
+        try:
+            if self.schedule != SCHEDULE_FIFO or self.deadline is not None:
+                courses, planned_out = await self._plan_source(courses, status_callback)
+            await pool.feed(courses, status_callback)
+            if source_done:
+                source_done()
+        except Exception as e:
+            logging.error(f"Course source failed after {pool.submitted} courses: {e}")
+            source_error = e
+        await pool.drain()
+        if source_error:
+            raise source_error
+        return pool.submitted + planned_out
+
+    async def plan_courses(self, courses: list) -> list:
+        """
+        Order ``(course_name, course_id, status_callback)`` tuples by the
+        runner's schedule. With a deadline, courses predicted not to finish
+        in time are reported as "Deferred" and left out.
+        """
+        if self.deadline is None and (self.schedule == SCHEDULE_FIFO or len(courses) < 2):
+            return list(courses)
+        model = self.duration_model = DurationModel(self.journal.durations() if self.journal else {})
+        if self.size_probe:
+            unknown = [course_id for _, course_id, _ in courses if not model.has_estimate(course_id)]
+            semaphore = asyncio.Semaphore(self.concurrency_limit)
+
+            async def probe(course_id):
+                async with semaphore:
+                    size = await probe_course_size(self.api_handler, course_id)
+                if size is not None:
+                    model.set_size(course_id, size)
+
+            await asyncio.gather(*(probe(course_id) for course_id in unknown))
+        if self.deadline is not None:
+            seconds_left = self.deadline - time.time()
+            priorities = self.journal.priorities() if self.journal else {}
+            ordered, deferred = plan_deadline(courses, model, seconds_left, self.download_limiter.limit, priorities)
+            logging.info(f"{len(ordered)} courses fit before the deadline in {seconds_left:.0f}s, "
+                         f"{len(deferred)} deferred to the next run")
+            for course in deferred:
+                await self._defer(*course)
+            return ordered
+
+        ordered = order_courses(courses, self.schedule, model)
+        predictions = [model.predict(course_id) for _, course_id, _ in ordered]
+        logging.info(
+            f"Scheduled {len(ordered)} courses {self.schedule}: predicted {sum(predictions):.0f}s of work, "
+            f"no faster than {makespan_lower_bound(predictions, self.download_limiter.limit):.0f}s"
+        )
+        return ordered
+
+    def _fits_deadline(self, course_id) -> bool:
+        """True if the course is predicted to finish before the deadline (always, without one)."""
+        if self.deadline is None:
+            return True
+        if self.duration_model is None:
+            self.duration_model = DurationModel(self.journal.durations() if self.journal else {})
+        return time.time() + self.duration_model.predict(course_id) <= self.deadline
+
+    async def _defer(self, course_name, course_id, status_callback):
+        """Leave a course for the next run, which will start it ahead of the others."""
+        logging.info(f"Deferred to the next run: {course_name} (ID: {course_id})")
+        if self.journal:
+            self.journal.defer(course_id, course_name)
+            self._journaled_status[course_id] = "Deferred"
+        await self._notify(status_callback, course_name, course_id, "Deferred", 0)
+
+    def _reach_deadline(self):
+        logging.info("Deadline reached; stopping the backup run.")
+        self.deadline_reached = True
+        self.stop_event.set()
+
+    async def _plan_source(self, courses, status_callback):
+        """
+        Read every row from a source. Returns the rows to run, in scheduled
+        order, and the number deferred by planning.
+        """
+        if hasattr(courses, "__aiter__"):
+            rows = [row async for row in courses]
+        else:
+            rows = list(courses)
+        by_id = {}
+        for row in rows:
+            by_id.setdefault(str(row["course_id"]), []).append(row)
+        planned = await self.plan_courses([(row["sanitized_name"], row["course_id"], status_callback) for row in rows])
+        return [by_id[str(course_id)].pop(0) for _, course_id, _ in planned], len(rows) - len(planned)
+
+    async def _run_pipeline(self, next_course, course_done=None):
+        """
+        Run courses returned by ``next_course()`` (None when there are no
+        more) through a two-stage pipeline. ``course_done()``, if given, is
+        called as each course leaves the pipeline.
+
+        Export workers (``export_concurrency``) trigger exports and wait for
+        Canvas to build them, which is server-side work, so many can run at
+        once. Finished exports go through a bounded hand-off queue to download
+        workers (``download_concurrency``), limited by bandwidth and disk.
+        When downloads fall behind, the hand-off queue fills up and export
+        workers wait before starting more exports. With auto-tuning, the
+        number of downloads allowed at once follows the download tuner and
+        the tuners run for as long as the pipeline does.
+        """
+        download_queue = asyncio.Queue(maxsize=self.download_concurrency)
+
+        async def export_worker():
+            while True:
                 if self.stop_event.is_set():  # Check stop event
                     logging.info("Backup process stopped by user.")
                     break
 
-                course_name, course_id, status_callback = await queue.get()
-                async with self.semaphore:
-                    await self.run_backup(course_name, course_id, status_callback)
-                queue.task_done()
+                course = await next_course()
+                if course is None:
+                    break
+                course_name, course_id, status_callback = course
+                if not self._fits_deadline(course_id):
+                    # Starting now could not finish in time; keep the worker for shorter courses
+                    await self._defer(course_name, course_id, status_callback)
+                    if course_done:
+                        course_done()
+                    continue
+                ready = None
+                try:
+                    ready = await self.prepare_export(course_name, course_id, status_callback)
+                finally:
+                    if not (ready and ready[0] != PHASE_COMPLETED) and course_done:
+                        course_done()
+                if ready and ready[0] != PHASE_COMPLETED:
+                    await download_queue.put((course_name, course_id, status_callback, ready))
+
+        async def download_worker():
+            while True:
+                item = await download_queue.get()
+                if item is None:
+                    break
+                course_name, course_id, status_callback, (phase, export_url) = item
+                try:
+                    # Only running downloads hold a slot, so the tuner sees real usage
+                    async with self.download_limiter:
+                        await self.finish_download(course_name, course_id, phase, export_url, status_callback)
+                finally:
+                    if course_done:
+                        course_done()
+
+        deadline_timer = None
+        if self.deadline is not None:
+            deadline_timer = asyncio.get_running_loop().call_later(
+                max(0.0, self.deadline - time.time()), self._reach_deadline
+            )
 
-        # Create a list of worker tasks
-        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency_limit)]
+        export_workers = [asyncio.create_task(export_worker()) for _ in range(self.export_concurrency)]
+        download_workers = [asyncio.create_task(download_worker()) for _ in range(self.download_workers)]
+        tuners = [asyncio.create_task(tuner.run(self.stop_event)) for tuner in self.tuners]
 
-        # Wait for all worker tasks to complete
-        await asyncio.gather(*workers)
\ No newline at end of file
+        try:
+            # Wait for the export stage, then let the download stage drain
+            await asyncio.gather(*export_workers)
+            for _ in download_workers:
+                await download_queue.put(None)
+            await asyncio.gather(*download_workers)
+        finally:
+            if deadline_timer:
+                deadline_timer.cancel()
+            for tuner in tuners:
+                tuner.cancel()
+            await asyncio.gather(*tuners, return_exceptions=True)
@@ -0,0 +1,330 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import signal
+import sys
+import time
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+from cryptography.fernet import Fernet
+from backup_manager.api_handler import CanvasAPIHandler
+from backup_manager.concurrency import ConcurrencySettings
+from backup_manager.backup_runner import BackupRunner, DOWNLOAD_SEGMENTS
+from backup_manager.course_discovery import CourseDiscovery
+from backup_manager.csv_validator import CSVValidator, CSVValidationError, ValidationReport
+from backup_manager.export_reuse import ExportReusePolicy
+from backup_manager.http_session import HTTPSessionManager
+from backup_manager.job_journal import JobJournal, JournalBusyError
+from backup_manager.response_cache import ResponseCache
+from backup_manager.scheduler import SCHEDULES, configured_schedule
+from platform_utils import get_app_data_dir, read_config
+
+# Process exit codes
+EXIT_OK = 0
+EXIT_FAILURES = 1
+EXIT_CONFIG_ERROR = 2
+EXIT_AUTH_ERROR = 3
+EXIT_BUSY = 4  # Another run holds the job journal
+EXIT_INTERRUPTED = 130
+
+FINAL_STATUSES = ("Completed", "Up to date", "Failed", "Stopped", "Deferred")
+SUCCESS_STATUSES = ("Completed", "Up to date")
+
+
+def parse_deadline(value: str, now: datetime = None) -> float:
+    """
+    Turns ``HH:MM`` (the next time the clock shows it) or a duration such as
+    ``90m`` or ``2h`` into a ``time.time()`` deadline.
+    """
+    now = now or datetime.now()
+    value = value.strip().lower()
+    if value[-1:] in ("m", "h") and value[:-1].replace(".", "", 1).isdigit():
+        minutes = float(value[:-1]) * (60 if value.endswith("h") else 1)
+        return (now + timedelta(minutes=minutes)).timestamp()
+    try:
+        clock = datetime.strptime(value, "%H:%M")
+    except ValueError:
+        raise ValueError(f"Invalid deadline '{value}': use HH:MM, or minutes/hours such as 90m or 2h")
+    deadline = now.replace(hour=clock.hour, minute=clock.minute, second=0, microsecond=0)
+    if deadline <= now:
+        deadline += timedelta(days=1)
+    return deadline.timestamp()
+
+
+def load_credentials(args) -> tuple:
+    """
+    Resolves the Canvas base URL and API token without any GUI prompts.
+
+    Order of precedence: command line flags, environment variables
+    (CANVAS_BASE_URL / CANVAS_API_TOKEN), then the config file and the
+    encrypted token saved by the desktop app.
+    """
+    resources_dir = os.path.join(get_app_data_dir(), "resources")
+    config = read_config(args.config)
+
+    base_url = args.base_url or os.environ.get("CANVAS_BASE_URL") or config.get("base_url")
+
+    token = os.environ.get("CANVAS_API_TOKEN")
+    if args.token_file:
+        with open(args.token_file, "r") as f:
+            token = f.read().strip()
+    if not token:
+        token = config.get("api_token")
+    if not token:
+        token_file = os.path.join(resources_dir, "token.enc")
+        key_file = os.path.join(resources_dir, "key.key")
+        if os.path.exists(token_file) and os.path.exists(key_file):
+            with open(key_file, "rb") as f:
+                key = f.read()
+            with open(token_file, "rb") as f:
+                token = Fernet(key).decrypt(f.read()).decode()
+
+    return base_url, token, config
+
+
+class ProgressPrinter:
+    """Status callback that prints one JSON object per state change to stdout."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self.last_seen = {}
+        self.final_status = {}
+
+    def emit(self, event: str, **fields):
+        record = {"event": event, "ts": round(time.time(), 3)}
+        record.update(fields)
+        self.stream.write(json.dumps(record) + "\n")
+        self.stream.flush()
+
+    def __call__(self, course_name, course_id, status, progress):
+        key = str(course_id)
+        if self.last_seen.get(key) == (status, progress):
+            return
+        self.last_seen[key] = (status, progress)
+        if status in FINAL_STATUSES:
+            self.final_status[key] = status
+        self.emit("status", course_id=key, course_name=course_name, status=status, progress=progress)
+
+
+async def run_backups(args, base_url: str, api_token: str, rows, printer: ProgressPrinter,
+                      report: ValidationReport = None) -> int:
+    """
+    Backs up the given (possibly lazy) CSV rows, or the courses discovered
+    from ``--account`` when ``rows`` is None, and returns an exit code.
+    ``report`` collects the CSV rows that were skipped.
+    """
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except (NotImplementedError, RuntimeError):
+            pass  # Not supported on this platform (e.g. Windows)
+
+    tuning = getattr(args, "tuning", None) or ConcurrencySettings()
+    session_manager = HTTPSessionManager.for_settings(tuning, args.segments)
+    response_cache = None
+    if args.http_cache is not None:  # Bare --http-cache uses the default location in the app data folder
+        response_cache = ResponseCache(args.http_cache or None, ttl=args.http_cache_ttl)
+    api_handler = CanvasAPIHandler(
+        base_url, api_token, concurrency_limit=tuning.api, session_manager=session_manager,
+        response_cache=response_cache,
+    )
+    journal = None
+    try:
+        if not await api_handler.validate_token():
+            printer.emit("error", message="Token validation failed")
+            return EXIT_AUTH_ERROR
+
+        journal = None if args.no_journal else JobJournal(args.journal)
+        if journal:
+            try:
+                journal.lock_run()
+            except JournalBusyError as e:
+                printer.emit("error", message=str(e))
+                return EXIT_BUSY
+        runner = BackupRunner(
+            api_handler, args.out, stop_event, concurrency_limit=tuning.download, journal=journal,
+            export_concurrency=args.export_concurrency, skip_unchanged=args.skip_unchanged,
+            export_reuse=ExportReusePolicy(freshness_window=args.reuse_hours * 3600),
+            download_segments=args.segments, min_segment_size=args.min_segment_mb * 1024 * 1024,
+            session_manager=session_manager, export_timeout=args.export_timeout,
+            schedule=args.schedule, size_probe=args.probe_sizes, deadline=args.deadline, tuning=tuning,
+        )
+        if rows is None:
+            # Discovered courses stream straight into the pipeline as pages arrive
+            courses = CourseDiscovery(
+                api_handler, args.account, include_subaccounts=not args.no_subaccounts,
+                term_ids=args.term, states=args.state, name_pattern=args.name_pattern,
+                search_term=args.search_term,
+            )
+        else:
+            courses = rows
+
+        loaded = False
+
+        def emit_loaded():
+            # The CSV is read lazily, so its counts are only known once every row was taken
+            nonlocal loaded
+            if report is None or loaded:
+                return
+            loaded = True
+            printer.emit("loaded", courses=report.valid, duplicates=report.counts["duplicate"],
+                         skipped=report.counts, examples=report.examples)
+            if report.valid == 0 and not stop_event.is_set():
+                printer.emit("error", message="CSV contains no valid rows after sanitization")
+
+        started = time.monotonic()
+        try:
+            total = await runner.process_source(courses, printer, source_done=emit_loaded)
+        except Exception as e:
+            printer.emit("error", message=f"Reading the course list failed: {e}")
+            return EXIT_FAILURES
+
+        if report is not None:
+            emit_loaded()
+            if report.valid == 0 and not stop_event.is_set():
+                return EXIT_CONFIG_ERROR
+
+        counts = {status: 0 for status in FINAL_STATUSES}
+        for status in printer.final_status.values():
+            counts[status] += 1
+        counts["Stopped"] += total - sum(counts.values())
+        printer.emit(
+            "summary",
+            total=total,
+            completed=counts["Completed"],
+            up_to_date=counts["Up to date"],
+            failed=counts["Failed"],
+            stopped=counts["Stopped"],
+            deferred=counts["Deferred"],
+            elapsed=round(time.monotonic() - started, 1),
+            api=dict(api_handler.rate_limiter.stats(), coalesced=api_handler.coalesced),
+            export_polls=runner.export_poller.requests_made,
+            cache=response_cache.stats() if response_cache else None,
+            tuning={tuner.name: dict(tuner.stats(), decisions=tuner.decisions[-10:]) for tuner in runner.tuners},
+        )
+
+        if stop_event.is_set() and not runner.deadline_reached:
+            return EXIT_INTERRUPTED
+        # Deferred courses are planned work for the next run, not failures
+        if sum(counts[status] for status in SUCCESS_STATUSES) + counts["Deferred"] != total:
+            return EXIT_FAILURES
+        return EXIT_OK
+    finally:
+        await session_manager.close()
+        if response_cache:
+            response_cache.close()
+        if journal:
+            journal.close()  # Releases the run lock
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m backup_manager",
+        description="Run Canvas course backups without the GUI.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run = subparsers.add_parser("run", help="Back up every course listed in a CSV file or found in Canvas accounts")
+    source = run.add_mutually_exclusive_group(required=True)
+    source.add_argument("--csv", help="CSV file with 'Course Name' and 'Course URL' columns")
+    source.add_argument("--account", action="append", help="Back up courses in this Canvas account ID (repeatable)")
+    run.add_argument("--term", action="append", help="Only courses in this enrollment term ID (repeatable, with --account)")
+    run.add_argument("--state", action="append", help="Only courses in this state, e.g. available (repeatable, with --account)")
+    run.add_argument("--name-pattern", help="Only courses whose name matches this regular expression (with --account)")
+    run.add_argument("--search-term", help="Canvas-side course name search, applied before --name-pattern")
+    run.add_argument("--no-subaccounts", action="store_true", help="Skip courses that belong to sub-accounts")
+    run.add_argument("--out", help="Backup folder (defaults to backup_folder from the config file)")
+    run.add_argument("--concurrency", type=int,
+                     help="Number of courses downloaded in parallel, the starting value with --auto-tune "
+                          "(default 5, or download_concurrency)")
+    run.add_argument("--export-concurrency", type=int, help="Number of Canvas exports in flight (default 4x --concurrency)")
+    run.add_argument("--api-concurrency", type=int,
+                     help="Concurrent Canvas API requests, the starting value with --auto-tune (default 10, or api_concurrency)")
+    run.add_argument("--auto-tune", action="store_true",
+                     help="Tune download and API concurrency to observed throughput (or set auto_tune=true in the config)")
+    run.add_argument("--schedule", choices=SCHEDULES,
+                     help="Course order: fifo (source order), longest_first (shortest run) or shortest_first "
+                          "(most courses early); defaults to schedule from the config, else fifo")
+    run.add_argument("--probe-sizes", action="store_true",
+                     help="Ask Canvas for the size of courses with no duration history before scheduling")
+    run.add_argument("--deadline", help="Finish by HH:MM (or within e.g. 90m / 2h): courses that will not fit are "
+                                        "deferred to the next run with raised priority (command line only)")
+    run.add_argument("--export-timeout", type=float, default=3600, help="Seconds to wait for Canvas to build one export")
+    run.add_argument("--segments", type=int, default=DOWNLOAD_SEGMENTS, help="Concurrent byte ranges per large download (1 disables)")
+    run.add_argument("--min-segment-mb", type=int, default=64, help="Smallest byte range worth its own connection")
+    run.add_argument("--base-url", help="Canvas base URL (or set CANVAS_BASE_URL)")
+    run.add_argument("--token-file", help="File containing the Canvas API token (or set CANVAS_API_TOKEN)")
+    run.add_argument("--config", help="Config file with key=value lines (defaults to the app config.txt)")
+    run.add_argument("--skip-unchanged", action="store_true",
+                     help="Skip courses whose Canvas metadata has not changed since their last backup")
+    run.add_argument("--reuse-hours", type=float, default=18, help="Reuse Canvas exports finished within this many hours")
+    run.add_argument("--journal", help="Job journal database used to resume interrupted runs")
+    run.add_argument("--no-journal", action="store_true", help="Start every course from scratch")
+    run.add_argument("--http-cache", nargs="?", const="", metavar="PATH",
+                     help="Cache Canvas metadata responses on disk and revalidate them with ETags")
+    run.add_argument("--http-cache-ttl", type=float, default=300, help="Seconds a cached response is used without asking Canvas")
+    run.add_argument("--log-level", default="INFO", help="Logging level written to stderr")
+    return parser
+
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    # Logs go to stderr so stdout stays machine-readable
+    logging.basicConfig(
+        level=getattr(logging, args.log_level.upper(), logging.INFO),
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        stream=sys.stderr,
+    )
+    printer = ProgressPrinter()
+
+    try:
+        base_url, api_token, config = load_credentials(args)
+    except Exception as e:
+        printer.emit("error", message=f"Failed to load credentials: {e}")
+        return EXIT_CONFIG_ERROR
+    if not base_url or not api_token:
+        printer.emit("error", message="Canvas base URL and API token are required")
+        return EXIT_CONFIG_ERROR
+
+    args.out = args.out or config.get("backup_folder")
+    if not args.out:
+        printer.emit("error", message="No backup folder given (use --out)")
+        return EXIT_CONFIG_ERROR
+    os.makedirs(args.out, exist_ok=True)
+
+    # Starting values and tuner bounds come from the config file; explicit options win
+    args.tuning = ConcurrencySettings.from_config(
+        config, download=args.concurrency, api=args.api_concurrency, auto_tune=True if args.auto_tune else None,
+    )
+
+    args.schedule = args.schedule or configured_schedule(config)
+
+    if args.deadline:
+        try:
+            args.deadline = parse_deadline(args.deadline)
+        except ValueError as e:
+            printer.emit("error", message=str(e))
+            return EXIT_CONFIG_ERROR
+
+    rows, report = None, None
+    if args.csv:
+        domain = urlparse(base_url).netloc.replace(":443", "")
+        validator = CSVValidator(args.csv, domain)
+        report = ValidationReport(max_examples=20)
+        try:
+            # Rows are read lazily as the pipeline has room, so large files start at once
+            rows = validator.iter_rows(report)
+        except CSVValidationError as e:
+            printer.emit("error", message=str(e))
+            return EXIT_CONFIG_ERROR
+
+    try:
+        return asyncio.run(run_backups(args, base_url, api_token, rows, printer, report))
+    except KeyboardInterrupt:
+        return EXIT_INTERRUPTED
@@ -0,0 +1,231 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from statistics import mean
+from typing import Optional
+
+
+class AdjustableLimiter:
+    """
+    Async semaphore whose limit can change while tasks hold it.
+
+    Lowering the limit never interrupts a holder; new acquirers simply wait
+    until enough holders have released. Used with ``async with``.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = max(1, int(limit))
+        self.in_use = 0
+        self.peak = 0  # Most slots held at once since the tuner last looked
+        self._waiters = deque()
+
+    async def acquire(self):
+        while self.in_use >= self.limit:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    self._wake()  # Pass the wake-up on to the next waiter
+                raise
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        self.in_use += 1
+        self.peak = max(self.peak, self.in_use)
+
+    def release(self):
+        self.in_use -= 1
+        self._wake()
+
+    def set_limit(self, limit: int):
+        self.limit = max(1, int(limit))
+        self._wake()
+
+    def _wake(self):
+        free = self.limit - self.in_use
+        for waiter in list(self._waiters):
+            if free <= 0:
+                break
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.release()
+
+
+class ConcurrencySettings:
+    """
+    Starting concurrency for downloads and Canvas API requests, the bounds
+    the auto-tuner keeps them in, and whether it runs (off unless asked
+    for). Read from the config file with ``from_config``.
+    """
+
+    # config.txt keys
+    KEYS = {
+        "download": "download_concurrency",
+        "download_min": "download_concurrency_min",
+        "download_max": "download_concurrency_max",
+        "api": "api_concurrency",
+        "api_min": "api_concurrency_min",
+        "api_max": "api_concurrency_max",
+    }
+
+    def __init__(self, download: int = 5, download_min: int = 1, download_max: int = 16,
+                 api: int = 10, api_min: int = 2, api_max: int = 32, auto_tune: bool = False):
+        self.download_min = max(1, download_min)
+        self.download_max = max(self.download_min, download_max)
+        self.download = min(max(download, self.download_min), self.download_max)
+        self.api_min = max(1, api_min)
+        self.api_max = max(self.api_min, api_max)
+        self.api = min(max(api, self.api_min), self.api_max)
+        self.auto_tune = auto_tune
+
+    @classmethod
+    def from_config(cls, config: dict, **overrides):
+        """
+        Settings from ``key=value`` config entries; invalid values fall back
+        to the defaults. ``overrides`` (command-line values) win, and an
+        explicit ``download`` or ``api`` moves its bounds to include it.
+        """
+        values = {}
+        for name, key in cls.KEYS.items():
+            if key not in config:
+                continue
+            try:
+                values[name] = int(config[key])
+            except ValueError:
+                logging.warning(f"Ignoring invalid {key} in config: {config[key]!r}")
+        if "auto_tune" in config:
+            values["auto_tune"] = config["auto_tune"].strip().lower() not in ("0", "false", "no", "off")
+        overrides = {name: value for name, value in overrides.items() if value is not None}
+        configured = cls(**values)
+        for name in ("download", "api"):
+            if name in overrides:
+                # An explicit value widens the bounds instead of being clamped by them
+                value = max(1, overrides[name])
+                values[f"{name}_min"] = min(getattr(configured, f"{name}_min"), value)
+                values[f"{name}_max"] = max(getattr(configured, f"{name}_max"), value)
+        values.update(overrides)
+        return cls(**values)
+
+
+class ConcurrencyTuner:
+    """
+    Additive-increase/multiplicative-decrease control of one AdjustableLimiter.
+
+    Callers report completed work (bytes or requests), latencies, throttled
+    responses and errors. Every ``interval`` seconds the tuner compares the
+    window with the previous one. A 429, latency well above the best seen,
+    or errors cut the limit by ``decrease_factor``. Otherwise the limit
+    grows by ``increase_step`` while every slot is in use and throughput
+    keeps improving, and steps back if the last increase made it worse.
+    The limit stays within ``[min_limit, max_limit]``.
+    """
+
+    def __init__(self, name: str, limiter: AdjustableLimiter, min_limit: int, max_limit: int,
+                 interval: float = 15.0, increase_step: int = 1, decrease_factor: float = 0.5,
+                 latency_tolerance: float = 1.5, min_gain: float = 0.05):
+        self.name = name
+        self.limiter = limiter
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.interval = interval
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.min_gain = min_gain
+
+        self.limiter.set_limit(min(max(limiter.limit, self.min_limit), self.max_limit))
+        self.baseline_latency = None
+        self.last_throughput = None
+        self.last_step = 0  # +1 after an increase, -1 after a decrease
+        self.decisions = []
+        self._reset_window()
+
+    def _reset_window(self):
+        self.work = 0
+        self.latencies = []
+        self.throttled = 0
+        self.errors = 0
+        self.limiter.peak = self.limiter.in_use
+        self._window_started = time.monotonic()
+
+    def record(self, amount: float = 1, latency: float = None):
+        """Count finished work (bytes, requests) and, optionally, how long it took."""
+        self.work += amount
+        if latency is not None:
+            self.latencies.append(latency)
+
+    def record_throttled(self):
+        self.throttled += 1
+
+    def record_error(self):
+        self.errors += 1
+
+    def adjust(self, elapsed: float = None) -> Optional[dict]:
+        """Close the current window and change the limit if needed. Returns the decision, if any."""
+        elapsed = elapsed or max(time.monotonic() - self._window_started, 1e-6)
+        throughput = self.work / elapsed
+        saturated = self.limiter.peak >= self.limiter.limit  # More slots only help if these were all used
+        latency = mean(self.latencies) if self.latencies else None
+        limit = self.limiter.limit
+        new_limit, reason = limit, None
+
+        if self.throttled:
+            new_limit, reason = int(limit * self.decrease_factor), f"{self.throttled} throttled responses"
+        elif latency and self.baseline_latency and latency > self.baseline_latency * self.latency_tolerance:
+            new_limit = int(limit * self.decrease_factor)
+            reason = f"latency {latency:.2f}s vs {self.baseline_latency:.2f}s baseline"
+        elif self.errors:
+            new_limit, reason = int(limit * self.decrease_factor), f"{self.errors} errors"
+        elif saturated and self.work and (
+                self.last_throughput is None or throughput >= self.last_throughput * (1 + self.min_gain)):
+            new_limit, reason = limit + self.increase_step, f"throughput {throughput:.1f}/s improving"
+        elif self.work and self.last_step > 0 and throughput < self.last_throughput * (1 - self.min_gain):
+            new_limit, reason = limit - self.increase_step, f"throughput {throughput:.1f}/s fell after increase"
+
+        if latency is not None:
+            # The best latency seen, drifting up slowly so a new normal is eventually accepted
+            self.baseline_latency = latency if self.baseline_latency is None else min(latency, self.baseline_latency * 1.02)
+        if self.work:
+            self.last_throughput = throughput
+        self._reset_window()
+
+        new_limit = min(max(new_limit, self.min_limit), self.max_limit)
+        if new_limit == limit:
+            self.last_step = 0
+            return None
+        self.last_step = 1 if new_limit > limit else -1
+        self.limiter.set_limit(new_limit)
+        decision = {"at": time.time(), "limit": new_limit, "previous": limit, "reason": reason,
+                    "throughput": round(throughput, 2), "latency": round(latency, 3) if latency is not None else None}
+        self.decisions.append(decision)
+        logging.info(f"Concurrency tuner ({self.name}): {limit} -> {new_limit} ({reason})")
+        return decision
+
+    async def run(self, stop_event: asyncio.Event):
+        """Adjust every ``interval`` seconds until cancelled or ``stop_event`` is set."""
+        self._reset_window()
+        while not stop_event.is_set():
+            try:
+                await asyncio.wait_for(stop_event.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                self.adjust()
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limiter.limit,
+            "min": self.min_limit,
+            "max": self.max_limit,
+            "adjustments": len(self.decisions),
+            "throughput": round(self.last_throughput, 2) if self.last_throughput is not None else None,
+            "baseline_latency": round(self.baseline_latency, 3) if self.baseline_latency is not None else None,
+        }
@@ -0,0 +1,74 @@
+import logging
+import re
+from typing import AsyncIterator, Dict, Iterable
+from backup_manager.csv_validator import sanitize_folder_name
+
+
+class CourseDiscovery:
+    """
+    Enumerates courses from Canvas accounts as a source of backup rows.
+
+    Yields the same ``{"original_name", "sanitized_name", "course_id"}`` rows
+    as CSVValidator, one at a time as pages arrive, so backups of the first
+    courses can start while later pages are still being fetched.
+    """
+
+    def __init__(
+        self,
+        api_handler,
+        account_ids: Iterable,
+        include_subaccounts: bool = True,
+        term_ids: Iterable = None,
+        states: Iterable[str] = None,
+        name_pattern: str = None,
+        search_term: str = None,
+        per_page: int = 100,
+    ):
+        self.api_handler = api_handler
+        self.account_ids = [str(account_id) for account_id in account_ids]
+        self.include_subaccounts = include_subaccounts
+        self.term_ids = [str(term_id) for term_id in term_ids or []]
+        self.states = list(states or [])
+        self.name_pattern = re.compile(name_pattern, re.IGNORECASE) if name_pattern else None
+        self.search_term = search_term
+        self.per_page = per_page
+        self.seen_course_ids = set()
+
+    def _params(self, term_id: str = None) -> list:
+        params = [("state[]", state) for state in self.states]
+        if term_id:
+            params.append(("enrollment_term_id", term_id))
+        if self.search_term:
+            params.append(("search_term", self.search_term))
+        return params
+
+    async def iter_courses(self) -> AsyncIterator[Dict]:
+        for account_id in self.account_ids:
+            for term_id in self.term_ids or [None]:
+                endpoint = f"/api/v1/accounts/{account_id}/courses"
+                logging.info(f"Discovering courses in account {account_id}" + (f", term {term_id}" if term_id else ""))
+                async for course in self.api_handler.paginate(endpoint, self._params(term_id), per_page=self.per_page):
+                    row = self._to_row(course, account_id)
+                    if row:
+                        yield row
+
+    def __aiter__(self):
+        return self.iter_courses()
+
+    def _to_row(self, course: dict, account_id: str):
+        course_id = str(course.get("id", ""))
+        if not course_id or course_id in self.seen_course_ids:
+            return None
+        # Canvas includes sub-account courses; keep only direct ones when asked to
+        if not self.include_subaccounts and str(course.get("account_id")) != account_id:
+            return None
+        name = course.get("name") or ""
+        if self.name_pattern and not self.name_pattern.search(name):
+            return None
+
+        self.seen_course_ids.add(course_id)
+        return {
+            "original_name": name,
+            "sanitized_name": sanitize_folder_name(name) or f"Course_{course_id}",
+            "course_id": course_id,
+        }
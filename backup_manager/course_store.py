@@ -0,0 +1,140 @@
+import threading
+import time
+from enum import Enum
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+
+class CourseStatus(str, Enum):
+    """Backup status of a course. Compares equal to its display text."""
+
+    PENDING = "Pending"
+    QUEUED = "Queued"
+    BACKING_UP = "Backing up"
+    DOWNLOADING = "Downloading"
+    COMPLETED = "Completed"
+    UP_TO_DATE = "Up to date"
+    FAILED = "Failed"
+    STOPPED = "Stopped"
+    DEFERRED = "Deferred"  # Left for the next run because it would not finish before the deadline
+
+    @property
+    def is_final(self) -> bool:
+        return self in FINAL_STATUSES
+
+    def __str__(self):
+        return self.value
+
+
+FINAL_STATUSES = frozenset({
+    CourseStatus.COMPLETED, CourseStatus.UP_TO_DATE, CourseStatus.FAILED, CourseStatus.STOPPED, CourseStatus.DEFERRED,
+})
+
+
+class CourseRecord:
+    """Live state of one course, shared by the GUI and BackupRunner."""
+
+    __slots__ = (
+        "course_id", "name", "original_name", "status", "progress", "bytes_downloaded",
+        "started_at", "updated_at", "finished_at", "last_error",
+    )
+
+    def __init__(self, course_id, name: str, original_name: str = None, status=CourseStatus.PENDING,
+                 progress: int = 0, bytes_downloaded: int = 0, last_error: str = None):
+        self.course_id = str(course_id)
+        self.name = name
+        self.original_name = original_name or name
+        self.status = CourseStatus(status)
+        self.progress = int(progress)
+        self.bytes_downloaded = bytes_downloaded
+        self.started_at = None
+        self.updated_at = None
+        self.finished_at = None
+        self.last_error = last_error
+
+    def display_values(self) -> tuple:
+        """Values for the course table columns."""
+        return (self.name, self.course_id, self.status.value, f"{self.progress}%")
+
+    def __repr__(self):
+        return f"CourseRecord({self.course_id!r}, {self.name!r}, {self.status.value!r}, {self.progress})"
+
+
+class CourseStore:
+    """
+    Course records keyed by course_id, in load order.
+
+    ``update`` is O(1) and may be called from the backup engine thread. The
+    IDs of changed courses are collected until the GUI takes them with
+    ``take_changes``, and the number of courses in a final status is kept
+    up to date so overall progress needs no scan.
+    """
+
+    def __init__(self):
+        self._records: Dict[str, CourseRecord] = {}
+        self._changed: Set[str] = set()
+        self._lock = threading.Lock()
+        self.finished = 0
+
+    def load(self, records: Iterable[CourseRecord]):
+        """Replace every record."""
+        with self._lock:
+            self._records = {record.course_id: record for record in records}
+            self._changed.clear()
+            self.finished = sum(1 for record in self._records.values() if record.status.is_final)
+
+    def extend(self, records: Iterable[CourseRecord]) -> List[CourseRecord]:
+        """Add records for courses not already in the store; returns the ones added."""
+        added = []
+        with self._lock:
+            for record in records:
+                if record.course_id in self._records:
+                    continue
+                self._records[record.course_id] = record
+                self.finished += record.status.is_final
+                added.append(record)
+        return added
+
+    def get(self, course_id) -> Optional[CourseRecord]:
+        return self._records.get(str(course_id))
+
+    def __iter__(self) -> Iterator[CourseRecord]:
+        return iter(list(self._records.values()))
+
+    def __len__(self):
+        return len(self._records)
+
+    def __contains__(self, course_id):
+        return str(course_id) in self._records
+
+    def update(self, course_id, status=None, progress: int = None, **fields):
+        """Change a course's fields. Unknown courses are ignored."""
+        with self._lock:
+            record = self._records.get(str(course_id))
+            if record is None:
+                return
+            now = time.time()
+            if status is not None:
+                status = CourseStatus(status)
+                self.finished += status.is_final - record.status.is_final
+                if status == CourseStatus.BACKING_UP and record.status != CourseStatus.BACKING_UP:
+                    record.started_at = now
+                    record.finished_at = None
+                elif status.is_final:
+                    record.finished_at = now
+                record.status = status
+            if progress is not None:
+                record.progress = int(progress)
+            for name, value in fields.items():
+                setattr(record, name, value)
+            record.updated_at = now
+            self._changed.add(record.course_id)
+
+    def take_changes(self) -> Set[str]:
+        """IDs of the courses changed since the last call."""
+        with self._lock:
+            changed, self._changed = self._changed, set()
+        return changed
+
+    @property
+    def overall_progress(self) -> float:
+        return (self.finished / len(self._records)) * 100 if self._records else 0
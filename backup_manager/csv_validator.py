@@ -2,14 +2,133 @@ import csv
 import logging
 import re
 from urllib.parse import urlparse
-from typing import Tuple, List, Dict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+INVALID_FILENAME_CHARS = re.compile(r'[<>:"/\\|?*]')  # Forbidden in filenames
+REPEATED_UNDERSCORES = re.compile(r'_+')
+COURSE_ID_PATTERN = re.compile(r'/courses/(\d+)')
+EXPECTED_HEADER = ["Course Name", "Course URL"]
+
+
+def sanitize_folder_name(name: str) -> str:
+    """Makes course name filesystem-safe"""
+    # Remove invalid characters
+    sanitized = INVALID_FILENAME_CHARS.sub('_', name)
+    # Trim whitespace and dots
+    sanitized = sanitized.strip().strip('.')
+    # Collapse multiple underscores
+    sanitized = REPEATED_UNDERSCORES.sub('_', sanitized)
+    return sanitized
+
+
+class CSVValidationError(ValueError):
+    """The CSV cannot be read as a course list at all (missing file, wrong header)."""
+
+
+class ValidationReport:
+    """
+    Rows skipped while reading a course CSV.
+
+    Every skipped row is counted by kind, but only the first ``max_examples``
+    of each kind are kept (and logged), so the report stays small for very
+    large files. ``max_examples=None`` keeps them all.
+    """
+
+    KINDS = ("malformed", "invalid_url", "wrong_domain", "duplicate")
+
+    def __init__(self, max_examples: Optional[int] = 100):
+        self.max_examples = max_examples
+        self.valid = 0
+        self.counts = dict.fromkeys(self.KINDS, 0)
+        self.examples: Dict[str, List[list]] = {kind: [] for kind in self.KINDS}
+
+    def add(self, kind: str, row_num: int, course_name: str, detail: str, message: str):
+        self.counts[kind] += 1
+        examples = self.examples[kind]
+        if self.max_examples is None or len(examples) < self.max_examples:
+            examples.append([row_num, course_name, detail])
+            logging.warning(message)
+        elif len(examples) == self.max_examples and self.counts[kind] == self.max_examples + 1:
+            logging.warning(f"Further '{kind}' rows are counted but not logged")
+
+    @property
+    def skipped(self) -> int:
+        return sum(self.counts.values())
+
+    def as_dict(self) -> dict:
+        return {"valid": self.valid, "skipped": dict(self.counts), "examples": self.examples}
+
 
 class CSVValidator:
     def __init__(self, filepath: str, expected_domain: str = None):
         self.filepath = filepath
         self.expected_domain = expected_domain
         self.seen_course_ids = set()
-        self.invalid_chars = re.compile(r'[<>:"/\\|?*]')  # Forbidden in filenames
+        self.invalid_chars = INVALID_FILENAME_CHARS
+
+    def iter_rows(self, report: ValidationReport = None) -> Iterator[Dict]:
+        """
+        Stream validated, sanitised course rows from the CSV one at a time.
+
+        The file and header are checked immediately, raising
+        ``CSVValidationError``; rows are then read lazily, so a large file
+        starts producing work at once and only the set of seen course IDs
+        grows with its size. Skipped rows are recorded in ``report``.
+        """
+        report = report if report is not None else ValidationReport()
+        try:
+            csvfile = open(self.filepath, "r", encoding="utf-8-sig", newline="")
+        except FileNotFoundError:
+            raise CSVValidationError(f"File not found: {self.filepath}")
+        reader = csv.DictReader(csvfile)
+        try:
+            if not reader.fieldnames or [col.strip() for col in reader.fieldnames[:2]] != EXPECTED_HEADER:
+                raise CSVValidationError("First two columns must be 'Course Name' and 'Course URL'")
+        except Exception:
+            csvfile.close()
+            raise
+        return self._rows(csvfile, reader, report)
+
+    def _rows(self, csvfile, reader, report: ValidationReport) -> Iterator[Dict]:
+        with csvfile:
+            for row_num, row in enumerate(reader, start=2):
+                if len(row) < 2:
+                    report.add("malformed", row_num, "", str(row), f"Skipping malformed row {row_num}: {row}")
+                    continue  # Skip bad rows instead of stopping execution
+
+                course_name = (row.get("Course Name") or "").strip()
+                course_url = (row.get("Course URL") or "").strip()
+                course_id = self._extract_course_id(course_url) if course_url else None
+
+                if not course_id:
+                    report.add("invalid_url", row_num, course_name, course_url,
+                               f"Skipping row {row_num} due to invalid Canvas course URL")
+                    continue
+
+                # Check domain match
+                if self.expected_domain and urlparse(course_url).netloc != self.expected_domain:
+                    report.add("wrong_domain", row_num, course_name, course_url,
+                               f"Row {row_num}: URL domain must be {self.expected_domain}")
+                    continue
+
+                # Remove duplicates
+                if course_id in self.seen_course_ids:
+                    report.add("duplicate", row_num, course_name, course_id,
+                               f"Duplicate course ID [{course_name}, {course_id}] skipped")
+                    continue
+                self.seen_course_ids.add(course_id)
+
+                # Sanitize course name
+                sanitized_name = self._sanitize_folder_name(course_name)
+                if not sanitized_name:
+                    sanitized_name = f"Course_{course_id}"  # Fallback
+
+                report.valid += 1
+                yield {
+                    "original_name": course_name,
+                    "sanitized_name": sanitized_name,
+                    "course_id": course_id
+                }
 
     def validate_and_sanitize(self) -> Tuple[bool, str, List[Dict], List[Tuple[int, str, str]]]:
         """Validate a CSV file and produce sanitised course information.
@@ -24,76 +143,24 @@ class CSVValidator:
                   any duplicate courses encountered as ``(row_num, name,
                   course_id)``.
         """
+        report = ValidationReport(max_examples=None)
         try:
-            with open(self.filepath, "r", encoding="utf-8-sig") as csvfile:
-                reader = csv.DictReader(csvfile)
-                sanitized_rows: List[Dict] = []
-                duplicate_courses: List[Tuple[int, str, str]] = []
-
-                # Validate header
-                if not reader.fieldnames or [col.strip() for col in reader.fieldnames[:2]] != ["Course Name", "Course URL"]:
-                    return False, "First two columns must be 'Course Name' and 'Course URL'", [], []
-
-                # Process rows
-                for row_num, row in enumerate(reader, start=2):
-                    if len(row) < 2:
-                        print(f"⚠ Warning: Skipping malformed row {row_num}: {row}")  # Debugging output
-                        continue  # Skip bad rows instead of stopping execution
-
-                    course_name = row.get("Course Name", "").strip()
-                    course_url = row.get("Course URL", "").strip()
-                    course_id = self._extract_course_id(course_url) if course_url else None
-                    
-                    if not course_id:
-                        print(f"⚠ Warning: Skipping row {row_num} due to invalid Canvas course URL")
-                        continue
-
-                    # Check domain match
-                    if self.expected_domain:
-                        parsed = urlparse(course_url)
-                        if parsed.netloc != self.expected_domain:
-                            print(f"⚠ Warning: Row {row_num}: URL domain must be {self.expected_domain}")
-                            continue
-
-                    # Remove duplicates
-                    if course_id in self.seen_course_ids:
-                        duplicate_courses.append([row_num, course_name, course_id])
-                        logging.warning(f"Duplicate course ID [{course_name}, {course_id}] skipped")
-                        continue
-                    self.seen_course_ids.add(course_id)
-
-                    # Sanitize course name
-                    sanitized_name = self._sanitize_folder_name(course_name)
-                    if not sanitized_name:
-                        sanitized_name = f"Course_{course_id}"  # Fallback
-
-                    sanitized_rows.append({
-                        "original_name": course_name,
-                        "sanitized_name": sanitized_name,
-                        "course_id": course_id
-                    })
-
-                if not sanitized_rows:
-                    return False, "CSV contains no valid rows after sanitization", [], duplicate_courses
-
-                return True, "CSV validated and sanitized", sanitized_rows, duplicate_courses
-
-        except FileNotFoundError:
-            return False, f"File not found: {self.filepath}", [], []
+            sanitized_rows = list(self.iter_rows(report))
+        except CSVValidationError as e:
+            return False, str(e), [], []
         except Exception as e:
             return False, f"Validation error: {str(e)}", [], []
 
+        duplicate_courses = report.examples["duplicate"]
+        if not sanitized_rows:
+            return False, "CSV contains no valid rows after sanitization", [], duplicate_courses
+        return True, "CSV validated and sanitized", sanitized_rows, duplicate_courses
+
     def _extract_course_id(self, url: str) -> str:
         """Extracts numeric course ID from URL"""
-        match = re.search(r'/courses/(\d+)', url)
+        match = COURSE_ID_PATTERN.search(url)
         return match.group(1) if match else None
 
     def _sanitize_folder_name(self, name: str) -> str:
         """Makes course name filesystem-safe"""
-        # Remove invalid characters
-        sanitized = self.invalid_chars.sub('_', name)
-        # Trim whitespace and dots
-        sanitized = sanitized.strip().strip('.')
-        # Collapse multiple underscores
-        sanitized = re.sub(r'_+', '_', sanitized)
-        return sanitized
\ No newline at end of file
+        return sanitize_folder_name(name)
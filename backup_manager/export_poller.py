@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+
+class _ExportWatch:
+    """Polling state for one in-flight export."""
+
+    def __init__(self, course_id, export_id, progress_url, future, on_progress, expected_duration, timeout):
+        now = time.monotonic()
+        self.course_id = course_id
+        self.export_id = export_id
+        self.progress_url = progress_url
+        self.future = future
+        self.on_progress = on_progress
+        self.expected_duration = expected_duration
+        self.started = now
+        self.deadline = now + timeout
+        self.next_poll = now
+        self.interval = 0.0
+        self.completion = 0.0
+        self.first_progress = None  # (time, completion) of the first non-zero reading
+        self.polls = 0
+
+
+class ExportPoller:
+    """
+    One polling loop for every in-flight Canvas content export.
+
+    Courses register their export with ``wait_for_export`` and sleep until
+    the poller resolves it. Each export is polled at an adaptive interval:
+    about half of its estimated remaining time, estimated from the
+    completion rate Canvas reports or, before any progress is visible, from
+    the expected export duration. The interval grows exponentially while the
+    reported completion does not move.
+    """
+
+    def __init__(
+        self,
+        api_handler,
+        stop_event: asyncio.Event,
+        export_timeout: float = 3600.0,
+        min_interval: float = 2.0,
+        max_interval: float = 60.0,
+        backoff_factor: float = 1.5,
+        default_duration: float = 60.0,
+    ):
+        self.api_handler = api_handler
+        self.stop_event = stop_event
+        self.export_timeout = export_timeout
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff_factor = backoff_factor
+        # Running average of how long exports take, seeded with a guess
+        self.average_duration = default_duration
+        self.requests_made = 0
+        self._watches: Dict[str, _ExportWatch] = {}
+        self._wake = asyncio.Event()
+        self._task = None
+
+    async def wait_for_export(
+        self,
+        course_id,
+        export_id,
+        on_progress: Callable[[float], Awaitable[None]] = None,
+        expected_duration: float = None,
+        timeout: float = None,
+    ) -> Optional[str]:
+        """
+        Wait until the export finishes. Returns the attachment URL, or None if
+        the export failed, timed out or the run was stopped. With an
+        ``expected_duration`` (seconds) the first progress poll waits for
+        about half of it.
+        """
+        endpoint = f"/api/v1/courses/{course_id}/content_exports/{export_id}"
+        response = await self.api_handler.make_request(endpoint)
+        self.requests_made += 1
+        attachment = response.get("attachment")
+        if response.get("workflow_state") == "exported" and attachment and "url" in attachment:
+            return attachment["url"]
+        progress_url = response.get("progress_url")
+        if not progress_url:
+            logging.error(f"No progress URL found for course ID: {course_id}")
+            return None
+
+        future = asyncio.get_running_loop().create_future()
+        key = f"{course_id}:{export_id}"
+        watch = _ExportWatch(
+            course_id, export_id, progress_url, future, on_progress,
+            expected_duration or self.average_duration, timeout or self.export_timeout,
+        )
+        if expected_duration:
+            # The course's own history says when to look first
+            watch.next_poll = watch.started + self._next_interval(watch, 0.0, watch.started)
+        self._watches[key] = watch
+        self._wake.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        try:
+            return await future
+        finally:
+            self._watches.pop(key, None)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._watches)
+
+    async def _run(self):
+        while self._watches:
+            if self.stop_event.is_set():
+                for watch in list(self._watches.values()):
+                    self._resolve(watch, None)
+                return
+
+            now = time.monotonic()
+            due = [w for w in self._watches.values() if w.next_poll <= now and not w.future.done()]
+            if due:
+                await asyncio.gather(*(self._poll(watch) for watch in due))
+                continue
+
+            pending = [w.next_poll for w in self._watches.values() if not w.future.done()]
+            if not pending:
+                await asyncio.sleep(0)
+                continue
+            # Sleep until the next poll is due, a new export registers, or at most a second
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=min(max(min(pending) - now, 0), 1.0))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _poll(self, watch: _ExportWatch):
+        now = time.monotonic()
+        if now >= watch.deadline:
+            logging.error(f"Export timed out for course ID: {watch.course_id}")
+            self._resolve(watch, None)
+            return
+
+        try:
+            progress = await self.api_handler.make_request(watch.progress_url)
+            self.requests_made += 1
+            watch.polls += 1
+            workflow_state = progress.get("workflow_state")
+            completion = float(progress.get("completion") or 0)
+            logging.info(f"Polling progress status for course {watch.course_id}: {completion}% completed...")
+
+            if workflow_state == "failed":
+                logging.error(f"Canvas reported export {watch.export_id} failed for course ID: {watch.course_id}")
+                self._resolve(watch, None)
+                return
+
+            if workflow_state == "completed":
+                endpoint = f"/api/v1/courses/{watch.course_id}/content_exports/{watch.export_id}"
+                final_response = await self.api_handler.make_request(endpoint)
+                self.requests_made += 1
+                attachment = final_response.get("attachment")
+                if attachment and "url" in attachment:
+                    duration = time.monotonic() - watch.started
+                    self.average_duration = 0.8 * self.average_duration + 0.2 * duration
+                    self._resolve(watch, attachment["url"])
+                    return
+                completion = 100.0  # Attachment not published yet; check again shortly
+
+            if watch.on_progress:
+                await watch.on_progress(completion)
+            watch.interval = self._next_interval(watch, completion, time.monotonic())
+            watch.completion = completion
+            watch.next_poll = time.monotonic() + watch.interval
+        except Exception as e:
+            if not watch.future.done():
+                watch.future.set_exception(e)
+
+    def _next_interval(self, watch: _ExportWatch, completion: float, now: float) -> float:
+        """Poll at about half of the estimated remaining time, backing off while nothing changes."""
+        if completion > 0 and watch.first_progress is None:
+            watch.first_progress = (now, completion)
+
+        remaining = None
+        if watch.first_progress and completion > watch.first_progress[1]:
+            first_time, first_completion = watch.first_progress
+            rate = (completion - first_completion) / max(now - first_time, 1e-6)
+            remaining = (100.0 - completion) / rate
+        if remaining is None:
+            remaining = max(watch.expected_duration - (now - watch.started), 0)
+
+        interval = remaining / 2
+        if watch.polls > 1 and completion <= watch.completion:
+            interval = max(interval, watch.interval * self.backoff_factor)
+        return min(max(interval, self.min_interval), self.max_interval)
+
+    @staticmethod
+    def _resolve(watch: _ExportWatch, result):
+        if not watch.future.done():
+            watch.future.set_result(result)
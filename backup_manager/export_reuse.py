@@ -0,0 +1,81 @@
+import logging
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+
+IN_PROGRESS_STATES = ("created", "queued", "exporting")
+EXPORTED_STATE = "exported"
+
+
+def parse_canvas_timestamp(value: str) -> Optional[datetime]:
+    """Parse a Canvas ISO 8601 timestamp (e.g. ``2024-05-01T23:59:10Z``) into an aware UTC datetime."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)  # Canvas always reports UTC
+    return parsed.astimezone(timezone.utc)
+
+
+class ExportReusePolicy:
+    """
+    Chooses an existing content export to reuse instead of starting a new one.
+
+    A finished export is reused if it completed within ``freshness_window``
+    seconds. An export that is still being built is attached to, unless it
+    was started more than ``max_in_progress_age`` seconds ago and looks stuck,
+    so a restarted run never queues a duplicate. Finished exports are
+    preferred because they can be downloaded immediately.
+    """
+
+    def __init__(self, freshness_window: float = 18 * 3600, max_in_progress_age: float = 6 * 3600,
+                 export_type: str = "common_cartridge"):
+        self.freshness_window = freshness_window
+        self.max_in_progress_age = max_in_progress_age
+        self.export_type = export_type
+
+    def is_reusable(self, export: dict, now: datetime = None, created_after: datetime = None) -> bool:
+        """``created_after`` rules out exports started before the course last changed."""
+        now = now or datetime.now(timezone.utc)
+        if export.get("export_type", self.export_type) != self.export_type:
+            return False
+        state = export.get("workflow_state")
+        created_at = parse_canvas_timestamp(export.get("created_at"))
+        if created_after and (created_at is None or created_at < created_after):
+            return False
+        if state == EXPORTED_STATE:
+            finished_at = parse_canvas_timestamp(export.get("updated_at")) or created_at
+            return finished_at is not None and (now - finished_at).total_seconds() <= self.freshness_window
+        if state in IN_PROGRESS_STATES:
+            return created_at is not None and (now - created_at).total_seconds() <= self.max_in_progress_age
+        return False
+
+    def is_outside_window(self, export: dict, now: datetime = None) -> bool:
+        """True if the export was created before any reusable export could have been."""
+        now = now or datetime.now(timezone.utc)
+        created_at = parse_canvas_timestamp(export.get("created_at"))
+        horizon = max(self.freshness_window, self.max_in_progress_age)
+        return created_at is not None and (now - created_at).total_seconds() > horizon
+
+    def select(self, exports: Iterable[dict], now: datetime = None, created_after: datetime = None) -> Optional[dict]:
+        """Return the best export to reuse, or None if a new export is needed."""
+        now = now or datetime.now(timezone.utc)
+        finished, in_progress = None, None
+        for export in exports:
+            if not self.is_reusable(export, now, created_after):
+                continue
+            created_at = parse_canvas_timestamp(export.get("created_at"))
+            if export.get("workflow_state") == EXPORTED_STATE:
+                if finished is None or created_at > parse_canvas_timestamp(finished.get("created_at")):
+                    finished = export
+            elif in_progress is None or created_at > parse_canvas_timestamp(in_progress.get("created_at")):
+                in_progress = export
+
+        chosen = finished or in_progress
+        if chosen:
+            logging.info(
+                f"Reusing {chosen.get('workflow_state')} export {chosen.get('id')} created at {chosen.get('created_at')}"
+            )
+        return chosen
@@ -0,0 +1,77 @@
+import logging
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+
+
+class HTTPSessionManager:
+    """
+    Owns the aiohttp session and connection pool for one backup run.
+
+    CanvasAPIHandler and BackupRunner share it so API calls and downloads
+    reuse keep-alive connections and cached DNS lookups instead of paying a
+    new TCP and TLS handshake per course. Short API calls and long downloads
+    use separate timeout profiles.
+    """
+
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 30,
+        dns_cache_ttl: int = 300,
+        keepalive_timeout: float = 60,
+        api_timeout: ClientTimeout = None,
+        download_timeout: ClientTimeout = None,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.api_timeout = api_timeout or ClientTimeout(total=30)
+        # No total limit for multi-GB files; fail only when the stream stalls
+        self.download_timeout = download_timeout or ClientTimeout(total=None, sock_connect=30, sock_read=300)
+        self._session = None
+
+    @classmethod
+    def for_settings(cls, tuning, download_segments: int = 1, **kwargs):
+        """
+        A session manager sized from ``tuning`` (ConcurrencySettings): the
+        per-host limit fits every byte range of every download plus every API
+        request, so segments never wait on the connector during their read timeout.
+        """
+        per_host = tuning.download_max * max(1, download_segments) + tuning.api_max
+        kwargs.setdefault("limit", max(per_host, 100))
+        return cls(limit_per_host=per_host, **kwargs)
+
+    @property
+    def session(self) -> ClientSession:
+        """The shared session, created on first use inside the running event loop."""
+        if self._session is None or self._session.closed:
+            connector = TCPConnector(
+                ssl=False,  # Disable SSL verification
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                use_dns_cache=True,
+                ttl_dns_cache=self.dns_cache_ttl,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            self._session = ClientSession(connector=connector, timeout=self.api_timeout)
+            logging.info(
+                f"Opened shared HTTP session (limit={self.limit}, limit_per_host={self.limit_per_host})"
+            )
+        return self._session
+
+    @property
+    def closed(self) -> bool:
+        return self._session is None or self._session.closed
+
+    async def close(self):
+        """Closes the session and its connection pool."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            logging.info("Closed shared HTTP session.")
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
@@ -0,0 +1,265 @@
+import os
+import sqlite3
+import threading
+import time
+import logging
+from typing import Dict, Iterable, List, Optional
+from platform_utils import get_app_data_dir
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Backup phases, in the order a course moves through them
+PHASE_PENDING = "pending"
+PHASE_EXPORT_STARTED = "export_started"  # export_id is known
+PHASE_EXPORT_READY = "export_ready"  # attachment_url is known
+PHASE_DOWNLOADED = "downloaded"  # zip is on disk, retention not yet applied
+PHASE_COMPLETED = "completed"
+
+PHASES = (PHASE_PENDING, PHASE_EXPORT_STARTED, PHASE_EXPORT_READY, PHASE_DOWNLOADED, PHASE_COMPLETED)
+
+# Statuses that mean the process died while the course was in flight
+INTERRUPTED_STATUSES = ("Queued", "Backing up", "Downloading")
+
+JOB_COLUMNS = (
+    "course_id", "course_name", "phase", "status", "progress", "export_id",
+    "attachment_url", "bytes_downloaded", "last_error", "updated_at",
+    "content_signature", "last_backup_at", "priority",
+)
+
+# Share of a new measurement in a course's smoothed duration history
+DURATION_WEIGHT = 0.5
+
+# Columns added after the first release, with their SQL types
+MIGRATED_COLUMNS = {
+    "content_signature": "TEXT",  # ChangeDetector fingerprint at the last successful backup
+    "last_backup_at": "REAL",
+    "priority": "INTEGER NOT NULL DEFAULT 0",  # Raised each time a deadline run defers the course
+    "tracked": "INTEGER NOT NULL DEFAULT 1",  # 0 once the course leaves the loaded CSV
+}
+
+
+class JournalBusyError(RuntimeError):
+    """Another backup run holds the journal."""
+
+
+class JobJournal:
+    """Durable per-course backup state stored in SQLite so interrupted runs can resume."""
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or os.path.join(get_app_data_dir(), "journal.db")
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._run_lock = None  # Open lock file while this process runs a backup
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS course_jobs (
+                    course_id TEXT PRIMARY KEY,
+                    course_name TEXT,
+                    phase TEXT NOT NULL DEFAULT 'pending',
+                    status TEXT NOT NULL DEFAULT 'Pending',
+                    progress INTEGER NOT NULL DEFAULT 0,
+                    export_id TEXT,
+                    attachment_url TEXT,
+                    bytes_downloaded INTEGER NOT NULL DEFAULT 0,
+                    last_error TEXT,
+                    updated_at REAL
+                )
+                """
+            )
+            # Smoothed timings from past runs, used to schedule the next one
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS course_durations (
+                    course_id TEXT PRIMARY KEY,
+                    export_seconds REAL,
+                    download_seconds REAL,
+                    size_bytes INTEGER,
+                    samples INTEGER NOT NULL DEFAULT 0,
+                    updated_at REAL
+                )
+                """
+            )
+            existing = {row["name"] for row in self._conn.execute("PRAGMA table_info(course_jobs)")}
+            for column, sql_type in MIGRATED_COLUMNS.items():
+                if column not in existing:
+                    self._conn.execute(f"ALTER TABLE course_jobs ADD COLUMN {column} {sql_type}")
+        logging.info(f"Job journal: {self.db_path}")
+
+    def record(self, course_id, course_name: str = None, **fields):
+        """Insert or update the journal row for a course. Only the given fields change."""
+        unknown = set(fields) - set(JOB_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown journal fields: {sorted(unknown)}")
+        if "phase" in fields and fields["phase"] not in PHASES:
+            raise ValueError(f"Unknown phase: {fields['phase']}")
+
+        fields["updated_at"] = time.time()
+        if course_name is not None:
+            fields["course_name"] = course_name
+        columns = ["course_id"] + list(fields)
+        placeholders = ", ".join("?" for _ in columns)
+        updates = ", ".join(f"{col} = excluded.{col}" for col in fields)
+        sql = (
+            f"INSERT INTO course_jobs ({', '.join(columns)}) VALUES ({placeholders}) "
+            f"ON CONFLICT(course_id) DO UPDATE SET {updates}"
+        )
+        with self._lock, self._conn:
+            self._conn.execute(sql, [str(course_id)] + list(fields.values()))
+
+    def get(self, course_id) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM course_jobs WHERE course_id = ?", (str(course_id),)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def resume_point(self, course_id, max_age: float = 24 * 3600) -> Optional[Dict]:
+        """
+        Returns the journal row for a course whose last run stopped part way,
+        or None if the course should start from the beginning. Rows older than
+        ``max_age`` seconds are ignored so a stale export is never reused.
+        """
+        job = self.get(course_id)
+        if not job or job["phase"] in (PHASE_PENDING, PHASE_COMPLETED):
+            return None
+        if job["updated_at"] and time.time() - job["updated_at"] > max_age:
+            return None
+        return job
+
+    def all_jobs(self) -> List[Dict]:
+        """All tracked courses in the order they were first added."""
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM course_jobs WHERE tracked = 1 ORDER BY rowid").fetchall()
+        return [dict(row) for row in rows]
+
+    def sync_courses(self, rows: Iterable[Dict], keep_missing: bool = False):
+        """
+        Makes the journal track exactly the given course rows (as produced by
+        CSVValidator). Existing progress for courses that remain is kept.
+        Courses that are no longer listed stop being tracked and lose their
+        run state, but keep their signature, last backup time and priority
+        for when a later CSV lists them again. With ``keep_missing`` the rows
+        are added and nothing is untracked.
+        """
+        rows = list(rows)
+        course_ids = [str(row["course_id"]) for row in rows]
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS keep_ids (course_id TEXT PRIMARY KEY)")
+            self._conn.execute("DELETE FROM keep_ids")
+            self._conn.executemany("INSERT OR IGNORE INTO keep_ids VALUES (?)", [(cid,) for cid in course_ids])
+            if not keep_missing:
+                self._conn.execute(
+                    "UPDATE course_jobs SET tracked = 0, phase = ?, status = 'Pending', progress = 0, "
+                    "export_id = NULL, attachment_url = NULL, bytes_downloaded = 0, last_error = NULL, "
+                    "updated_at = ? WHERE tracked = 1 AND course_id NOT IN (SELECT course_id FROM keep_ids)",
+                    (PHASE_PENDING, now),
+                )
+            self._conn.executemany(
+                "INSERT INTO course_jobs (course_id, course_name, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(course_id) DO UPDATE SET course_name = excluded.course_name, tracked = 1",
+                [(cid, row["sanitized_name"], now) for cid, row in zip(course_ids, rows)],
+            )
+
+    def record_duration(self, course_id, export_seconds: float = None, download_seconds: float = None,
+                        size_bytes: int = None, weight: float = DURATION_WEIGHT):
+        """
+        Blends one run's export/download timings and export size into the
+        course's history (exponentially weighted, ``weight`` for the new run).
+        Only the given measurements change.
+        """
+        measured = {"export_seconds": export_seconds, "download_seconds": download_seconds, "size_bytes": size_bytes}
+        measured = {name: value for name, value in measured.items() if value is not None}
+        if not measured:
+            return
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT * FROM course_durations WHERE course_id = ?", (str(course_id),)
+            ).fetchone()
+            fields = {}
+            for name, value in measured.items():
+                previous = row[name] if row else None
+                fields[name] = value if previous is None else previous + weight * (value - previous)
+            if "size_bytes" in fields:
+                fields["size_bytes"] = int(fields["size_bytes"])
+            fields["samples"] = (row["samples"] if row else 0) + 1
+            fields["updated_at"] = time.time()
+            columns = ["course_id"] + list(fields)
+            updates = ", ".join(f"{col} = excluded.{col}" for col in fields)
+            self._conn.execute(
+                f"INSERT INTO course_durations ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)}) "
+                f"ON CONFLICT(course_id) DO UPDATE SET {updates}",
+                [str(course_id)] + list(fields.values()),
+            )
+
+    def defer(self, course_id, course_name: str = None):
+        """Raise the priority of a course a deadline run had to leave for the next run."""
+        self.record(course_id, course_name, status="Deferred")
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE course_jobs SET priority = priority + 1 WHERE course_id = ?", (str(course_id),)
+            )
+
+    def priorities(self) -> Dict[str, int]:
+        """Priority of every journaled course, keyed by course_id."""
+        with self._lock:
+            rows = self._conn.execute("SELECT course_id, priority FROM course_jobs").fetchall()
+        return {row["course_id"]: row["priority"] or 0 for row in rows}
+
+    def duration(self, course_id) -> Optional[Dict]:
+        """Duration history of one course, or None if it has none."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM course_durations WHERE course_id = ?", (str(course_id),)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def durations(self) -> Dict[str, Dict]:
+        """Duration history of every course, keyed by course_id."""
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM course_durations").fetchall()
+        return {row["course_id"]: dict(row) for row in rows}
+
+    def lock_run(self):
+        """
+        Claim the journal for a backup run. Raises JournalBusyError while
+        another run (the desktop app or a scheduled command-line run) holds
+        it, so two runs never resume each other's in-flight courses. The
+        operating system drops the lock if the process dies.
+        """
+        if self._run_lock:
+            return
+        lock_file = open(self.db_path + ".lock", "a+")
+        try:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            lock_file.close()
+            raise JournalBusyError(f"Another backup run is using the job journal {self.db_path}")
+        self._run_lock = lock_file
+
+    def unlock_run(self):
+        if not self._run_lock:
+            return
+        if not fcntl:
+            self._run_lock.seek(0)
+            msvcrt.locking(self._run_lock.fileno(), msvcrt.LK_UNLCK, 1)
+        self._run_lock.close()  # Closing also releases a flock
+        self._run_lock = None
+
+    def close(self):
+        self.unlock_run()
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import time
+
+
+def _header_float(headers, name: str):
+    try:
+        return float(headers.get(name))
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket whose refill rate follows Canvas's throttling headers.
+
+    Canvas reports the caller's remaining quota in ``X-Rate-Limit-Remaining``
+    and the cost of each request in ``X-Request-Cost``. While the quota is
+    above ``high_water`` the rate climbs additively toward ``max_rate``;
+    below it the rate is scaled down in proportion to the remaining headroom
+    so requests slow smoothly before Canvas starts rejecting them. A throttled
+    response halves the rate immediately.
+    """
+
+    def __init__(
+        self,
+        initial_rate: float = 20.0,
+        min_rate: float = 0.5,
+        max_rate: float = 100.0,
+        burst: int = 10,
+        quota: float = 700.0,
+        high_water: float = 0.5,
+        low_water: float = 0.1,
+        increase_step: float = 1.0,
+        decrease_factor: float = 0.5,
+    ):
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.quota = quota  # Raised automatically if Canvas reports a bigger bucket
+        self.high_water = high_water
+        self.low_water = low_water
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+
+        self.rate = min(max(initial_rate, min_rate), max_rate)
+        self.tokens = float(burst)
+        self.remaining = None
+        self.average_cost = None
+        self.throttled_count = 0
+        self._last_refill = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    @property
+    def current_rate(self) -> float:
+        """Requests per second currently allowed."""
+        return self.rate
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    async def acquire(self):
+        """Wait until a request may be sent. Waiters are served in arrival order."""
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def update(self, headers):
+        """Adjust the rate from the throttling headers of a Canvas response."""
+        cost = _header_float(headers, "X-Request-Cost")
+        if cost is not None:
+            self.average_cost = cost if self.average_cost is None else 0.8 * self.average_cost + 0.2 * cost
+
+        remaining = _header_float(headers, "X-Rate-Limit-Remaining")
+        if remaining is None:
+            return
+        self.remaining = remaining
+        self.quota = max(self.quota, remaining)
+        headroom = remaining / self.quota
+
+        if headroom >= self.high_water:
+            self.rate = min(self.max_rate, self.rate + self.increase_step)
+        elif headroom <= self.low_water:
+            self.rate = self.min_rate
+        else:
+            # Scale the ceiling with the headroom left between the two marks
+            scale = (headroom - self.low_water) / (self.high_water - self.low_water)
+            ceiling = self.min_rate + scale * (self.max_rate - self.min_rate)
+            if self.average_cost:
+                # Never plan more than about five seconds of the remaining quota
+                ceiling = min(ceiling, remaining / self.average_cost / 5)
+            self.rate = max(self.min_rate, min(self.rate, ceiling))
+
+    def on_throttled(self):
+        """Back off sharply after Canvas rejected a request for exceeding the quota."""
+        self.throttled_count += 1
+        self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+        self.tokens = 0.0
+        logging.warning(f"Canvas throttled a request; API rate reduced to {self.rate:.1f} req/s")
+
+    def stats(self) -> dict:
+        return {
+            "rate": round(self.rate, 2),
+            "remaining": self.remaining,
+            "average_cost": round(self.average_cost, 3) if self.average_cost is not None else None,
+            "throttled": self.throttled_count,
+        }
@@ -0,0 +1,146 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlencode
+from platform_utils import get_app_data_dir
+
+# Response headers kept with a cached body; Link is needed to keep paginating
+CACHED_HEADERS = ("ETag", "Last-Modified", "Link")
+
+
+class ResponseCache:
+    """
+    On-disk cache of Canvas GET responses with their validators.
+
+    An entry younger than the caller's TTL is served without any request.
+    Older entries are revalidated with ``If-None-Match`` / ``If-Modified-Since``;
+    a 304 reply serves the stored body and restarts its TTL. Entries unused for
+    ``max_age`` seconds are dropped when the cache opens, and the least
+    recently used ones are evicted whenever the stored bodies exceed
+    ``max_bytes``. The total size is kept as a running count, so storing a
+    page costs no table scan.
+    """
+
+    def __init__(self, db_path: str = None, ttl: float = 300.0, max_bytes: int = 50 * 1024 * 1024,
+                 max_age: float = 7 * 24 * 3600):
+        self.db_path = db_path or os.path.join(get_app_data_dir(), "http_cache.db")
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0  # Served without a request
+        self.revalidated = 0  # Served after a 304
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    cache_key TEXT PRIMARY KEY,
+                    url TEXT,
+                    headers TEXT,
+                    body TEXT,
+                    size INTEGER NOT NULL,
+                    stored_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+        self.evict()
+
+    @staticmethod
+    def make_key(url: str, params, auth: str) -> str:
+        """Cache key for a GET. The credential is part of it so users never see each other's responses."""
+        pairs = params.items() if isinstance(params, dict) else params or []
+        query = urlencode(sorted((str(k), str(v)) for k, v in pairs))
+        return hashlib.sha256(f"{auth}\n{url}?{query}".encode("utf-8")).hexdigest()
+
+    def lookup(self, key: str) -> Optional[Dict]:
+        """The stored entry (``headers``, ``body``, ``stored_at``) for a key, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT headers, body, stored_at FROM responses WHERE cache_key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            with self._conn:
+                self._conn.execute("UPDATE responses SET accessed_at = ? WHERE cache_key = ?", (time.time(), key))
+        return {"headers": json.loads(row["headers"]), "body": json.loads(row["body"]), "stored_at": row["stored_at"]}
+
+    def is_fresh(self, entry: Dict, ttl: float = None) -> bool:
+        ttl = self.ttl if ttl is None else ttl
+        return time.time() - entry["stored_at"] < ttl
+
+    @staticmethod
+    def conditional_headers(entry: Dict) -> Dict[str, str]:
+        headers = {}
+        if entry["headers"].get("ETag"):
+            headers["If-None-Match"] = entry["headers"]["ETag"]
+        if entry["headers"].get("Last-Modified"):
+            headers["If-Modified-Since"] = entry["headers"]["Last-Modified"]
+        return headers
+
+    def store(self, key: str, url: str, body, headers, ttl: float = None):
+        """Save a 200 response. Without a validator it is only worth keeping if a TTL applies."""
+        kept = {name: headers[name] for name in CACHED_HEADERS if headers.get(name)}
+        if (self.ttl if ttl is None else ttl) <= 0 and "ETag" not in kept and "Last-Modified" not in kept:
+            return
+        body_text = json.dumps(body)
+        now = time.time()
+        with self._lock, self._conn:
+            replaced = self._conn.execute("SELECT size FROM responses WHERE cache_key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, url, json.dumps(kept), body_text, len(body_text), now, now),
+            )
+            self._total_bytes += len(body_text) - (replaced["size"] if replaced else 0)
+        if self._total_bytes > self.max_bytes:
+            self.evict()
+
+    def refresh(self, key: str, headers):
+        """Restart the TTL of an entry after the server answered 304 Not Modified."""
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT headers FROM responses WHERE cache_key = ?", (key,)).fetchone()
+            if row is None:
+                return
+            kept = json.loads(row["headers"])
+            kept.update({name: headers[name] for name in CACHED_HEADERS if headers.get(name)})
+            self._conn.execute(
+                "UPDATE responses SET headers = ?, stored_at = ?, accessed_at = ? WHERE cache_key = ?",
+                (json.dumps(kept), now, now, key),
+            )
+
+    def evict(self):
+        """Drop entries older than ``max_age``, then the least recently used until under ``max_bytes``."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses WHERE accessed_at < ?", (time.time() - self.max_age,))
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            evicted = 0
+            if total > self.max_bytes:
+                for row in self._conn.execute("SELECT cache_key, size FROM responses ORDER BY accessed_at").fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    self._conn.execute("DELETE FROM responses WHERE cache_key = ?", (row["cache_key"],))
+                    total -= row["size"]
+                    evicted += 1
+            self._total_bytes = total
+        if evicted:
+            logging.debug(f"Response cache evicted {evicted} entries")
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "revalidated": self.revalidated, "misses": self.misses}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,148 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Dict, Optional
+
+# Statuses worth retrying and the maximum attempts for each
+DEFAULT_RETRY_STATUSES = {
+    429: 8,  # Throttled (Canvas may also answer 403 with an exhausted quota)
+    500: 3,
+    502: 5,
+    503: 5,
+    504: 5,
+}
+
+# Statuses that guarantee the server did not act on the request, so even a
+# POST can be sent again without creating a duplicate
+NOT_PROCESSED_STATUSES = (429, 503)
+
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+
+
+class RetryPolicy:
+    """
+    Decides whether a failed Canvas request is retried and how long to wait.
+
+    Delays use exponential backoff with full jitter and honour Retry-After.
+    Each request has a maximum number of attempts per status and a total time
+    budget. Non-idempotent requests (POST) are only retried when the server
+    certainly did not process them, unless the caller marks them idempotent.
+    """
+
+    def __init__(
+        self,
+        retry_statuses: Dict[int, int] = None,
+        connection_attempts: int = 5,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        total_budget: float = 180.0,
+    ):
+        self.retry_statuses = dict(DEFAULT_RETRY_STATUSES if retry_statuses is None else retry_statuses)
+        self.connection_attempts = connection_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.total_budget = total_budget
+
+    def backoff(self, attempt: int, retry_after: float = None) -> float:
+        """Full-jitter exponential delay for the given (zero-based) attempt."""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+    def next_delay(self, method: str, attempt: int, elapsed: float, status: int = None,
+                   connection_error: bool = False, retry_after: float = None,
+                   idempotent: bool = None) -> Optional[float]:
+        """
+        Return the delay before the next attempt, or None if the request
+        should fail now. ``attempt`` counts the attempts made so far.
+        """
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+
+        if connection_error:
+            # The request may have reached Canvas, so only replay safe requests
+            if not idempotent or attempt >= self.connection_attempts:
+                return None
+        elif status in self.retry_statuses:
+            if not idempotent and status not in NOT_PROCESSED_STATUSES:
+                return None
+            if attempt >= self.retry_statuses[status]:
+                return None
+        else:
+            return None
+
+        delay = self.backoff(attempt - 1, retry_after)
+        if elapsed + delay > self.total_budget:
+            return None
+        return delay
+
+
+class CircuitBreaker:
+    """
+    Pauses every caller while Canvas is failing broadly.
+
+    When ``failure_threshold`` failures happen within ``window`` seconds the
+    circuit opens and ``wait_until_closed`` blocks all callers for
+    ``cooldown`` seconds. Afterwards a single trial request is let through;
+    its success closes the circuit and its failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 20, window: float = 30.0, cooldown: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.window = window
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.opened_count = 0
+        self._failures = deque()
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._trial_started = 0.0
+
+    async def wait_until_closed(self):
+        """Wait while the circuit is open; lets one trial request through once the cooldown ends."""
+        while True:
+            if self.state == self.CLOSED:
+                return
+            now = time.monotonic()
+            if self.state == self.OPEN and now - self._opened_at >= self.cooldown:
+                self.state = self.HALF_OPEN
+            # A trial that never reported back (e.g. cancelled) is replaced after a cooldown
+            if self.state == self.HALF_OPEN and (not self._trial_in_flight or now - self._trial_started >= self.cooldown):
+                self._trial_in_flight = True
+                self._trial_started = now
+                return
+            wait = self.cooldown - (now - self._opened_at) if self.state == self.OPEN else 0.5
+            await asyncio.sleep(max(wait, 0.1))
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logging.info("Canvas is responding again; resuming requests.")
+        self.state = self.CLOSED
+        self._trial_in_flight = False
+        self._failures.clear()
+
+    def record_failure(self):
+        now = time.monotonic()
+        if self.state == self.HALF_OPEN:
+            self._open(now)
+            return
+        self._failures.append(now)
+        while self._failures and now - self._failures[0] > self.window:
+            self._failures.popleft()
+        if self.state == self.CLOSED and len(self._failures) >= self.failure_threshold:
+            self._open(now)
+
+    def _open(self, now: float):
+        self.state = self.OPEN
+        self.opened_count += 1
+        self._opened_at = now
+        self._trial_in_flight = False
+        self._failures.clear()
+        logging.warning(f"Canvas is failing broadly; pausing all requests for {self.cooldown:.0f} seconds.")
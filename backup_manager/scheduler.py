@@ -0,0 +1,131 @@
+import heapq
+import logging
+from statistics import median
+from typing import Dict, List, Optional
+
+# Orders in which BackupRunner starts courses
+SCHEDULE_FIFO = "fifo"  # Source order
+SCHEDULE_LONGEST_FIRST = "longest_first"  # Shortest total run time: big courses never start last
+SCHEDULE_SHORTEST_FIRST = "shortest_first"  # Most courses finished early on
+SCHEDULES = (SCHEDULE_FIFO, SCHEDULE_LONGEST_FIRST, SCHEDULE_SHORTEST_FIRST)
+
+# Used until the journal has history to learn from
+DEFAULT_EXPORT_SECONDS = 120.0
+DEFAULT_THROUGHPUT = 5 * 1024 * 1024  # Bytes per second
+
+
+class DurationModel:
+    """
+    Predicts how long a course takes to back up, in seconds.
+
+    Courses with history (``JobJournal.durations()``) use their smoothed
+    export and download times. For the others, a known export size (see
+    ``probe_course_size``) becomes a download time at the throughput seen
+    across all history, plus the median export time. A course with nothing
+    known gets the median of the predictions that are based on something.
+    """
+
+    def __init__(self, history: Dict[str, Dict] = None):
+        self.history = history or {}
+        self.sizes: Dict[str, int] = {}
+
+        export_times = [h["export_seconds"] for h in self.history.values() if h.get("export_seconds") is not None]
+        self.export_seconds = median(export_times) if export_times else DEFAULT_EXPORT_SECONDS
+
+        timed = [h for h in self.history.values() if h.get("size_bytes") and h.get("download_seconds")]
+        total_seconds = sum(h["download_seconds"] for h in timed)
+        self.throughput = sum(h["size_bytes"] for h in timed) / total_seconds if total_seconds else DEFAULT_THROUGHPUT
+
+        known = [self._from_history(h) for h in self.history.values()]
+        self.typical_seconds = median(known) if known else self.export_seconds
+
+    def set_size(self, course_id, size_bytes: int):
+        self.sizes[str(course_id)] = size_bytes
+
+    def has_estimate(self, course_id) -> bool:
+        """True if the prediction is based on history or a known size rather than the median."""
+        return str(course_id) in self.history or str(course_id) in self.sizes
+
+    def predict(self, course_id) -> float:
+        course_id = str(course_id)
+        if course_id in self.history:
+            return self._from_history(self.history[course_id])
+        if course_id in self.sizes:
+            return self.export_seconds + self.sizes[course_id] / self.throughput
+        return self.typical_seconds
+
+    def _from_history(self, history: Dict) -> float:
+        export_seconds = history.get("export_seconds")
+        if export_seconds is None:
+            export_seconds = self.export_seconds
+        download_seconds = history.get("download_seconds")
+        if download_seconds is None:
+            download_seconds = (history.get("size_bytes") or 0) / self.throughput
+        return export_seconds + download_seconds
+
+
+def configured_schedule(config: dict) -> str:
+    """The ``schedule`` entry of a ``key=value`` config, or FIFO when it is missing or unknown."""
+    schedule = config.get("schedule", SCHEDULE_FIFO).strip().lower()
+    if schedule not in SCHEDULES:
+        logging.warning(f"Ignoring unknown schedule in config: {schedule!r}")
+        return SCHEDULE_FIFO
+    return schedule
+
+
+def order_courses(courses: List[tuple], policy: str, model: DurationModel) -> List[tuple]:
+    """
+    Order ``(course_name, course_id, status_callback)`` tuples by policy.
+    Courses with equal predictions keep their source order.
+    """
+    if policy == SCHEDULE_FIFO:
+        return list(courses)
+    if policy not in SCHEDULES:
+        raise ValueError(f"Unknown schedule: {policy}")
+    return sorted(courses, key=lambda course: model.predict(course[1]), reverse=policy == SCHEDULE_LONGEST_FIRST)
+
+
+def makespan_lower_bound(predictions: List[float], workers: int) -> float:
+    """No schedule finishes sooner than its longest course or the total work spread over every worker."""
+    if not predictions:
+        return 0.0
+    return max(max(predictions), sum(predictions) / max(workers, 1))
+
+
+def plan_deadline(courses: List[tuple], model: DurationModel, seconds_left: float, workers: int,
+                  priorities: Dict[str, int] = None):
+    """
+    Choose the courses that can finish in ``seconds_left`` on ``workers``
+    parallel lanes. Courses deferred by earlier runs (higher priority) are
+    considered first, then the shortest, which fits the most courses in the
+    window. Returns ``(selected, deferred)``; selected courses are in start
+    order.
+    """
+    priorities = priorities or {}
+    candidates = sorted(courses, key=lambda course: (-priorities.get(str(course[1]), 0), model.predict(course[1])))
+    lanes = [0.0] * max(workers, 1)
+    selected, deferred = [], []
+    for course in candidates:
+        finish = lanes[0] + model.predict(course[1])
+        if finish <= seconds_left:
+            heapq.heapreplace(lanes, finish)
+            selected.append(course)
+        else:
+            deferred.append(course)
+    return selected, deferred
+
+
+async def probe_course_size(api_handler, course_id) -> Optional[int]:
+    """
+    The course's file storage in bytes as reported by Canvas, a rough size
+    for an export that has not been built yet. None if it is unavailable.
+    """
+    try:
+        course = await api_handler.make_request(
+            f"/api/v1/courses/{course_id}", params={"include[]": "storage_quota_used_mb"}, use_cache=True
+        )
+    except Exception as e:
+        logging.warning(f"Size probe failed for course ID {course_id}: {e}")
+        return None
+    used_mb = course.get("storage_quota_used_mb") if isinstance(course, dict) else None
+    return int(float(used_mb) * 1024 * 1024) if used_mb is not None else None
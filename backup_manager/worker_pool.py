@@ -0,0 +1,136 @@
+import asyncio
+import logging
+
+
+class CoursePool:
+    """
+    Long-lived BackupRunner workers fed through a bounded queue.
+
+    ``submit`` waits while the queue is full, so a producer (a CSV reader,
+    course discovery, the GUI) is never more than ``maxsize`` courses ahead
+    of the workers. Courses can be submitted at any time until the pool is
+    closed. ``drain`` waits for everything submitted so far, including
+    courses added in the meantime, and then shuts the workers down. If the
+    run is stopped, courses still waiting in the queue are reported as
+    "Stopped".
+    """
+
+    def __init__(self, runner, maxsize: int = None):
+        self.runner = runner
+        self.queue = asyncio.Queue(maxsize=maxsize or runner.export_concurrency)
+        self.submitted = 0
+        self.outstanding = 0  # Submitted courses that have not finished yet
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._closed = False
+        self._task = None
+
+    def start(self):
+        """Start the workers. Submitting also starts them."""
+        if self._task is None:
+            self._task = asyncio.create_task(self.runner._run_pipeline(self._next_course, self._course_done))
+        return self
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    async def submit(self, course_name, course_id, status_callback=None) -> bool:
+        """
+        Queue one course, waiting for room. Returns False if the workers
+        stopped before it could be queued.
+        """
+        if self._closed:
+            raise RuntimeError("Cannot submit to a closed CoursePool")
+        self.start()
+        self.outstanding += 1
+        self._idle.clear()
+        if not await self._put((course_name, course_id, status_callback)):
+            self._course_done()
+            return False
+        self.submitted += 1
+        return True
+
+    async def feed(self, courses, status_callback=None) -> int:
+        """
+        Submit rows (dicts with ``sanitized_name`` and ``course_id``) from an
+        iterable or async iterable, pulling the next row only when there is
+        room. Returns the number of courses queued.
+        """
+        count = 0
+        if hasattr(courses, "__aiter__"):
+            async for row in courses:
+                if not await self.submit(row["sanitized_name"], row["course_id"], status_callback):
+                    break
+                count += 1
+        else:
+            for row in courses:
+                if not await self.submit(row["sanitized_name"], row["course_id"], status_callback):
+                    break
+                count += 1
+        return count
+
+    async def drain(self):
+        """Wait until every submitted course has finished (or the run stopped), then close."""
+        if self._task is not None:
+            idle = asyncio.ensure_future(self._idle.wait())
+            await asyncio.wait({idle, self._task}, return_when=asyncio.FIRST_COMPLETED)
+            idle.cancel()
+        await self.close()
+
+    async def close(self):
+        """Stop accepting courses, let the workers finish what is queued and wait for them."""
+        self._closed = True
+        if self._task is None:
+            return
+        for _ in range(self.runner.export_concurrency):
+            if not await self._put(None):  # One sentinel per export worker
+                break
+        await self._task
+
+        # Courses left behind when the run was stopped
+        while not self.queue.empty():
+            course = self.queue.get_nowait()
+            if course is not None:
+                await self._report_stopped(course)
+
+    async def _put(self, item) -> bool:
+        """Wait for room in the queue; False if the workers exited first."""
+        if self._task.done():
+            return False
+        put = asyncio.ensure_future(self.queue.put(item))
+        await asyncio.wait({put, self._task}, return_when=asyncio.FIRST_COMPLETED)
+        if put.done():
+            return True
+        put.cancel()
+        return False
+
+    async def _next_course(self):
+        """The next queued course for an export worker, or None once closed or stopped."""
+        stop_event = self.runner.stop_event
+        if stop_event.is_set():
+            return None
+        get = asyncio.ensure_future(self.queue.get())
+        stopped = asyncio.ensure_future(stop_event.wait())
+        await asyncio.wait({get, stopped}, return_when=asyncio.FIRST_COMPLETED)
+        stopped.cancel()
+        if not get.done():
+            get.cancel()
+            return None
+        course = get.result()
+        if course is not None and stop_event.is_set():
+            await self._report_stopped(course)
+            return None
+        return course
+
+    async def _report_stopped(self, course):
+        course_name, course_id, status_callback = course
+        logging.info(f"Backup stopped before course started: {course_name} (ID: {course_id})")
+        await self.runner._notify(status_callback, course_name, course_id, "Stopped", 0)
+        self._course_done()
+
+    def _course_done(self):
+        self.outstanding -= 1
+        if self.outstanding <= 0:
+            self.outstanding = 0
+            self._idle.set()
@@ -3,10 +3,18 @@ import sys  # Add this import
 import subprocess  # Add this import 
 import logging
 import asyncio
+import queue
 from tkinter import messagebox
 from backup_manager.api_handler import CanvasAPIHandler
-from backup_manager.backup_runner import BackupRunner
-from platform_utils import get_app_data_dir, ensure_backup_folder_configured
+from backup_manager.backup_runner import BackupRunner, DOWNLOAD_SEGMENTS
+from backup_manager.concurrency import ConcurrencySettings
+from backup_manager.http_session import HTTPSessionManager
+from backup_manager.course_store import CourseStatus
+from backup_manager.job_journal import JournalBusyError
+from backup_manager.scheduler import configured_schedule
+from backup_manager.worker_pool import CoursePool
+from gui.engine_thread import EngineThread
+from platform_utils import get_app_data_dir, ensure_backup_folder_configured, read_config
 from backup_manager.system_compat import prevent_windows_sleep, allow_windows_sleep  # Add this import
 
 class BackupManager:
@@ -16,7 +24,13 @@ class BackupManager:
         self.is_running = False
         self.api_handler = None
         self.backup_runner = None
-        self.stop_event = asyncio.Event()
+        self.pool = None  # CoursePool of the current run; engine thread only
+        # Created on the engine loop for each run (an Event is bound to its loop on Python 3.9)
+        # and only touched there, via engine.call_soon(self._request_stop)
+        self.stop_event = None
+        self._stop_requested = False
+        self.engine = EngineThread()  # Runs the asyncio backup engine off the Tk thread
+        self.events = queue.Queue()  # Engine -> Tk events, drained by _poll_engine
         self.app_data_dir = get_app_data_dir()
         self.caffeinate_process = None  # Add this line
 
@@ -43,29 +57,34 @@ class BackupManager:
     def get_backup_directory(self):
         """Retrieve the user-selected backup directory from the config file."""
         # Check for user-configured backup directory first
-        config_file = os.path.join(self.app_data_dir, "resources", "config.txt")
-        if os.path.exists(config_file):
-            try:
-                with open(config_file, "r") as f:
-                    for line in f:
-                        if line.startswith("backup_folder="):
-                            user_dir = line.split("=", 1)[1].strip()
-                            if os.path.exists(user_dir) and os.access(user_dir, os.W_OK):
-                                return user_dir
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to load backup directory: {e}")
+        try:
+            user_dir = read_config().get("backup_folder")
+            if user_dir and os.path.exists(user_dir) and os.access(user_dir, os.W_OK):
+                return user_dir
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to load backup directory: {e}")
         
         # If no valid user directory found, use ensure_backup_folder_configured
         # This will prompt the user only when actually needed for a backup operation
         return ensure_backup_folder_configured()
 
+    def get_concurrency_settings(self):
+        """Concurrency and auto-tuning bounds from the config file (File -> Concurrency Settings)."""
+        return ConcurrencySettings.from_config(read_config())
+
     def start_backup(self):
         if self.is_running:
             return
+        try:
+            self.main_interface.journal.lock_run()
+        except JournalBusyError as e:
+            messagebox.showerror("Backup Already Running", f"{e}.\nWait for it to finish and try again.")
+            return
 
         self._start_sleep_prevention()  # Add this line
         self.is_running = True
-        self.stop_event.clear()  # Clear stop event
+        self.stop_event = None  # Nothing on the engine is using it between runs
+        self._stop_requested = False
         self.main_interface.start_button.config(state="disabled")
         self.main_interface.retry_button.config(state="disabled")
         self.main_interface.stop_button.config(state="normal")
@@ -73,68 +92,133 @@ class BackupManager:
         base_url = self.main_interface.token_manager.base_url
         api_token = self.main_interface.token_manager.get_token()
         output_dir = self.get_backup_directory()  # Get the dynamic backup directory
+        skip_unchanged = self.main_interface.skip_unchanged.get()
+        tuning = self.get_concurrency_settings()
+        schedule = configured_schedule(read_config())
+
+        # Read the rows shown in the table here; the engine thread must not touch GUI state
+        courses = []
+        for record in self.table.rows:
+            if record.status in (CourseStatus.PENDING, CourseStatus.FAILED, CourseStatus.STOPPED,
+                                 CourseStatus.DEFERRED):
+                # BackupRunner writes progress straight into the course store
+                courses.append((record.name, record.course_id, None))
+                self.course_store.update(record.course_id, status=CourseStatus.QUEUED, progress=0)
+        self.status_updater.flush()
 
         async def async_start_backup():
+            self.stop_event = asyncio.Event()
+            if self._stop_requested:  # Stop was pressed before the run reached the engine
+                self.stop_event.set()
+            # One connection pool for the whole run, sized for its downloads and API calls
+            session_manager = HTTPSessionManager.for_settings(tuning, DOWNLOAD_SEGMENTS)
             try:
-                self.api_handler = CanvasAPIHandler(base_url, api_token)
-                self.backup_runner = BackupRunner(self.api_handler, output_dir, self.stop_event)  # Pass stop event
-
-                queue = asyncio.Queue()
-
-                # Populate the queue with data from the table
-                for item in self.table.get_children():
-                    course_name = self.table.item(item)['values'][0]
-                    course_id = self.table.item(item)['values'][1]
-                    status = self.table.item(item)['values'][2]
-                    if(status == "Pending" or status == "Failed" or status == "Stopped"):
-                        queue.put_nowait((course_name, course_id, self.status_callback))
-                        self.table.item(item, values=(course_name, course_id, "Queued", "0%"))
-
-                # Process the queue
-                await self.backup_runner.process_queue(queue)
+                self.api_handler = CanvasAPIHandler(
+                    base_url, api_token, concurrency_limit=tuning.api, session_manager=session_manager
+                )
+                self.backup_runner = BackupRunner(
+                    self.api_handler, output_dir, self.stop_event, concurrency_limit=tuning.download,
+                    journal=self.main_interface.journal, session_manager=session_manager, skip_unchanged=skip_unchanged,
+                    course_store=self.course_store, tuning=tuning, schedule=schedule
+                )
+
+                # Ordered by the configured schedule; courses added while the run is in progress
+                # are submitted to the same pool as they arrive
+                planned = await self.backup_runner.plan_courses(courses)
+                self.pool = CoursePool(self.backup_runner).start()
+                for course in planned:
+                    if not await self.pool.submit(*course):
+                        break
+                await self.pool.drain()
             except Exception as e:
-                messagebox.showerror("Backup Error", f"An unexpected error occurred: {e}")
+                logging.error(f"Backup run failed: {e}", exc_info=True)
+                self.events.put(("error", f"An unexpected error occurred: {e}"))
             finally:
-                self.is_running = False
-                self.main_interface.start_button.config(state="normal")
-                self.main_interface.retry_button.config(state="normal")
-                self.main_interface.stop_button.config(state="disabled")
-                if self.api_handler:
-                    await self.api_handler.close_session()
-                self._stop_sleep_prevention()  # Add this line
+                if self.pool and not self.pool.closed:
+                    await self.pool.close()
+                await session_manager.close()
+                self.events.put(("finished", None))
+
+        self.engine.submit(async_start_backup())
+        self._poll_engine()
+
+    def enqueue(self, records):
+        """Add courses to the running backup. Tk thread only."""
+        if not self.is_running or not records:
+            return
+        for record in records:
+            self.course_store.update(record.course_id, status=CourseStatus.QUEUED, progress=0)
+        self.status_updater.flush()
+        self.engine.submit(self._submit_courses([(record.name, record.course_id) for record in records]))
+
+    async def _submit_courses(self, courses):
+        """Submit courses to the pool, waiting for room; courses it can no longer take go back to Pending."""
+        for position, (course_name, course_id) in enumerate(courses):
+            if self.pool is None or self.pool.closed or not await self.pool.submit(course_name, course_id):
+                logging.info(f"Run ended before {len(courses) - position} added course(s) could be queued")
+                for _, course_id in courses[position:]:
+                    self.course_store.update(course_id, status=CourseStatus.PENDING)
+                return
+
+    def _poll_engine(self):
+        """Draw pending status updates and handle engine events; reschedules itself while a run is active."""
+        self.status_updater.flush()
+        while True:
+            try:
+                event, payload = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if event == "error":
+                messagebox.showerror("Backup Error", payload)
+            elif event == "finished":
+                self._on_backup_finished()
+                return
+        self.main_interface.root.after(self.status_updater.frame_ms, self._poll_engine)
+
+    def _on_backup_finished(self):
+        self.status_updater.flush()
+        self.is_running = False
+        self.main_interface.journal.unlock_run()
+        self.main_interface.start_button.config(state="normal")
+        self.main_interface.retry_button.config(state="normal")
+        self.main_interface.stop_button.config(state="disabled")
+        self._stop_sleep_prevention()  # Add this line
 
-        asyncio.run(async_start_backup())
+    @property
+    def status_updater(self):
+        return self.main_interface.status_updater
+
+    @property
+    def course_store(self):
+        return self.main_interface.course_store
 
     def status_callback(self, course_name, course_id, status, progress):
-        for item in self.table.get_children():
-            if self.table.item(item)['values'][0] == course_name:
-                self.table.item(item, values=(course_name, course_id, status, f"{progress}%"))
-                self.main_interface.root.update()
-
-        # Calculate overall progress
-        total_courses = len(self.table.get_children())
-        completed_courses = sum(
-            1 for item in self.table.get_children()
-            if self.table.item(item)['values'][2] in ["Completed", "Failed", "Stopped"]
-        )
-        overall_progress = (completed_courses / total_courses) * 100
-
-        # Update the overall progress bar
-        self.main_interface.update_progress_bar(overall_progress)
+        # Runs on the engine thread; drawn by _poll_engine at a bounded frame rate
+        self.status_updater.post(course_name, course_id, status, progress)
 
     def retry_failed(self):
-        for item in self.table.get_children():
-            if self.table.item(item)['values'][2] == "Failed" or self.table.item(item)['values'][2] == "Stopped":
-                self.table.item(item, values=(self.table.item(item)['values'][0], self.table.item(item)['values'][1], "Pending", "0%"))
+        for record in self.table.rows:
+            if record.status in (CourseStatus.FAILED, CourseStatus.STOPPED):
+                self.course_store.update(record.course_id, status=CourseStatus.PENDING, progress=0)
+        self.status_updater.flush()
         self.start_backup()
 
     def stop_backup(self):
         if self.is_running:
-            self.stop_event.set()
+            # The run winds down on the engine thread and re-enables Start when it finishes
+            self.engine.call_soon(self._request_stop)
+            self.main_interface.stop_button.config(state="disabled")
             messagebox.showinfo("Stop Backup", "Backup process stopped by user.")
-        
-        self._stop_sleep_prevention()  # Add this line
-        self.is_running = False
-        self.main_interface.start_button.config(state="normal")
-        self.main_interface.retry_button.config(state="normal")
-        self.main_interface.stop_button.config(state="disabled")
\ No newline at end of file
+
+    def _request_stop(self):
+        """Set the run's stop event. Engine loop only."""
+        self._stop_requested = True
+        if self.stop_event:
+            self.stop_event.set()
+
+    def shutdown(self):
+        """Stop any run and the engine thread before the window closes."""
+        if self.is_running:
+            self.engine.call_soon(self._request_stop)
+        self.engine.shutdown()
+        self._stop_sleep_prevention()
@@ -0,0 +1,107 @@
+from array import array
+from typing import Dict, List
+from backup_manager.course_store import CourseRecord
+
+
+def _trigrams(text: str):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class CourseIndex:
+    """
+    Search and sort index over the course records, built once when a CSV is loaded.
+
+    Course names and IDs never change. They are lowercased once and every
+    three-character substring is indexed, so a filter only checks the rows
+    that contain the rarest trigram of the query. Status and progress change during
+    a run and are matched live against the few distinct values they take.
+    Sorting runs on the model with typed keys (numeric course ID and
+    progress) rather than the strings shown in the table.
+    """
+
+    # CourseRecord attributes the table can be sorted by
+    SORT_KEYS = ("name", "course_id", "status", "progress")
+
+    def __init__(self, rows: List[CourseRecord]):
+        self.rows = rows
+        self.text = [f"{row.name}\n{row.course_id}".lower() for row in rows]
+        self.trigrams: Dict[str, array] = {}
+        for position, text in enumerate(self.text):
+            for gram in _trigrams(text):
+                self.trigrams.setdefault(gram, array("I")).append(position)
+        self.static_keys = {
+            "name": [row.name.lower() for row in rows],
+            "course_id": [self._course_id_key(row.course_id) for row in rows],
+        }
+        self.filter_text = ""
+        self.sort_key = None
+        self.descending = False
+        self._last_query = None  # (text, matching static positions) to refine while typing
+        self._static_orders = {}  # (key, descending) -> sorted positions; names and IDs never change
+
+    @staticmethod
+    def _course_id_key(course_id):
+        text = str(course_id)
+        return (0, int(text), "") if text.isdigit() else (1, 0, text.lower())
+
+    def set_filter(self, text: str):
+        self.filter_text = text.lower()
+
+    def set_sort(self, key: str, descending: bool = False):
+        if key not in self.SORT_KEYS:
+            raise ValueError(f"Unknown sort key: {key}")
+        self.sort_key = key
+        self.descending = descending
+
+    def search(self, text: str) -> List[int]:
+        """Positions of rows where any column contains ``text`` (case-insensitive), in load order."""
+        if not text:
+            return list(range(len(self.rows)))
+        matches = set(self._search_static(text))
+
+        # Status and progress take few distinct values; match those, not every row
+        statuses = {status: text in status.value.lower() for status in {row.status for row in self.rows}}
+        progress = {value: text in f"{value}%" for value in range(101)}
+        for position, row in enumerate(self.rows):
+            if statuses[row.status] or progress.get(row.progress, False):
+                matches.add(position)
+        return sorted(matches)
+
+    def _search_static(self, text: str) -> List[int]:
+        if self._last_query and text.startswith(self._last_query[0]):
+            candidates = self._last_query[1]  # Typing more only narrows the previous result
+        elif len(text) >= 3:
+            postings = [self.trigrams.get(gram) for gram in _trigrams(text)]
+            if any(p is None for p in postings):
+                candidates = []
+            else:
+                candidates = min(postings, key=len)
+        else:
+            candidates = range(len(self.rows))
+        result = [position for position in candidates if text in self.text[position]]
+        self._last_query = (text, result)
+        return result
+
+    def _order(self) -> List[int]:
+        positions = range(len(self.rows))
+        if self.sort_key in self.static_keys:
+            cache_key = (self.sort_key, self.descending)
+            if cache_key not in self._static_orders:
+                keys = self.static_keys[self.sort_key]
+                self._static_orders[cache_key] = sorted(positions, key=keys.__getitem__, reverse=self.descending)
+            return self._static_orders[cache_key]
+        if self.sort_key == "progress":
+            return sorted(positions, key=lambda p: self.rows[p].progress, reverse=self.descending)
+        return sorted(positions, key=lambda p: self.rows[p].status.value.lower(), reverse=self.descending)
+
+    def view(self) -> List[CourseRecord]:
+        """The rows matching the current filter, in the current sort order."""
+        matches = self.search(self.filter_text)
+        if self.sort_key is None:
+            return [self.rows[position] for position in matches]
+        if len(matches) == len(self.rows):
+            return [self.rows[position] for position in self._order()]
+        keep = bytearray(len(self.rows))
+        for position in matches:
+            keep[position] = 1
+        return [self.rows[position] for position in self._order() if keep[position]]
@@ -4,6 +4,7 @@ import logging
 from tkinter import filedialog, messagebox, ttk, Toplevel, Text, Frame, Scrollbar, END
 from urllib.parse import urlparse
 from backup_manager.csv_validator import CSVValidator
+from backup_manager.course_store import CourseRecord
 
 class CSVHandler:
     def __init__(self, main_interface):
@@ -35,23 +36,27 @@ class CSVHandler:
             if not is_valid:
                 raise ValueError(error_msg)
 
-            # Clear existing data and populate new
-            self.main_interface.table.delete(*self.main_interface.table.get_children())
-            self.main_interface.current_data = [
-                {
-                    "sanitized_name": row["sanitized_name"],
-                    "course_id": row["course_id"],
-                    "status": "Pending",
-                    "progress": "0%"
-                }
+            records = [
+                CourseRecord(row["course_id"], row["sanitized_name"], original_name=row["original_name"])
                 for row in sanitized_rows
             ]
+            backup_manager = self.main_interface.backup_manager
+            if backup_manager.is_running:
+                # Append to the running backup instead of replacing the list under it
+                self.main_interface.journal.sync_courses(sanitized_rows, keep_missing=True)
+                backup_manager.enqueue(self.main_interface.add_courses(records))
+            else:
+                # Track the new course list in the job journal, keeping resume state
+                self.main_interface.journal.sync_courses(sanitized_rows)
+
+                # Replace existing data
+                self.main_interface.set_courses(records)
 
             # Show summary and update UI
             self._show_import_summary(len(sanitized_rows), duplicateCourses)
             self.main_interface.csv_label.config(text=file_path)
-            self.main_interface.start_button.config(state="normal")
-            self.main_interface._refresh_table()
+            if not backup_manager.is_running:
+                self.main_interface.start_button.config(state="normal")
 
         except ValueError as ve:
             messagebox.showerror("CSV Error", str(ve))
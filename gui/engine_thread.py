@@ -0,0 +1,66 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Callable, Coroutine
+
+
+class EngineThread:
+    """
+    An asyncio event loop running on its own daemon thread.
+
+    Tk must only be touched from the main thread, so the GUI sends work here
+    with ``submit`` / ``call_soon`` and the engine reports back through
+    thread-safe queues that the Tk side drains with ``root.after``.
+    """
+
+    def __init__(self, name: str = "backup-engine"):
+        self.name = name
+        self.loop = None
+        self._thread = None
+        self._ready = threading.Event()
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self._ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            # Give cancelled backups a chance to close files and sessions
+            pending = asyncio.all_tasks(self.loop)
+            for task in pending:
+                task.cancel()
+            self.loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+            self.loop.close()
+            logging.info("Backup engine stopped.")
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def submit(self, coro: Coroutine) -> Future:
+        """Run a coroutine on the engine loop from any thread."""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def call_soon(self, callback: Callable, *args):
+        """Call a plain function on the engine loop, e.g. ``stop_event.set``."""
+        if self.running:
+            self.loop.call_soon_threadsafe(callback, *args)
+
+    def shutdown(self, timeout: float = 5.0):
+        """Stop the loop, cancelling whatever is still running, and wait for the thread."""
+        if not self.running:
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
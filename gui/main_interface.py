@@ -6,13 +6,19 @@ from gui.csv_handler import CSVHandler
 from gui.ui_components import create_table
 from gui.menu_bar import MenuBar
 from gui.backup_manager import BackupManager
+from gui.status_updater import StatusUpdater
+from gui.course_index import CourseIndex
+from backup_manager.course_store import CourseStore, CourseRecord
 from backup_manager.token_manager import TokenManager
+from backup_manager.job_journal import JobJournal, PHASE_COMPLETED, INTERRUPTED_STATUSES
 
 class MainInterface:
     def __init__(self, root, token_manager):
         self.root = root
         self.token_manager = token_manager
-        self.current_data = []
+        self.course_store = CourseStore()  # Shared with BackupRunner; the table reads it directly
+        self.course_index = CourseIndex([])
+        self.journal = JobJournal()
 
         # Initialize core UI components first
         self._create_basic_layout()
@@ -23,6 +29,7 @@ class MainInterface:
 
         # Complete window setup
         self._complete_initialization()
+        self._rehydrate_from_journal()
 
     def _create_basic_layout(self):
         """Create essential UI components needed by other components"""
@@ -39,6 +46,7 @@ class MainInterface:
         self.table_frame = ttk.Frame(self.main_frame)
         self.table_frame.pack(fill=tk.BOTH, expand=True, pady=10)
         self.table = create_table(self.table_frame, self._handle_filter_changed)
+        self.status_updater = StatusUpdater(self.root, self.table, self.course_store, self.update_progress_bar)
 
         # Progress bar
         self.progress_frame = ttk.Frame(self.main_frame)
@@ -84,6 +92,15 @@ class MainInterface:
         self.stop_button.pack(side=tk.LEFT, padx=5)
         self.stop_button.config(state=tk.DISABLED)
 
+        # Skip courses whose metadata is unchanged since their last backup
+        self.skip_unchanged = tk.BooleanVar(value=False)
+        self.skip_unchanged_check = ttk.Checkbutton(
+            self.control_frame,
+            text="Skip unchanged courses",
+            variable=self.skip_unchanged
+        )
+        self.skip_unchanged_check.pack(side=tk.LEFT, padx=5)
+
         # Progress bar components
         self.progress_label = ttk.Label(self.progress_frame, text="Overall Progress", anchor="w")
         self.progress_label.pack(side=tk.LEFT, padx=5)
@@ -97,28 +114,62 @@ class MainInterface:
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         self.menu_bar = MenuBar(self.root, self.token_manager)
 
+    def _rehydrate_from_journal(self):
+        """Restore the course table from the job journal left by a previous session"""
+        jobs = self.journal.all_jobs()
+        if not jobs:
+            return
+
+        records = []
+        for job in jobs:
+            status = job["status"]
+            if job["phase"] == PHASE_COMPLETED:
+                status = status if status == "Up to date" else "Completed"
+            elif status in INTERRUPTED_STATUSES:
+                status = "Stopped"  # The app closed mid-backup; Start will resume it
+            records.append(CourseRecord(
+                job["course_id"],
+                job["course_name"],
+                status=status,
+                progress=job["progress"] if status != "Completed" else 100,
+                bytes_downloaded=job["bytes_downloaded"],
+                last_error=job["last_error"],
+            ))
+
+        self.csv_label.config(text="Restored from previous session")
+        self.start_button.config(state="normal")
+        self.set_courses(records)
+
+    def set_courses(self, records):
+        """Replace the course list and rebuild its search index"""
+        self.course_store.load(records)
+        self._rebuild_index()
+
+    def add_courses(self, records):
+        """Append courses not already listed, e.g. while a backup is running; returns the ones added"""
+        added = self.course_store.extend(records)
+        if added:
+            self._rebuild_index()
+        return added
+
+    def _rebuild_index(self):
+        filter_text = self.course_index.filter_text  # The filter entry keeps its text
+        self.course_index = CourseIndex(list(self.course_store))
+        self.course_index.set_filter(filter_text)
+        self.table.set_model(self.course_index)  # The heading arrow stays valid
+        self._refresh_table()
+        self.status_updater.report_progress()
+
     def _handle_filter_changed(self, filter_text):
         """Handle filter text changes"""
-        filter_text = filter_text.lower()
-        filtered_data = [
-            item for item in self.current_data
-            if any(filter_text in str(value).lower() 
-                  for value in item.values())
-        ]
-        self._refresh_table(filtered_data)
-
-    def _refresh_table(self, data=None):
-        """Refresh table view with optional filtered data"""
-        self.table.delete(*self.table.get_children())
-        items = data if data is not None else self.current_data
-        
-        for item in items:
-            self.table.insert("", tk.END, values=(
-                item["sanitized_name"],
-                item["course_id"],
-                item["status"],
-                item["progress"]
-            ))
+        self.course_index.set_filter(filter_text)
+        self._refresh_table()
+
+    def _refresh_table(self):
+        """Show the rows matching the filter, in the current sort order"""
+        self.status_updater.flush()  # Draw pending updates before the rows move
+        # Only the rows on screen become Treeview items
+        self.table.set_rows(self.course_index.view())
 
     def update_progress_bar(self, value):
         """Update the main progress bar"""
@@ -126,34 +177,17 @@ class MainInterface:
         self.root.update_idletasks()
 
     def status_callback(self, course_name, course_id, status, progress):
-        """Update status in current_data and refresh view"""
-        for item in self.current_data:
-            if item["course_id"] == course_id:
-                item["status"] = status
-                item["progress"] = f"{progress}%"
-                break
-                
-        self._refresh_table()
-        self._update_overall_progress()
-
-    def _update_overall_progress(self):
-        """Calculate and update the overall progress bar"""
-        completed = sum(
-            1 for item in self.current_data
-            if item["status"] in ["Completed", "Failed", "Stopped"]
-        )
-        total = len(self.current_data)
-        self.update_progress_bar((completed / total) * 100 if total > 0 else 0)
+        """Update a course's status in the course store"""
+        self.status_updater.post(course_name, course_id, status, progress)
 
     def on_close(self):
         """Handle application close event"""
-        if self.is_running:
+        if self.backup_manager.is_running:
             if not messagebox.askyesno("Exit", "Tasks are running. Are you sure you want to exit?"):
                 return
         
-        # Ensure sleep prevention is stopped when closing the app
-        self.backup_manager.stop_backup()
-        self.backup_manager._stop_sleep_prevention()  # Add this line
+        # Stop the backup engine thread; this also stops sleep prevention
+        self.backup_manager.shutdown()
         self.root.destroy()
 
 if __name__ == "__main__":
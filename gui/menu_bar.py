@@ -2,7 +2,8 @@ import tkinter as tk
 from tkinter import filedialog, messagebox, simpledialog
 import os
 from backup_manager.token_manager import TokenManager
-from platform_utils import get_app_data_dir
+from backup_manager.concurrency import ConcurrencySettings
+from platform_utils import get_app_data_dir, get_config_file, read_config
 
 class MenuBar:
     def __init__(self, root, token_manager: TokenManager):
@@ -16,6 +17,7 @@ class MenuBar:
         # File menu
         self.file_menu = tk.Menu(self.menu_bar, tearoff=0)
         self.file_menu.add_command(label="Change Default Backup Folder", command=self.change_backup_folder)
+        self.file_menu.add_command(label="Concurrency Settings", command=self.change_concurrency)
         self.menu_bar.add_cascade(label="File", menu=self.file_menu)
 
         # Token management menu
@@ -27,37 +29,70 @@ class MenuBar:
         # Attach the menu bar to the root window
         root.config(menu=self.menu_bar)
 
+    def _save_config(self, values: dict):
+        """Update or add ``key=value`` lines in the config file, keeping the others."""
+        # Get the config file path from the app data directory
+        config_path = get_config_file()
+        os.makedirs(os.path.dirname(config_path), exist_ok=True)
+
+        # Read existing lines from the config file
+        lines = []
+        if os.path.exists(config_path):
+            with open(config_path, "r") as f:
+                lines = f.readlines()
+
+        with open(config_path, "w") as f:
+            written = set()
+            for line in lines:
+                key = line.split("=", 1)[0].strip()
+                if "=" in line and key in values:
+                    f.write(f"{key}={values[key]}\n")
+                    written.add(key)
+                else:
+                    f.write(line)
+            for key, value in values.items():
+                if key not in written:
+                    f.write(f"{key}={value}\n")
+
     def change_backup_folder(self):
         folder = filedialog.askdirectory(title="Select Backup Folder")
         if folder:
             if os.access(folder, os.W_OK):
-                # Get the config file path from the app data directory
-                resources_dir = os.path.join(self.app_data_dir, "resources")
-                os.makedirs(resources_dir, exist_ok=True)
-                config_path = os.path.join(resources_dir, "config.txt")
-                
-                # Read existing lines from the config file
-                lines = []
-                if os.path.exists(config_path):
-                    with open(config_path, "r") as f:
-                        lines = f.readlines()
-                
-                # Update or add the backup_folder line
-                with open(config_path, "w") as f:
-                    backup_folder_written = False
-                    for line in lines:
-                        if line.startswith("backup_folder="):
-                            f.write(f"backup_folder={folder}\n")
-                            backup_folder_written = True
-                        else:
-                            f.write(line)
-                    if not backup_folder_written:
-                        f.write(f"backup_folder={folder}\n")
-                
+                self._save_config({"backup_folder": folder})
                 messagebox.showinfo("Backup Folder Changed", f"Default backup folder set to: {folder}")
             else:
                 messagebox.showerror("Permission Denied", "The selected folder is not writable. Please choose a different folder.")
 
+    def change_concurrency(self):
+        keys = ConcurrencySettings.KEYS
+        settings = ConcurrencySettings.from_config(read_config())
+        downloads = simpledialog.askinteger(
+            "Concurrency Settings", "Maximum courses downloaded at once:",
+            initialvalue=settings.download_max, minvalue=1, maxvalue=64,
+        )
+        if downloads is None:
+            return
+        api = simpledialog.askinteger(
+            "Concurrency Settings", "Maximum concurrent Canvas API requests:",
+            initialvalue=settings.api_max, minvalue=1, maxvalue=128,
+        )
+        if api is None:
+            return
+        auto_tune = messagebox.askyesno(
+            "Concurrency Settings",
+            "Tune concurrency automatically during backups?\n\n"
+            "Yes: start lower and adjust up to these maximums based on throughput.\n"
+            "No: always use the maximums.",
+        )
+        self._save_config({
+            keys["download_max"]: downloads,
+            keys["download"]: min(settings.download, downloads) if auto_tune else downloads,
+            keys["api_max"]: api,
+            keys["api"]: min(settings.api, api) if auto_tune else api,
+            "auto_tune": "true" if auto_tune else "false",
+        })
+        messagebox.showinfo("Concurrency Settings", "Concurrency settings saved. They apply from the next backup.")
+
     def update_token(self):
         token = simpledialog.askstring("Update Token", "Enter new API token:")
         if token and token.strip():
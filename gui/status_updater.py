@@ -0,0 +1,39 @@
+from typing import Callable
+from backup_manager.course_store import CourseStore
+
+
+class StatusUpdater:
+    """
+    Batches backup status changes into bounded-rate table updates.
+
+    The backup engine writes status changes straight into the CourseStore
+    (``post`` does the same for plain status callbacks); that is O(1) and
+    safe from any thread. ``flush`` runs on the Tk thread every ``frame_ms``
+    milliseconds, takes the IDs of the courses that changed since the last
+    frame and asks the table to redraw just those. Overall progress comes
+    from the store's count of finished courses.
+    """
+
+    def __init__(self, root, table, store: CourseStore, on_overall_progress: Callable[[float], None] = None,
+                 max_fps: int = 10):
+        self.root = root
+        self.table = table
+        self.store = store
+        self.on_overall_progress = on_overall_progress
+        self.frame_ms = int(1000 / max_fps)
+
+    def post(self, course_name, course_id, status, progress):
+        """Status callback signature used by BackupRunner; safe to call from any thread."""
+        self.store.update(course_id, status=status, progress=progress)
+
+    def flush(self):
+        """Redraw the courses changed since the last frame and the overall progress. Tk thread only."""
+        changed = self.store.take_changes()
+        if not changed:
+            return
+        self.table.refresh_rows(changed)
+        self.report_progress()
+
+    def report_progress(self):
+        if self.on_overall_progress:
+            self.on_overall_progress(self.store.overall_progress)
@@ -2,8 +2,120 @@ import tkinter as tk
 from tkinter import ttk
 from typing import Callable
 
-def create_table(parent, filter_changed_callback: Callable = None) -> ttk.Treeview:
-    """Create a table with sorting and filtering capabilities"""
+FILTER_DELAY_MS = 200  # Debounce for the filter entry
+
+# Table column -> CourseRecord attribute it shows
+COLUMN_KEYS = {
+    "Course Name": "name",
+    "Course ID": "course_id",
+    "Status": "status",
+    "Progress": "progress",
+}
+
+
+class VirtualTable:
+    """
+    A Treeview that only holds items for the rows on screen.
+
+    The rows live in an in-memory model (a list of CourseRecords). A fixed
+    pool of Treeview items, one per visible line, is re-filled as the table
+    scrolls, and ``refresh_rows`` redraws only changed rows that are in view,
+    so redraw cost does not grow with the number of courses.
+    """
+
+    def __init__(self, tree: ttk.Treeview, scrollbar: ttk.Scrollbar, row_height: int = 20):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.row_height = row_height
+        self.rows = []  # The rows being shown, after filtering and sorting
+        self.positions = {}  # course_id -> index in rows
+        self.top = 0  # Index of the first row on screen
+        self.visible_rows = 30
+        self.pool = []  # Treeview item ids, one per line on screen
+        self.drawn = {}  # item id -> values currently displayed
+        self.sort_state = {}  # column -> "asc" / "desc"
+        self.model = None  # CourseIndex that filters and sorts the rows
+
+    def set_rows(self, rows):
+        """Replace the rows shown. Records are shared with the CourseStore, so refresh_rows shows their changes."""
+        self.rows = list(rows)
+        self.positions = {row.course_id: index for index, row in enumerate(self.rows)}
+        self.render()
+
+    def refresh_rows(self, course_ids):
+        """Redraw the given courses if they are on screen."""
+        for course_id in course_ids:
+            index = self.positions.get(str(course_id))
+            if index is not None and self.top <= index < self.top + len(self.pool):
+                self._draw(self.pool[index - self.top], self.rows[index])
+
+    def render(self):
+        """Fill the item pool with the rows from ``top`` downwards."""
+        self.top = max(0, min(self.top, len(self.rows) - self.visible_rows))
+        needed = min(self.visible_rows, len(self.rows))
+        while len(self.pool) < needed:
+            self.pool.append(self.tree.insert("", tk.END, values=()))
+        while len(self.pool) > needed:
+            item = self.pool.pop()
+            self.drawn.pop(item, None)
+            self.tree.delete(item)
+
+        for offset, item in enumerate(self.pool):
+            self._draw(item, self.rows[self.top + offset])
+
+        if self.rows:
+            self.scrollbar.set(self.top / len(self.rows), (self.top + needed) / len(self.rows))
+        else:
+            self.scrollbar.set(0, 1)
+
+    def set_model(self, model):
+        """Filter and sort through a new CourseIndex, keeping the current sort column and direction."""
+        self.model = model
+        for column, direction in self.sort_state.items():
+            model.set_sort(COLUMN_KEYS[column], descending=direction == "desc")
+
+    def sort_by(self, column: str) -> str:
+        """Sort the model by a column, toggling the direction. Returns "asc" or "desc"."""
+        direction = "desc" if self.sort_state.get(column) == "asc" else "asc"
+        self.sort_state = {column: direction}
+        if self.model is not None:
+            self.model.set_sort(COLUMN_KEYS[column], descending=direction == "desc")
+            self.set_rows(self.model.view())
+        return direction
+
+    def _draw(self, item, row):
+        values = row.display_values()
+        if self.drawn.get(item) != values:
+            self.tree.item(item, values=values)
+            self.drawn[item] = values
+
+    def yview(self, *args):
+        """Scrollbar command: ``moveto fraction`` or ``scroll n units|pages``."""
+        if args[0] == "moveto":
+            self.top = int(float(args[1]) * len(self.rows))
+        elif args[0] == "scroll":
+            step = self.visible_rows if args[2] == "pages" else 1
+            self.top += int(args[1]) * step
+        self.render()
+
+    def _on_mousewheel(self, event):
+        if getattr(event, "num", None) in (4, 5):  # X11 reports the wheel as buttons 4 and 5
+            direction = -1 if event.num == 4 else 1
+        else:
+            direction = -1 if event.delta > 0 else 1
+        self.yview("scroll", direction * 3, "units")
+        return "break"
+
+    def _on_resize(self, event):
+        # One line of the height goes to the column headings
+        visible_rows = max(1, event.height // self.row_height - 1)
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            self.render()
+
+
+def create_table(parent, filter_changed_callback: Callable = None) -> VirtualTable:
+    """Create a virtualized table with sorting and filtering capabilities"""
     container = ttk.Frame(parent)
     container.pack(fill=tk.BOTH, expand=True)
     
@@ -19,14 +131,22 @@ def create_table(parent, filter_changed_callback: Callable = None) -> ttk.Treevi
     table_frame = ttk.Frame(container)
     table_frame.pack(fill=tk.BOTH, expand=True)
     
-    columns = ("Course Name", "Course ID", "Status", "Progress")
-    table = ttk.Treeview(
+    columns = tuple(COLUMN_KEYS)
+    tree = ttk.Treeview(
         table_frame,
         columns=columns,
         show="headings",
         selectmode="extended"
     )
     
+    # The vertical scrollbar moves through the model, not the Treeview
+    vsb = ttk.Scrollbar(table_frame, orient=tk.VERTICAL)
+    hsb = ttk.Scrollbar(table_frame, orient=tk.HORIZONTAL, command=tree.xview)
+    tree.configure(xscrollcommand=hsb.set)
+    row_height = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+    table = VirtualTable(tree, vsb, row_height)
+    vsb.configure(command=table.yview)
+
     # Configure columns
     col_config = {
         "Course Name": {"width": 300, "anchor": tk.W},
@@ -36,58 +156,42 @@ def create_table(parent, filter_changed_callback: Callable = None) -> ttk.Treevi
     }
     
     for col, config in col_config.items():
-        table.heading(col, text=col, 
+        tree.heading(col, text=col, 
                      command=lambda c=col: sort_column(table, c))
-        table.column(col, **config)
-    
-    # Add scrollbars
-    vsb = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=table.yview)
-    hsb = ttk.Scrollbar(table_frame, orient=tk.HORIZONTAL, command=table.xview)
-    table.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
+        tree.column(col, **config)
     
     # Grid layout
-    table.grid(row=0, column=0, sticky="nsew")
+    tree.grid(row=0, column=0, sticky="nsew")
     vsb.grid(row=0, column=1, sticky="ns")
     hsb.grid(row=1, column=0, sticky="ew")
     
     table_frame.grid_rowconfigure(0, weight=1)
     table_frame.grid_columnconfigure(0, weight=1)
+
+    tree.bind("<Configure>", table._on_resize)
+    for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+        tree.bind(sequence, table._on_mousewheel)
     
-    # Bind filter entry
+    # Bind filter entry; the filter runs once typing pauses, not on every key
     if filter_changed_callback:
-        filter_entry.bind("<KeyRelease>", 
-                         lambda e: filter_changed_callback(filter_entry.get()))
+        pending = {}
+
+        def schedule_filter(event):
+            if pending.get("after"):
+                filter_entry.after_cancel(pending["after"])
+            pending["after"] = filter_entry.after(
+                FILTER_DELAY_MS, lambda: filter_changed_callback(filter_entry.get()))
+
+        filter_entry.bind("<KeyRelease>", schedule_filter)
     
     return table
 
-def sort_column(table: ttk.Treeview, column: str):
-    """Sort treeview by column, toggling between ascending/descending"""
-    # Get current sort state
-    current_sort = table.heading(column).get("direction", "")
-    
-    # Toggle direction
-    new_sort = "desc" if current_sort == "asc" else "asc"
+def sort_column(table: VirtualTable, column: str):
+    """Sort the table by column, toggling between ascending/descending"""
+    new_sort = table.sort_by(column)
     
     # Update heading arrow
-    table.heading(column, 
-                 direction=new_sort,
-                 image=get_sort_arrow(new_sort))
-    
-    # Sort the data
-    data = [(table.set(child, column), child) 
-           for child in table.get_children("")]
-    
-    # Numeric sorting for progress
-    if column == "Progress":
-        data.sort(key=lambda x: float(x[0].strip('%')), 
-                 reverse=new_sort == "desc")
-    else:
-        data.sort(key=lambda x: x[0].lower(), 
-                 reverse=new_sort == "desc")
-    
-    # Rearrange items
-    for index, (_, child) in enumerate(data):
-        table.move(child, "", index)
+    table.tree.heading(column, image=get_sort_arrow(new_sort))
 
 def get_sort_arrow(direction: str) -> tk.PhotoImage:
     """Generate sort direction arrows"""
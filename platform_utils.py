@@ -49,6 +49,29 @@ def get_app_data_dir(app_name='CaughtUP'):
     logging.info(f"Application data directory: {app_data_dir}")
     return app_data_dir
 
+def get_config_file():
+    """Returns the path of the user's ``key=value`` config file."""
+    return os.path.join(get_app_data_dir(), "resources", "config.txt")
+
+def read_config(config_file=None):
+    """
+    Reads ``key=value`` lines from a config file into a dict. Blank lines
+    and ``#`` comments are ignored. Defaults to the user's config file;
+    a missing file gives an empty dict.
+    """
+    config_file = config_file or get_config_file()
+    config = {}
+    if not os.path.exists(config_file):
+        return config
+    with open(config_file, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#") or "=" not in line:
+                continue
+            key, value = line.split("=", 1)
+            config[key.strip()] = value.strip()
+    return config
+
 def get_resource_path(relative_path):
     """
     Get absolute path to resource, works for dev and for PyInstaller bundle.
@@ -114,19 +137,15 @@ def ensure_backup_folder_configured():
     from tkinter import filedialog, messagebox
     
     app_data_dir = get_app_data_dir()
-    config_file = os.path.join(app_data_dir, "resources", "config.txt")
+    config_file = get_config_file()
     
-    # Check if config file exists and has backup_folder
-    if os.path.exists(config_file):
-        try:
-            with open(config_file, "r") as f:
-                for line in f:
-                    if line.startswith("backup_folder="):
-                        folder_path = line.strip().split("=", 1)[1]
-                        if os.path.exists(folder_path) and os.access(folder_path, os.W_OK):
-                            return folder_path
-        except Exception as e:
-            logging.warning(f"Failed to read backup_folder from config: {e}")
+    # Check if config file has a usable backup_folder
+    try:
+        folder_path = read_config(config_file).get("backup_folder")
+        if folder_path and os.path.exists(folder_path) and os.access(folder_path, os.W_OK):
+            return folder_path
+    except Exception as e:
+        logging.warning(f"Failed to read backup_folder from config: {e}")
     
     # No valid backup folder found, prompt user
     messagebox.showinfo(
@@ -0,0 +1,126 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+from backup_manager.backup_runner import BackupRunner
+from backup_manager.change_detector import ChangeDetector
+from backup_manager.job_journal import JobJournal, PHASE_COMPLETED
+
+
+class FakeCanvas:
+    def __init__(self):
+        self.page_updated_at = "2026-01-01T00:00:00Z"
+        self.quizzes = [{"id": 3, "title": "Quiz", "question_count": 5}]
+        self.exports_triggered = 0
+
+    async def make_request(self, endpoint, method="GET", params=None, data=None):
+        if endpoint.endswith("/content_exports"):
+            self.exports_triggered += 1
+            raise RuntimeError("export triggered")
+        if endpoint.endswith("/pages"):
+            return [{"id": 1, "updated_at": self.page_updated_at}]
+        if endpoint.endswith("/quizzes"):
+            return self.quizzes
+        if endpoint.startswith("/api/v1/courses/") and endpoint.count("/") == 4:
+            return {"id": 7, "workflow_state": "available"}
+        return []
+
+    async def paginate(self, endpoint, params=None, per_page=100, **kwargs):
+        if endpoint.endswith("/content_exports"):
+            self.exports_triggered += 1
+            raise RuntimeError("export triggered")
+        for item in await self.make_request(endpoint, params=params):
+            yield item
+
+
+def test_signature_changes_with_content():
+    canvas = FakeCanvas()
+    detector = ChangeDetector(canvas)
+    first = asyncio.run(detector.signature(7))
+    assert asyncio.run(detector.signature(7)) == first
+    canvas.page_updated_at = "2026-02-01T00:00:00Z"
+    second = asyncio.run(detector.signature(7))
+    assert second != first
+    canvas.quizzes = [{"id": 3, "title": "Quiz", "question_count": 6}]  # Not sortable by update time
+    assert asyncio.run(detector.signature(7)) != second
+
+
+def _run(tmp_path, canvas, journal, skip_unchanged=True):
+    statuses = []
+
+    def callback(course_name, course_id, status, progress):
+        statuses.append(status)
+
+    async def run():
+        runner = BackupRunner(canvas, str(tmp_path / "out"), asyncio.Event(), journal=journal,
+                              skip_unchanged=skip_unchanged)
+        return await runner.run_backup("Course", "7", callback)
+
+    return asyncio.run(run()), statuses
+
+
+def test_unchanged_course_is_marked_up_to_date(tmp_path):
+    canvas = FakeCanvas()
+    journal = JobJournal(str(tmp_path / "journal.db"))
+    signature = asyncio.run(ChangeDetector(canvas).signature("7"))
+    journal.record("7", "Course", phase=PHASE_COMPLETED, content_signature=signature)
+    (tmp_path / "out" / "Course").mkdir(parents=True)
+    (tmp_path / "out" / "Course" / "Course_2026-01-01.zip").write_bytes(b"zip")
+
+    result, statuses = _run(tmp_path, canvas, journal)
+    assert result is True
+    assert statuses[-1] == "Up to date"
+    assert canvas.exports_triggered == 0
+
+    result, statuses = _run(tmp_path, canvas, journal, skip_unchanged=False)  # The default
+    assert statuses[-1] == "Failed"
+    assert canvas.exports_triggered == 1
+
+
+class ExportingCanvas(FakeCanvas):
+    def __init__(self, exports):
+        super().__init__()
+        self.exports = exports
+
+    async def make_request(self, endpoint, method="GET", params=None, data=None):
+        if endpoint.endswith("/content_exports") and method == "POST":
+            self.exports_triggered += 1
+            return {"id": 99}
+        return await super().make_request(endpoint, method, params, data)
+
+    async def paginate(self, endpoint, params=None, per_page=100, **kwargs):
+        if endpoint.endswith("/content_exports"):
+            for export in self.exports:
+                yield export
+            return
+        async for item in super().paginate(endpoint, params, per_page, **kwargs):
+            yield item
+
+
+def _canvas_time(hours_ago):
+    return (datetime.now(timezone.utc) - timedelta(hours=hours_ago)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def test_changed_course_never_reuses_an_export_from_before_the_change(tmp_path):
+    journal = JobJournal(str(tmp_path / "journal.db"))
+    journal.record("7", "Course", phase=PHASE_COMPLETED, content_signature="old",
+                   last_backup_at=time.time() - 2 * 3600)
+
+    async def export_for(exports):
+        runner = BackupRunner(ExportingCanvas(exports), str(tmp_path / "out"), asyncio.Event(), journal=journal,
+                              skip_unchanged=True)
+        assert not await runner._is_unchanged("Course", "7")
+        return await runner.trigger_course_export("7"), runner
+
+    # Finished before the last backup, so it cannot hold the edit: a new export is started
+    before = {"id": 1, "workflow_state": "exported", "created_at": _canvas_time(3), "updated_at": _canvas_time(3)}
+    export_id, runner = asyncio.run(export_for([before]))
+    assert export_id == 99
+    assert "7" in runner._signatures
+
+    # Reused, but it may still predate the edit, so the new signature is not saved
+    since = {"id": 2, "workflow_state": "exported", "created_at": _canvas_time(1), "updated_at": _canvas_time(1)}
+    export_id, runner = asyncio.run(export_for([since, before]))
+    assert export_id == 2
+    assert "7" not in runner._signatures
+    journal.close()
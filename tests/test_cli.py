@@ -0,0 +1,46 @@
+import io
+import json
+from datetime import datetime
+from types import SimpleNamespace
+
+from backup_manager.cli import ProgressPrinter, load_credentials, parse_deadline
+from platform_utils import read_config
+
+
+def test_read_config_parses_key_value_lines(tmp_path):
+    config = tmp_path / "config.txt"
+    config.write_text("# comment\nbase_url=https://example.com\nbackup_folder=/tmp/b=c\n\n")
+    assert read_config(str(config)) == {
+        "base_url": "https://example.com",
+        "backup_folder": "/tmp/b=c",
+    }
+    assert read_config(str(tmp_path / "missing.txt")) == {}
+
+
+def test_load_credentials_prefers_environment(tmp_path, monkeypatch):
+    config = tmp_path / "config.txt"
+    config.write_text("base_url=https://config.example.com\n")
+    monkeypatch.setenv("CANVAS_API_TOKEN", "env-token")
+    monkeypatch.delenv("CANVAS_BASE_URL", raising=False)
+    args = SimpleNamespace(config=str(config), base_url=None, token_file=None)
+    base_url, token, _ = load_credentials(args)
+    assert base_url == "https://config.example.com"
+    assert token == "env-token"
+
+
+def test_progress_printer_emits_only_state_changes():
+    stream = io.StringIO()
+    printer = ProgressPrinter(stream)
+    printer("Course", 1, "Downloading", 10)
+    printer("Course", 1, "Downloading", 10)
+    printer("Course", 1, "Completed", 100)
+    events = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [e["status"] for e in events] == ["Downloading", "Completed"]
+    assert printer.final_status == {"1": "Completed"}
+
+
+def test_parse_deadline_accepts_clock_times_and_durations():
+    now = datetime(2024, 5, 1, 22, 30)
+    assert parse_deadline("90m", now) == datetime(2024, 5, 2, 0, 0).timestamp()
+    assert parse_deadline("23:00", now) == datetime(2024, 5, 1, 23, 0).timestamp()
+    assert parse_deadline("06:00", now) == datetime(2024, 5, 2, 6, 0).timestamp()  # Tomorrow morning
@@ -0,0 +1,140 @@
+import asyncio
+
+from backup_manager.backup_runner import BackupRunner
+from backup_manager.concurrency import AdjustableLimiter, ConcurrencySettings, ConcurrencyTuner
+from backup_manager.worker_pool import CoursePool
+
+
+class DownloadCountingRunner(BackupRunner):
+    """BackupRunner with instant exports and short fake downloads that count how many overlap."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.downloading = 0
+        self.peak_downloads = 0
+        self.finished = []
+
+    async def prepare_export(self, course_name, course_id, status_callback=None):
+        return ("export_ready", f"https://files/{course_id}.zip")
+
+    async def finish_download(self, course_name, course_id, phase, export_url, status_callback=None):
+        self.downloading += 1
+        self.peak_downloads = max(self.peak_downloads, self.downloading)
+        await asyncio.sleep(0.005)
+        self.downloading -= 1
+        self.finished.append(course_id)
+        return True
+
+
+def test_limiter_follows_limit_changes():
+    async def run():
+        limiter = AdjustableLimiter(1)
+        active, peak = 0, 0
+
+        async def job():
+            nonlocal active, peak
+            async with limiter:
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.01)
+                active -= 1
+
+        jobs = [asyncio.create_task(job()) for _ in range(6)]
+        await asyncio.sleep(0)
+        limiter.set_limit(3)  # Waiters are let in at once
+        await asyncio.gather(*jobs)
+        return peak, limiter.in_use
+
+    assert asyncio.run(run()) == (3, 0)
+
+
+def test_tuner_increases_additively_and_backs_off_multiplicatively():
+    limiter = AdjustableLimiter(4)
+    tuner = ConcurrencyTuner("test", limiter, min_limit=2, max_limit=6)
+
+    limiter.peak = 4  # Every slot was busy
+    tuner.record(1000, latency=0.1)
+    assert tuner.adjust(elapsed=1)["limit"] == 5
+
+    limiter.peak = 5
+    tuner.record(2000, latency=0.1)
+    assert tuner.adjust(elapsed=1)["limit"] == 6
+
+    limiter.peak = 6
+    tuner.record(4000, latency=0.1)
+    assert tuner.adjust(elapsed=1) is None  # Already at max_limit
+
+    tuner.record(4000, latency=0.1)
+    tuner.record_throttled()
+    decision = tuner.adjust(elapsed=1)
+    assert decision["limit"] == 3 and "throttled" in decision["reason"]
+
+    tuner.record(4000, latency=0.5)  # Five times the baseline
+    assert tuner.adjust(elapsed=1)["limit"] == 2
+    assert tuner.stats()["adjustments"] == 4
+
+
+def test_tuner_does_not_grow_idle_slots():
+    limiter = AdjustableLimiter(4)
+    tuner = ConcurrencyTuner("test", limiter, min_limit=1, max_limit=8)
+    limiter.peak = 2
+    tuner.record(1000)
+    assert tuner.adjust(elapsed=1) is None
+
+
+def test_settings_from_config_clamp_and_override():
+    settings = ConcurrencySettings.from_config(
+        {"download_concurrency": "20", "download_concurrency_max": "8", "api_concurrency": "x", "auto_tune": "off"},
+        api=4,
+    )
+    assert settings.download == 8
+    assert settings.api == 4
+    assert not settings.auto_tune
+
+
+def test_explicit_concurrency_above_the_default_max_is_kept():
+    settings = ConcurrencySettings.from_config({}, download=32, api=50, auto_tune=False)
+    assert (settings.download, settings.api) == (32, 50)
+    assert (settings.download_max, settings.api_max) == (32, 50)
+
+    settings = ConcurrencySettings.from_config({"download_concurrency_min": "4"}, download=2)
+    assert (settings.download, settings.download_min) == (2, 2)
+
+
+def test_auto_tuning_is_opt_in(tmp_path):
+    assert not ConcurrencySettings().auto_tune
+    assert ConcurrencySettings.from_config({"auto_tune": "true"}).auto_tune
+    runner = BackupRunner(None, str(tmp_path), asyncio.Event(), concurrency_limit=3, tuning=ConcurrencySettings())
+    assert runner.tuners == [] and runner.download_limiter.limit == 3
+
+
+def test_auto_tuned_runner_keeps_downloads_within_the_limit(tmp_path):
+    async def run():
+        runner = DownloadCountingRunner(None, str(tmp_path), asyncio.Event(), concurrency_limit=2, export_concurrency=8,
+                              tuning=ConcurrencySettings(download=2, download_max=6, auto_tune=True))
+        queue = asyncio.Queue()
+        for i in range(12):
+            queue.put_nowait((f"Course {i}", str(i), None))
+        await runner.process_queue(queue)
+        return runner
+
+    runner = asyncio.run(run())
+    assert len(runner.finished) == 12
+    assert runner.download_workers == 6
+    assert runner.peak_downloads == 2  # No tuning window closed in this short run
+
+
+def test_idle_download_workers_do_not_hold_slots(tmp_path):
+    async def run():
+        runner = DownloadCountingRunner(None, str(tmp_path), asyncio.Event(), concurrency_limit=4,
+                              tuning=ConcurrencySettings(download=4, download_max=8, auto_tune=True))
+        pool = CoursePool(runner).start()
+        await asyncio.sleep(0.01)  # Every worker is waiting for work
+        idle = runner.download_limiter.in_use, runner.download_limiter.peak
+        await pool.submit("Course 1", "1")
+        await pool.drain()
+        return idle, runner.download_limiter.peak
+
+    idle, peak = asyncio.run(run())
+    assert idle == (0, 0)
+    assert peak == 1
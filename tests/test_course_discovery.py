@@ -0,0 +1,84 @@
+import asyncio
+
+from backup_manager.backup_runner import BackupRunner
+from backup_manager.course_discovery import CourseDiscovery
+
+
+class FakeCanvas:
+    """Serves account course listings one page at a time."""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.calls = []
+        self.pages_served = 0
+
+    async def paginate(self, endpoint, params=None, per_page=100, **kwargs):
+        self.calls.append((endpoint, list(params or [])))
+        for page in self.pages.get(endpoint, []):
+            await asyncio.sleep(0.01)
+            self.pages_served += 1
+            for course in page:
+                yield course
+
+
+async def collect(discovery):
+    return [row async for row in discovery]
+
+
+def test_discovery_filters_and_deduplicates():
+    canvas = FakeCanvas({
+        "/api/v1/accounts/1/courses": [
+            [{"id": 10, "name": "BIO 101: Cells", "account_id": 1},
+             {"id": 11, "name": "CHEM 101", "account_id": 1}],
+            [{"id": 12, "name": "BIO 201", "account_id": 7}],
+        ],
+        "/api/v1/accounts/7/courses": [[{"id": 12, "name": "BIO 201", "account_id": 7}]],
+    })
+    discovery = CourseDiscovery(canvas, [1, 7], states=["available"], name_pattern="^bio")
+    rows = asyncio.run(collect(discovery))
+
+    assert [row["course_id"] for row in rows] == ["10", "12"]
+    assert rows[0]["sanitized_name"] == "BIO 101_ Cells"
+    assert ("state[]", "available") in canvas.calls[0][1]
+
+
+def test_discovery_can_exclude_subaccounts_and_split_terms():
+    canvas = FakeCanvas({
+        "/api/v1/accounts/1/courses": [[{"id": 10, "name": "A", "account_id": 1},
+                                        {"id": 12, "name": "B", "account_id": 7}]],
+    })
+    discovery = CourseDiscovery(canvas, [1], include_subaccounts=False, term_ids=[3, 4])
+    rows = asyncio.run(collect(discovery))
+
+    assert [row["course_id"] for row in rows] == ["10"]
+    assert [dict(params).get("enrollment_term_id") for _, params in canvas.calls] == ["3", "4"]
+
+
+class RecordingRunner(BackupRunner):
+    def __init__(self, canvas, *args, **kwargs):
+        super().__init__(None, *args, **kwargs)
+        self.canvas = canvas
+        self.started_at_page = {}
+
+    async def prepare_export(self, course_name, course_id, status_callback=None):
+        self.started_at_page[course_id] = self.canvas.pages_served
+        await asyncio.sleep(0.001)
+        return ("export_ready", f"https://files/{course_id}.zip")
+
+    async def finish_download(self, course_name, course_id, phase, export_url, status_callback=None):
+        return True
+
+
+def test_discovered_courses_start_before_listing_finishes(tmp_path):
+    pages = [[{"id": page * 10 + i, "name": f"Course {page}-{i}"} for i in range(3)] for page in range(4)]
+    canvas = FakeCanvas({"/api/v1/accounts/1/courses": pages})
+
+    async def run():
+        runner = RecordingRunner(canvas, str(tmp_path), asyncio.Event(), export_concurrency=2)
+        produced = await runner.process_source(CourseDiscovery(canvas, [1]))
+        return runner, produced
+
+    runner, produced = asyncio.run(run())
+    assert produced == 12
+    assert len(runner.started_at_page) == 12
+    assert runner.started_at_page["0"] == 1  # First course began while later pages were unfetched
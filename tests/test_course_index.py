@@ -0,0 +1,65 @@
+import random
+import time
+
+from backup_manager.course_store import CourseRecord, CourseStatus
+from gui.course_index import CourseIndex
+
+
+def make_rows(count):
+    rng = random.Random(7)
+    words = ["Biology", "Chemistry", "History", "Art", "Physics", "Calculus"]
+    statuses = ["Pending", "Completed", "Failed", "Downloading"]
+    return [
+        CourseRecord(
+            rng.randint(1, 10 ** 6),
+            f"{rng.choice(words)} {rng.randint(100, 499)} Section {i}",
+            status=rng.choice(statuses),
+            progress=rng.randint(0, 100),
+        )
+        for i in range(count)
+    ]
+
+
+def naive_filter(rows, text):
+    return [row for row in rows if any(text in value.lower() for value in row.display_values())]
+
+
+def test_filter_matches_a_full_scan():
+    rows = make_rows(2000)
+    index = CourseIndex(rows)
+    for text in ("b", "bi", "bio", "biology 1", "section 19", "fail", "100%", "zzz", "42"):
+        index.set_filter(text)
+        assert index.view() == naive_filter(rows, text), text
+
+    rows[0].status = CourseStatus.UP_TO_DATE  # Live columns are matched against current values
+    index.set_filter("up to")
+    assert index.view() == [rows[0]]
+
+
+def test_sort_uses_typed_keys_and_keeps_the_filter():
+    rows = [
+        CourseRecord("100", "b", status="Pending", progress=9),
+        CourseRecord("20", "A", status="Failed", progress=10),
+        CourseRecord("3", "c", status="Completed", progress=100),
+    ]
+    index = CourseIndex(rows)
+    index.set_sort("course_id")
+    assert [row.course_id for row in index.view()] == ["3", "20", "100"]
+    index.set_sort("progress", descending=True)
+    assert [row.progress for row in index.view()] == [100, 10, 9]
+    index.set_sort("name", descending=True)
+    index.set_filter("ed")  # "Failed" and "Completed"
+    assert [row.name for row in index.view()] == ["c", "A"]
+
+
+def test_filter_and_sort_of_20k_rows_are_fast():
+    rows = make_rows(20000)
+    index = CourseIndex(rows)
+    started = time.perf_counter()
+    for text in ("c", "ch", "che", "chem", "chemi", "chemistry 2"):
+        index.set_filter(text)
+        index.view()
+    index.set_sort("progress")
+    index.view()
+    # Generous bound so the test is stable on slow machines
+    assert time.perf_counter() - started < 1.0
@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+
+from backup_manager.backup_runner import BackupRunner
+from backup_manager.course_store import CourseRecord, CourseStatus, CourseStore
+
+
+def test_updates_track_finished_courses_and_timestamps():
+    store = CourseStore()
+    store.load([CourseRecord(1, "Biology"), CourseRecord("2", "Biology"), CourseRecord(3, "Art", status="Failed")])
+    assert store.finished == 1 and len(store) == 3
+
+    store.update(1, status="Backing up")
+    store.update("1", status=CourseStatus.COMPLETED, progress=100)
+    store.update(3, status="Pending")  # Retried
+    record = store.get(1)
+    assert record.status == "Completed" and record.status.is_final
+    assert record.started_at <= record.finished_at
+    assert store.get(2).status == CourseStatus.PENDING  # Same name, different course
+    assert store.finished == 1
+    assert store.overall_progress == pytest.approx(100 / 3)
+    assert store.take_changes() == {"1", "3"}
+    assert store.take_changes() == set()
+
+    store.update(99, status="Completed")  # Unknown courses are ignored
+    with pytest.raises(ValueError):
+        store.update(1, status="Exploded")
+    with pytest.raises(AttributeError):
+        record.colour = "red"  # Records are slotted
+
+
+def test_backup_runner_writes_the_store(tmp_path):
+    store = CourseStore()
+    store.load([CourseRecord(7, "Biology")])
+    runner = BackupRunner(None, str(tmp_path), asyncio.Event(), course_store=store)
+
+    async def run():
+        await runner._notify(None, "Biology", "7", "Downloading", 40)
+        runner._journal("7", last_error="boom")
+
+    asyncio.run(run())
+    record = store.get(7)
+    assert (record.status, record.progress, record.last_error) == ("Downloading", 40, "boom")
+    assert record.display_values() == ("Biology", "7", "Downloading", "40%")
@@ -0,0 +1,90 @@
+import asyncio
+import csv
+
+import pytest
+
+from backup_manager.backup_runner import BackupRunner
+from backup_manager.csv_validator import CSVValidationError, CSVValidator, ValidationReport
+
+
+def write_large_csv(path, count):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Course Name", "Course URL"])
+        for i in range(count):
+            if i % 1000 == 1:
+                writer.writerow([f"Course {i}", "https://canvas.example.com/not-a-course"])
+            elif i % 1000 == 2:
+                writer.writerow([f"Course {i}", "https://canvas.example.com/courses/0"])  # Duplicate
+            else:
+                writer.writerow([f"Course: {i}", f"https://canvas.example.com/courses/{i}"])
+
+
+def test_rows_stream_with_a_bounded_report(tmp_path):
+    path = tmp_path / "courses.csv"
+    write_large_csv(path, 200_000)
+    report = ValidationReport(max_examples=5)
+    rows = CSVValidator(str(path), "canvas.example.com").iter_rows(report)
+
+    first = next(rows)
+    assert first == {"original_name": "Course: 0", "sanitized_name": "Course_ 0", "course_id": "0"}
+    assert report.valid == 1  # Nothing beyond the first row has been read
+
+    remaining = sum(1 for _ in rows)
+    assert report.valid == remaining + 1 == 199_600
+    assert report.counts == {"malformed": 0, "invalid_url": 200, "wrong_domain": 0, "duplicate": 200}
+    assert len(report.examples["duplicate"]) == 5
+    assert report.examples["duplicate"][0] == [4, "Course 2", "0"]
+
+
+def test_header_errors_are_raised_before_reading_rows(tmp_path):
+    path = tmp_path / "bad.csv"
+    path.write_text("Name,URL\nA,https://canvas.example.com/courses/1\n")
+    with pytest.raises(CSVValidationError):
+        CSVValidator(str(path)).iter_rows()
+    with pytest.raises(CSVValidationError):
+        CSVValidator(str(tmp_path / "missing.csv")).iter_rows()
+
+
+class CountingRunner(BackupRunner):
+    async def prepare_export(self, course_name, course_id, status_callback=None):
+        self.read_at_first_export = getattr(self, "read_at_first_export", None) or self.report.valid
+        return ("completed", None)
+
+
+def test_csv_rows_feed_the_bounded_backup_queue(tmp_path):
+    path = tmp_path / "courses.csv"
+    write_large_csv(path, 5000)
+    report = ValidationReport()
+
+    async def run():
+        runner = CountingRunner(None, str(tmp_path), asyncio.Event(), export_concurrency=4)
+        runner.report = report
+        produced = await runner.process_source(CSVValidator(str(path)).iter_rows(report))
+        return runner, produced
+
+    runner, produced = asyncio.run(run())
+    assert produced == report.valid == 4990
+    assert runner.read_at_first_export <= 10  # Work started long before the file was read
+
+
+def test_source_done_is_reported_before_the_last_course_finishes(tmp_path):
+    path = tmp_path / "courses.csv"
+    write_large_csv(path, 50)
+    report = ValidationReport()
+    events = []
+
+    class SlowRunner(BackupRunner):
+        async def prepare_export(self, course_name, course_id, status_callback=None):
+            await asyncio.sleep(0.01)
+            events.append("course")
+            return ("completed", None)
+
+    async def run():
+        runner = SlowRunner(None, str(tmp_path), asyncio.Event(), export_concurrency=4)
+        return await runner.process_source(CSVValidator(str(path)).iter_rows(report),
+                                           source_done=lambda: events.append(("loaded", report.valid)))
+
+    assert asyncio.run(run()) == 48
+    assert ("loaded", 48) in events
+    assert events[-1] == "course"
@@ -0,0 +1,199 @@
+import asyncio
+import json
+import os
+
+from aiohttp import ClientTimeout, web
+
+from backup_manager.backup_runner import BackupRunner, parse_content_range, plan_segments
+from backup_manager.concurrency import ConcurrencySettings
+from backup_manager.http_session import HTTPSessionManager
+
+PAYLOAD = bytes(range(256)) * 4096  # 1 MiB
+
+
+async def _serve(tmp_path, handler_log, if_range_log=None, respond=None):
+    source = tmp_path / "export.zip"
+    source.write_bytes(PAYLOAD)
+
+    async def handler(request):
+        handler_log.append(request.headers.get("Range"))
+        if if_range_log is not None:
+            if_range_log.append(request.headers.get("If-Range"))
+        if respond:
+            return await respond(request)
+        return web.FileResponse(source)
+
+    app = web.Application()
+    app.router.add_get("/export.zip", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/export.zip"
+
+
+def _download(tmp_path, prepare=None, if_ranges=None, respond=None, **runner_kwargs):
+    ranges = []
+
+    async def run():
+        server, url = await _serve(tmp_path, ranges, if_ranges, respond)
+        try:
+            out = tmp_path / "out"
+            course_dir = out / "Course"
+            course_dir.mkdir(parents=True)
+            if prepare:
+                prepare(course_dir, url)
+            runner_kwargs.setdefault("download_segments", 1)
+            runner = BackupRunner(None, str(out), asyncio.Event(), **runner_kwargs)
+            try:
+                return await runner.download_backup("Course", url, None, "1"), course_dir
+            finally:
+                await runner.close()
+        finally:
+            await server.cleanup()
+
+    path, course_dir = asyncio.run(run())
+    return path, course_dir, ranges
+
+
+def test_fresh_download_is_renamed_into_place(tmp_path):
+    path, course_dir, ranges = _download(tmp_path)
+    assert ranges == [None]
+    with open(path, "rb") as f:
+        assert f.read() == PAYLOAD
+    assert os.listdir(course_dir) == [os.path.basename(path)]
+
+
+def test_partial_download_resumes_with_range(tmp_path):
+    def prepare(course_dir, url):
+        part = course_dir / "Course_2000-01-01.zip.part"
+        part.write_bytes(PAYLOAD[:1000])
+        (course_dir / "Course_2000-01-01.zip.part.json").write_text(json.dumps({"url": url}))
+
+    path, course_dir, ranges = _download(tmp_path, prepare)
+    assert ranges == ["bytes=1000-"]
+    with open(path, "rb") as f:
+        assert f.read() == PAYLOAD
+    assert os.listdir(course_dir) == [os.path.basename(path)]
+
+
+def test_partial_download_from_other_export_is_discarded(tmp_path):
+    def prepare(course_dir, url):
+        (course_dir / "Course_2000-01-01.zip.part").write_bytes(b"stale")
+        (course_dir / "Course_2000-01-01.zip.part.json").write_text(json.dumps({"url": url + "?old"}))
+
+    path, course_dir, ranges = _download(tmp_path, prepare)
+    assert ranges == [None]
+    with open(path, "rb") as f:
+        assert f.read() == PAYLOAD
+
+
+def test_segmented_download_fetches_ranges_concurrently(tmp_path):
+    path, course_dir, ranges = _download(tmp_path, download_segments=4, min_segment_size=100 * 1024)
+    assert ranges[0] == "bytes=0-0"
+    assert sorted(ranges[1:]) == sorted(
+        f"bytes={start}-{end}" for start, end, _ in plan_segments(len(PAYLOAD), 4, 100 * 1024)
+    )
+    with open(path, "rb") as f:
+        assert f.read() == PAYLOAD
+    assert os.listdir(course_dir) == [os.path.basename(path)]
+
+
+def test_segments_send_the_validator_from_the_probe(tmp_path):
+    if_ranges = []
+    _download(tmp_path, if_ranges=if_ranges, download_segments=4, min_segment_size=100 * 1024)
+    assert if_ranges[0] is None
+    assert len(if_ranges) > 2 and all(if_ranges[1:])  # Even the first round of segments
+
+
+def test_segment_from_the_wrong_offset_is_rejected(tmp_path):
+    async def respond(request):
+        # A 206 that always starts at byte 0, whatever was asked for
+        return web.Response(status=206, body=PAYLOAD[:1000],
+                            headers={"Content-Range": f"bytes 0-999/{len(PAYLOAD)}", "ETag": '"v1"'})
+
+    try:
+        _download(tmp_path, respond=respond, download_segments=4, min_segment_size=100 * 1024)
+    except IOError as e:
+        assert "expected" in str(e)
+    else:
+        raise AssertionError("download should have failed")
+    assert os.listdir(tmp_path / "out" / "Course") == []
+
+
+def test_stalled_segment_keeps_the_part_and_saves_progress(tmp_path):
+    segments = plan_segments(len(PAYLOAD), 2, 1)
+    stalled = segments[1][0]
+
+    async def respond(request):
+        start, _, end = request.headers["Range"][len("bytes="):].partition("-")
+        start, end = int(start), int(end)
+        body = PAYLOAD[start:end + 1]
+        response = web.StreamResponse(status=206, headers={
+            "Content-Range": f"bytes {start}-{end}/{len(PAYLOAD)}", "Content-Length": str(len(body)), "ETag": '"v1"'})
+        await response.prepare(request)
+        if start == stalled:
+            await response.write(body[:1000])
+            await asyncio.sleep(0.5)  # Longer than the client's read timeout
+        else:
+            await response.write(body)
+        return response
+
+    session_manager = HTTPSessionManager(download_timeout=ClientTimeout(sock_read=0.1))
+    try:
+        _download(tmp_path, respond=respond, download_segments=2, min_segment_size=1, session_manager=session_manager)
+    except (OSError, asyncio.TimeoutError):
+        pass
+    else:
+        raise AssertionError("download should have timed out")
+    asyncio.run(session_manager.close())
+
+    course_dir = tmp_path / "out" / "Course"
+    part = next(course_dir.glob("*.part"))
+    meta = json.loads((course_dir / (part.name + ".json")).read_text())
+    assert [segment[2] for segment in meta["segments"]] == [segments[0][1] + 1, 1000]
+    assert part.read_bytes()[stalled:stalled + 1000] == PAYLOAD[stalled:stalled + 1000]
+
+
+def test_segmented_download_resumes_each_segment(tmp_path):
+    segments = plan_segments(len(PAYLOAD), 2, 1)
+    segments[0][2] = 100
+    segments[1][2] = 50
+
+    def prepare(course_dir, url):
+        part = course_dir / "Course_2000-01-01.zip.part"
+        data = bytearray(len(PAYLOAD))
+        data[0:100] = PAYLOAD[0:100]
+        start = segments[1][0]
+        data[start:start + 50] = PAYLOAD[start:start + 50]
+        part.write_bytes(bytes(data))
+        meta = {"url": url, "total_size": len(PAYLOAD), "segments": segments}
+        (course_dir / "Course_2000-01-01.zip.part.json").write_text(json.dumps(meta))
+
+    path, _, ranges = _download(tmp_path, prepare, download_segments=2)
+    assert sorted(ranges) == sorted([
+        f"bytes=100-{segments[0][1]}",
+        f"bytes={segments[1][0] + 50}-{segments[1][1]}",
+    ])
+    with open(path, "rb") as f:
+        assert f.read() == PAYLOAD
+
+
+def test_plan_segments():
+    assert plan_segments(None, 4, 10) == []
+    assert plan_segments(25, 4, 10) == [[0, 12, 0], [13, 24, 0]]
+    assert plan_segments(5, 4, 10) == [[0, 4, 0]]
+
+
+def test_parse_content_range():
+    assert parse_content_range("bytes 10-19/100") == (10, 19, 100)
+    assert parse_content_range("bytes */100") == (None, None, 100)
+    assert parse_content_range(None) == (None, None, None)
+
+
+def test_session_fits_every_segment_and_api_request():
+    settings = ConcurrencySettings(download=4, download_max=10, api=8, api_max=40)
+    manager = HTTPSessionManager.for_settings(settings, download_segments=4)
+    assert manager.limit_per_host == 10 * 4 + 40
+    assert manager.limit >= manager.limit_per_host
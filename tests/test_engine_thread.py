@@ -0,0 +1,46 @@
+import asyncio
+import threading
+import time
+
+from gui.engine_thread import EngineThread
+
+
+def test_engine_runs_coroutines_off_the_calling_thread():
+    engine = EngineThread()
+    events = {}
+    waiting = threading.Event()
+
+    async def backup():
+        # Created on the engine loop, as BackupManager does; an Event is bound to its loop on Python 3.9
+        events["stop"] = asyncio.Event()
+        waiting.set()
+        await events["stop"].wait()
+        return threading.current_thread().name
+
+    try:
+        future = engine.submit(backup())
+        assert waiting.wait(2)
+        time.sleep(0.05)  # The engine is really suspended in wait() before Stop arrives
+        engine.call_soon(events["stop"].set)  # How the Stop button reaches the engine
+        assert future.result(timeout=2) == "backup-engine"
+    finally:
+        engine.shutdown()
+    assert not engine.running
+
+
+def test_shutdown_cancels_unfinished_work():
+    engine = EngineThread()
+    started, cancelled = threading.Event(), threading.Event()
+
+    async def forever():
+        started.set()
+        try:
+            await asyncio.sleep(3600)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    engine.submit(forever())
+    assert started.wait(2)
+    engine.shutdown()
+    assert cancelled.is_set()
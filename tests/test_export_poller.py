@@ -0,0 +1,114 @@
+import asyncio
+import time
+
+from backup_manager.backup_runner import BackupRunner
+from backup_manager.export_poller import ExportPoller
+from backup_manager.job_journal import JobJournal
+
+
+class FakeCanvas:
+    """Serves content export and progress responses for a few courses."""
+
+    def __init__(self, polls_until_done):
+        self.polls_until_done = dict(polls_until_done)
+        self.progress_calls = {course_id: 0 for course_id in polls_until_done}
+
+    async def make_request(self, endpoint, method="GET", params=None, data=None):
+        if endpoint.startswith("https://canvas/api/v1/progress/"):
+            course_id = endpoint.rsplit("/", 1)[-1]
+            self.progress_calls[course_id] += 1
+            done = self.progress_calls[course_id] >= self.polls_until_done[course_id]
+            if course_id == "fail":
+                return {"workflow_state": "failed", "completion": 10}
+            return {
+                "workflow_state": "completed" if done else "running",
+                "completion": 100 if done else 20 * self.progress_calls[course_id],
+            }
+        course_id = endpoint.split("/courses/")[1].split("/")[0]
+        response = {"progress_url": f"https://canvas/api/v1/progress/{course_id}", "workflow_state": "exporting"}
+        if self.progress_calls.get(course_id, 0) >= self.polls_until_done.get(course_id, 1):
+            response["attachment"] = {"url": f"https://files/{course_id}.zip"}
+        return response
+
+
+def _poller(canvas, **kwargs):
+    kwargs.setdefault("min_interval", 0.01)
+    kwargs.setdefault("max_interval", 0.05)
+    return ExportPoller(canvas, asyncio.Event(), **kwargs)
+
+
+def test_poller_resolves_each_export_with_its_url():
+    canvas = FakeCanvas({"1": 2, "2": 4, "fail": 1})
+
+    async def run():
+        poller = _poller(canvas, default_duration=0.05)
+        seen = []
+
+        async def on_progress(completion):
+            seen.append(completion)
+
+        return await asyncio.gather(
+            poller.wait_for_export("1", "a", on_progress),
+            poller.wait_for_export("2", "b"),
+            poller.wait_for_export("fail", "c"),
+        ), seen
+
+    results, seen = asyncio.run(run())
+    assert results == ["https://files/1.zip", "https://files/2.zip", None]
+    assert seen == [20.0]
+    assert canvas.progress_calls == {"1": 2, "2": 4, "fail": 1}
+
+
+def test_poller_times_out_and_stops():
+    canvas = FakeCanvas({"1": 10 ** 6})
+
+    async def run():
+        poller = _poller(canvas, export_timeout=0.1)
+        return await poller.wait_for_export("1", "a")
+
+    assert asyncio.run(run()) is None
+
+
+def test_interval_backs_off_without_progress():
+    canvas = FakeCanvas({})
+    poller = ExportPoller(canvas, asyncio.Event(), min_interval=1, max_interval=100, default_duration=10)
+
+    class Watch:
+        started = 0.0
+        expected_duration = 10
+        first_progress = None
+        polls = 5
+        completion = 0.0
+        interval = 20.0
+
+    assert poller._next_interval(Watch, 0.0, 50.0) == 30.0
+    Watch.polls = 1
+    assert poller._next_interval(Watch, 0.0, 2.0) == 4.0
+
+
+def test_first_poll_waits_for_the_courses_export_history(tmp_path):
+    journal = JobJournal(str(tmp_path / "journal.db"))
+    journal.record_duration("1", export_seconds=0.4)
+    canvas = FakeCanvas({"1": 1, "2": 1})
+
+    polled_at = {}
+
+    async def make_request(endpoint, method="GET", params=None, data=None):
+        if endpoint.startswith("https://canvas/api/v1/progress/"):
+            polled_at.setdefault(endpoint.rsplit("/", 1)[-1], time.monotonic())
+        return await FakeCanvas.make_request(canvas, endpoint, method, params, data)
+
+    canvas.make_request = make_request
+
+    async def run():
+        runner = BackupRunner(canvas, str(tmp_path), asyncio.Event(), journal=journal)
+        runner.export_poller = _poller(canvas, max_interval=1, default_duration=0.02)
+        started = time.monotonic()
+        await asyncio.gather(runner.poll_export_status("1", "a", None, "One"),
+                             runner.poll_export_status("2", "b", None, "Two"))
+        return started
+
+    started = asyncio.run(run())
+    assert polled_at["1"] - started >= 0.2  # Half of the 0.4s history
+    assert polled_at["2"] - started < 0.1  # No history: polled right away
+    journal.close()
@@ -0,0 +1,43 @@
+from datetime import datetime, timezone
+
+from backup_manager.export_reuse import ExportReusePolicy, parse_canvas_timestamp
+
+NOW = datetime(2026, 3, 2, 6, 0, tzinfo=timezone.utc)
+
+
+def test_parse_canvas_timestamp_is_utc():
+    parsed = parse_canvas_timestamp("2026-03-01T23:59:10Z")
+    assert parsed == datetime(2026, 3, 1, 23, 59, 10, tzinfo=timezone.utc)
+    assert parse_canvas_timestamp("2026-03-01T16:59:10-07:00") == parsed
+    assert parse_canvas_timestamp("") is None
+    assert parse_canvas_timestamp("not a date") is None
+
+
+def test_reuses_export_finished_just_before_midnight():
+    policy = ExportReusePolicy(freshness_window=18 * 3600)
+    exports = [
+        {"id": 1, "workflow_state": "exported", "created_at": "2026-03-01T23:40:00Z", "updated_at": "2026-03-01T23:59:00Z"},
+        {"id": 2, "workflow_state": "exported", "created_at": "2026-02-27T10:00:00Z", "updated_at": "2026-02-27T10:05:00Z"},
+    ]
+    assert policy.select(exports, NOW)["id"] == 1
+
+
+def test_attaches_to_in_progress_export_but_prefers_finished():
+    policy = ExportReusePolicy(freshness_window=3600)
+    running = {"id": 3, "workflow_state": "exporting", "created_at": "2026-03-02T05:30:00Z"}
+    stale = {"id": 4, "workflow_state": "exported", "created_at": "2026-03-01T01:00:00Z"}
+    assert policy.select([running, stale], NOW)["id"] == 3
+
+    fresh = {"id": 5, "workflow_state": "exported", "created_at": "2026-03-02T05:10:00Z",
+             "updated_at": "2026-03-02T05:20:00Z"}
+    assert policy.select([running, fresh], NOW)["id"] == 5
+
+
+def test_ignores_stuck_failed_and_other_export_types():
+    policy = ExportReusePolicy()
+    exports = [
+        {"id": 6, "workflow_state": "exporting", "created_at": "2026-02-20T00:00:00Z"},
+        {"id": 7, "workflow_state": "failed", "created_at": "2026-03-02T05:00:00Z"},
+        {"id": 8, "workflow_state": "exported", "export_type": "qti", "created_at": "2026-03-02T05:00:00Z"},
+    ]
+    assert policy.select(exports, NOW) is None
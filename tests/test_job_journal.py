@@ -0,0 +1,96 @@
+import asyncio
+import time
+
+import pytest
+
+from backup_manager.backup_runner import BackupRunner
+from backup_manager.job_journal import (
+    JobJournal, JournalBusyError, PHASE_COMPLETED, PHASE_EXPORT_READY, PHASE_EXPORT_STARTED,
+)
+
+
+def test_record_and_resume_point(tmp_path):
+    journal = JobJournal(str(tmp_path / "journal.db"))
+    journal.record("1", "Course", phase=PHASE_EXPORT_STARTED, export_id="55")
+    journal.record("1", status="Backing up", progress=40)
+
+    job = journal.resume_point("1")
+    assert job["export_id"] == "55"
+    assert job["status"] == "Backing up"
+    assert job["course_name"] == "Course"
+
+    journal.record("1", phase=PHASE_COMPLETED)
+    assert journal.resume_point("1") is None
+
+
+def test_resume_point_ignores_stale_rows(tmp_path):
+    journal = JobJournal(str(tmp_path / "journal.db"))
+    journal.record("1", "Course", phase=PHASE_EXPORT_STARTED, export_id="55")
+    with journal._conn:
+        journal._conn.execute("UPDATE course_jobs SET updated_at = ?", (time.time() - 7200,))
+    assert journal.resume_point("1", max_age=3600) is None
+    assert journal.resume_point("1", max_age=3 * 3600) is not None
+
+
+def test_sync_courses_keeps_progress_and_drops_removed(tmp_path):
+    journal = JobJournal(str(tmp_path / "journal.db"))
+    journal.record("1", "Old", phase=PHASE_EXPORT_STARTED, export_id="9")
+    journal.record("2", "Gone")
+    journal.sync_courses([
+        {"sanitized_name": "New", "course_id": "1"},
+        {"sanitized_name": "Third", "course_id": "3"},
+    ])
+    jobs = {job["course_id"]: job for job in journal.all_jobs()}
+    assert set(jobs) == {"1", "3"}
+    assert jobs["1"]["export_id"] == "9"
+    assert jobs["1"]["course_name"] == "New"
+    assert jobs["3"]["phase"] == "pending"
+
+
+def test_courses_left_out_of_a_csv_keep_their_backup_history(tmp_path):
+    journal = JobJournal(str(tmp_path / "journal.db"))
+    journal.record("1", "Course", phase=PHASE_EXPORT_STARTED, export_id="9",
+                   content_signature="abc", last_backup_at=100.0, priority=2)
+    journal.sync_courses([{"sanitized_name": "Other", "course_id": "2"}])
+    assert [job["course_id"] for job in journal.all_jobs()] == ["2"]
+
+    journal.sync_courses([{"sanitized_name": "Course", "course_id": "1"}])
+    job = journal.get("1")
+    assert [job["course_id"] for job in journal.all_jobs()] == ["1"]
+    assert (job["content_signature"], job["last_backup_at"], job["priority"]) == ("abc", 100.0, 2)
+    assert job["phase"] == "pending" and job["export_id"] is None
+
+
+def test_run_backup_resumes_from_export_ready(tmp_path):
+    journal = JobJournal(str(tmp_path / "journal.db"))
+    journal.record("7", "Course", phase=PHASE_EXPORT_READY, export_id="1", attachment_url="https://files/x.zip")
+
+    class NoApi:
+        async def make_request(self, *args, **kwargs):
+            raise AssertionError("resumed course must not call the API")
+
+    downloads = []
+
+    async def run():
+        runner = BackupRunner(NoApi(), str(tmp_path), asyncio.Event(), journal=journal)
+
+        async def fake_download(course_name, file_url, status_callback, course_id):
+            downloads.append(file_url)
+
+        runner.download_backup = fake_download
+        return await runner.run_backup("Course", "7")
+
+    assert asyncio.run(run()) is True
+    assert downloads == ["https://files/x.zip"]
+    assert journal.get("7")["phase"] == PHASE_COMPLETED
+
+
+def test_second_run_on_the_same_journal_is_refused(tmp_path):
+    gui, cli = JobJournal(str(tmp_path / "journal.db")), JobJournal(str(tmp_path / "journal.db"))
+    gui.lock_run()
+    with pytest.raises(JournalBusyError):
+        cli.lock_run()
+    gui.unlock_run()
+    cli.lock_run()  # Free once the first run finished
+    cli.close()
+    gui.close()
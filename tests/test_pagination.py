@@ -0,0 +1,90 @@
+import asyncio
+
+from aiohttp import web
+
+from backup_manager.api_handler import CanvasAPIHandler, parse_link_header
+
+
+def test_parse_link_header():
+    header = (
+        '<https://canvas/api/v1/x?page=2&per_page=2>; rel="next", '
+        '<https://canvas/api/v1/x?page=1&per_page=2>; rel="first current", '
+        '<https://canvas/api/v1/x?page=3&per_page=2>; rel="last"'
+    )
+    links = parse_link_header(header)
+    assert links["next"] == "https://canvas/api/v1/x?page=2&per_page=2"
+    assert links["first"] == links["current"]
+    assert links["last"].endswith("page=3&per_page=2")
+    assert parse_link_header("") == {}
+
+
+def test_paginate_follows_next_links_lazily():
+    requested = []
+
+    async def handler(request):
+        page = int(request.query.get("page", 1))
+        per_page = int(request.query["per_page"])
+        requested.append(page)
+        items = [{"id": i} for i in range((page - 1) * per_page, min(page * per_page, 5))]
+        headers = {}
+        if page * per_page < 5:
+            headers["Link"] = f'<{request.url.with_query(page=page + 1, per_page=per_page)}>; rel="next"'
+        return web.json_response(items, headers=headers)
+
+    async def run(limit=None):
+        app = web.Application()
+        app.router.add_get("/api/v1/items", handler)
+        server = web.AppRunner(app)
+        await server.setup()
+        site = web.TCPSite(server, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        api = CanvasAPIHandler(f"http://127.0.0.1:{port}", "token")
+        ids = []
+        try:
+            async for item in api.paginate("/api/v1/items", per_page=2):
+                ids.append(item["id"])
+                if limit and len(ids) == limit:
+                    break
+        finally:
+            await api.close_session()
+            await server.cleanup()
+        return ids
+
+    assert asyncio.run(run()) == [0, 1, 2, 3, 4]
+    assert requested == [1, 2, 3]
+
+    requested.clear()
+    assert asyncio.run(run(limit=2)) == [0, 1]
+    assert requested == [1]
+
+
+def test_identical_concurrent_gets_share_one_request():
+    hits = []
+
+    async def handler(request):
+        hits.append(request.path)
+        await asyncio.sleep(0.05)
+        return web.json_response({"id": 1})
+
+    async def run():
+        app = web.Application()
+        app.router.add_get("/api/v1/courses/1", handler)
+        server = web.AppRunner(app)
+        await server.setup()
+        site = web.TCPSite(server, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        api = CanvasAPIHandler(f"http://127.0.0.1:{port}", "token")
+        try:
+            bodies = await asyncio.gather(*(api.make_request("/api/v1/courses/1") for _ in range(5)))
+            await api.make_request("/api/v1/courses/1")  # Sent again once the first has finished
+        finally:
+            await api.close_session()
+            await server.cleanup()
+        return api, bodies
+
+    api, bodies = asyncio.run(run())
+    assert bodies == [{"id": 1}] * 5
+    assert len(hits) == 2
+    assert api.coalesced == 4
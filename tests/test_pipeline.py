@@ -0,0 +1,43 @@
+import asyncio
+
+from backup_manager.backup_runner import BackupRunner
+
+
+class StagedRunner(BackupRunner):
+    """BackupRunner with fake stages that record how many run at once."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.active = {"export": 0, "download": 0}
+        self.peak = {"export": 0, "download": 0}
+        self.finished = []
+
+    async def _stage(self, name, delay):
+        self.active[name] += 1
+        self.peak[name] = max(self.peak[name], self.active[name])
+        await asyncio.sleep(delay)
+        self.active[name] -= 1
+
+    async def prepare_export(self, course_name, course_id, status_callback=None):
+        await self._stage("export", 0.02)
+        return ("export_ready", f"https://files/{course_id}.zip")
+
+    async def finish_download(self, course_name, course_id, phase, export_url, status_callback=None):
+        await self._stage("download", 0.005)
+        self.finished.append(course_id)
+        return True
+
+
+def test_export_and_download_stages_have_separate_limits(tmp_path):
+    async def run():
+        runner = StagedRunner(None, str(tmp_path), asyncio.Event(), export_concurrency=8, download_concurrency=2)
+        queue = asyncio.Queue()
+        for i in range(20):
+            queue.put_nowait((f"Course {i}", str(i), None))
+        await runner.process_queue(queue)
+        return runner
+
+    runner = asyncio.run(run())
+    assert sorted(runner.finished, key=int) == [str(i) for i in range(20)]
+    assert runner.peak["export"] == 8
+    assert runner.peak["download"] == 2
@@ -0,0 +1,42 @@
+import asyncio
+import time
+
+from backup_manager.rate_limiter import AdaptiveRateLimiter
+
+
+def test_rate_increases_with_plenty_of_quota():
+    limiter = AdaptiveRateLimiter(initial_rate=10, max_rate=12)
+    for _ in range(5):
+        limiter.update({"X-Rate-Limit-Remaining": "690", "X-Request-Cost": "1.5"})
+    assert limiter.current_rate == 12
+    assert limiter.stats()["remaining"] == 690
+
+
+def test_rate_slows_as_quota_drains():
+    limiter = AdaptiveRateLimiter(initial_rate=50, min_rate=1, max_rate=100)
+    limiter.update({"X-Rate-Limit-Remaining": "200"})
+    mid = limiter.current_rate
+    assert 1 < mid < 50
+    limiter.update({"X-Rate-Limit-Remaining": "120"})
+    assert limiter.current_rate < mid
+    limiter.update({"X-Rate-Limit-Remaining": "10"})
+    assert limiter.current_rate == 1
+
+
+def test_throttle_halves_rate():
+    limiter = AdaptiveRateLimiter(initial_rate=20, min_rate=1)
+    limiter.on_throttled()
+    assert limiter.current_rate == 10
+    assert limiter.stats()["throttled"] == 1
+
+
+def test_acquire_paces_requests():
+    limiter = AdaptiveRateLimiter(initial_rate=100, burst=1)
+
+    async def run():
+        start = time.monotonic()
+        for _ in range(6):
+            await limiter.acquire()
+        return time.monotonic() - start
+
+    assert asyncio.run(run()) >= 0.04
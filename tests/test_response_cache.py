@@ -0,0 +1,76 @@
+import asyncio
+
+from aiohttp import web
+
+from backup_manager.api_handler import CanvasAPIHandler
+from backup_manager.response_cache import ResponseCache
+
+
+def test_conditional_requests_are_served_from_cache(tmp_path):
+    seen = []
+
+    async def handler(request):
+        seen.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return web.Response(status=304, headers={"ETag": '"v1"'})
+        return web.json_response({"id": 1, "name": "Biology"}, headers={"ETag": '"v1"'})
+
+    async def run():
+        app = web.Application()
+        app.router.add_get("/api/v1/courses/1", handler)
+        server = web.AppRunner(app)
+        await server.setup()
+        site = web.TCPSite(server, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        cache = ResponseCache(str(tmp_path / "cache.db"), ttl=60)
+        api = CanvasAPIHandler(f"http://127.0.0.1:{port}", "token", response_cache=cache)
+        try:
+            first = await api.make_request("/api/v1/courses/1", use_cache=True)
+            fresh = await api.make_request("/api/v1/courses/1", use_cache=True)
+            revalidated = await api.make_request("/api/v1/courses/1", use_cache=True, cache_ttl=0)
+            uncached = await api.make_request("/api/v1/courses/1")
+        finally:
+            await api.close_session()
+            await server.cleanup()
+        return cache, [first, fresh, revalidated, uncached]
+
+    cache, bodies = asyncio.run(run())
+    assert all(body == {"id": 1, "name": "Biology"} for body in bodies)
+    assert seen == [None, '"v1"', None]  # The fresh read never reached the server
+    assert cache.stats() == {"hits": 1, "revalidated": 1, "misses": 1}
+
+
+def test_cache_is_keyed_by_token_and_evicts_least_recently_used(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.db"), max_bytes=120)
+    old = cache.make_key("https://canvas/api/v1/a", {"per_page": 10}, "token")
+    new = cache.make_key("https://canvas/api/v1/b", None, "token")
+    assert cache.make_key("https://canvas/api/v1/a", [("per_page", 10)], "token") == old
+    assert cache.make_key("https://canvas/api/v1/a", {"per_page": 10}, "other") != old
+
+    cache.store(old, "a", {"data": "x" * 40}, {"ETag": '"a"'})
+    cache.store(new, "b", {"data": "y" * 40}, {"ETag": '"b"'})
+    cache.lookup(old)  # Now the most recently used
+    cache.store(cache.make_key("c", None, "token"), "c", {"data": "z" * 40}, {"ETag": '"c"'})
+
+    assert cache.lookup(old) is not None
+    assert cache.lookup(new) is None
+    cache.close()
+
+
+def test_running_total_only_evicts_over_the_limit(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.db"), max_bytes=1000)
+    evictions = []
+    evict = cache.evict
+    cache.evict = lambda: evictions.append(1) or evict()
+
+    key = cache.make_key("https://canvas/api/v1/a", None, "token")
+    cache.store(key, "a", {"data": "x" * 40}, {"ETag": '"a"'})
+    cache.store(key, "a", {"data": "x" * 50}, {"ETag": '"b"'})  # Replaces the first body
+    assert cache._total_bytes == len('{"data": ""}') + 50
+    assert evictions == []
+
+    cache.store(cache.make_key("big", None, "token"), "big", {"data": "y" * 950}, {"ETag": '"c"'})
+    assert evictions == [1]  # The older entry made room
+    cache.close()
+    assert ResponseCache(str(tmp_path / "cache.db"), max_bytes=1000)._total_bytes == len('{"data": ""}') + 950
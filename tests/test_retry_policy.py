@@ -0,0 +1,73 @@
+import asyncio
+
+from aiohttp import web
+
+from backup_manager.api_handler import CanvasAPIHandler
+from backup_manager.retry_policy import CircuitBreaker, RetryPolicy
+
+
+def test_get_retries_server_errors_until_attempts_run_out():
+    policy = RetryPolicy(retry_statuses={503: 3}, base_delay=0.01)
+    assert policy.next_delay("GET", 1, 0, status=503) is not None
+    assert policy.next_delay("GET", 3, 0, status=503) is None
+    assert policy.next_delay("GET", 1, 0, status=404) is None
+
+
+def test_post_is_only_retried_when_not_processed():
+    policy = RetryPolicy(base_delay=0.01)
+    assert policy.next_delay("POST", 1, 0, status=429) is not None
+    assert policy.next_delay("POST", 1, 0, status=502) is None
+    assert policy.next_delay("POST", 1, 0, connection_error=True) is None
+    assert policy.next_delay("POST", 1, 0, connection_error=True, idempotent=True) is not None
+
+
+def test_retry_after_and_budget():
+    policy = RetryPolicy(base_delay=0.01, max_delay=5, total_budget=10)
+    assert policy.next_delay("GET", 1, 0, status=429, retry_after=3) >= 3
+    assert policy.next_delay("GET", 1, 9, status=429, retry_after=3) is None
+
+
+def test_circuit_breaker_opens_and_recovers():
+    breaker = CircuitBreaker(failure_threshold=3, window=10, cooldown=0.05)
+    for _ in range(3):
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    async def trial():
+        await breaker.wait_until_closed()
+
+    asyncio.run(trial())
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_make_request_retries_without_holding_the_semaphore():
+    calls = []
+
+    async def handler(request):
+        calls.append(request.method)
+        if len(calls) < 3:
+            return web.json_response({"error": "busy"}, status=503)
+        return web.json_response({"ok": True, "method": request.method})
+
+    async def run():
+        app = web.Application()
+        app.router.add_route("*", "/api/v1/thing", handler)
+        server = web.AppRunner(app)
+        await server.setup()
+        site = web.TCPSite(server, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        api = CanvasAPIHandler(
+            f"http://127.0.0.1:{port}", "token", concurrency_limit=1,
+            retry_policy=RetryPolicy(base_delay=0.01),
+        )
+        try:
+            return await api.make_request("/api/v1/thing", method="POST", data={"a": 1})
+        finally:
+            await api.close_session()
+            await server.cleanup()
+
+    assert asyncio.run(run()) == {"ok": True, "method": "POST"}
+    assert calls == ["POST", "POST", "POST"]
@@ -0,0 +1,139 @@
+import asyncio
+import time
+
+from backup_manager.backup_runner import BackupRunner
+from backup_manager.job_journal import JobJournal
+from backup_manager.scheduler import (DurationModel, configured_schedule, order_courses, makespan_lower_bound,
+                                      plan_deadline)
+
+
+class OrderRunner(BackupRunner):
+    """BackupRunner that records the order courses start and finish in, without calling Canvas."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.started = []
+        self.finished = []
+
+    async def prepare_export(self, course_name, course_id, status_callback=None):
+        self.started.append(course_id)
+        await asyncio.sleep(0.01)
+        return ("export_ready", f"https://files/{course_id}.zip")
+
+    async def finish_download(self, course_name, course_id, phase, export_url, status_callback=None):
+        self.finished.append(course_id)
+        return True
+
+
+def test_journal_smooths_duration_history(tmp_path):
+    journal = JobJournal(str(tmp_path / "journal.db"))
+    journal.record_duration(1, export_seconds=100, download_seconds=40, size_bytes=4000)
+    journal.record_duration(1, export_seconds=200, size_bytes=8000)
+
+    history = journal.durations()["1"]
+    assert history["export_seconds"] == 150
+    assert history["download_seconds"] == 40
+    assert history["size_bytes"] == 6000
+    assert history["samples"] == 2
+    journal.close()
+
+
+def test_longest_first_uses_history_and_probed_sizes():
+    model = DurationModel({
+        "1": {"export_seconds": 10, "download_seconds": 10, "size_bytes": 1000},
+        "2": {"export_seconds": 30, "download_seconds": 300, "size_bytes": 30000},
+    })
+    model.set_size("3", 10000)  # 100 bytes/s from history -> 100s download + 20s median export
+    # Course 4 is unknown and gets the median of the known courses (175s)
+    courses = [(f"Course {i}", str(i), None) for i in (1, 2, 3, 4)]
+
+    assert [c[1] for c in order_courses(courses, "longest_first", model)] == ["2", "4", "3", "1"]
+    assert [c[1] for c in order_courses(courses, "shortest_first", model)] == ["1", "3", "4", "2"]
+    assert makespan_lower_bound([330, 120, 20], workers=2) == 330
+
+
+def test_configured_schedule_falls_back_to_fifo():
+    assert configured_schedule({"schedule": "Longest_First"}) == "longest_first"
+    assert configured_schedule({"schedule": "biggest"}) == "fifo"
+    assert configured_schedule({}) == "fifo"
+
+
+def test_runner_starts_courses_in_scheduled_order(tmp_path):
+    journal = JobJournal(str(tmp_path / "journal.db"))
+    for course_id, seconds in (("a", 5), ("b", 50), ("c", 20)):
+        journal.record_duration(course_id, export_seconds=seconds, download_seconds=seconds)
+
+    async def run():
+        runner = OrderRunner(None, str(tmp_path), asyncio.Event(), journal=journal,
+                             export_concurrency=1, download_concurrency=1, schedule="longest_first")
+        queue = asyncio.Queue()
+        for course_id in "abc":
+            queue.put_nowait((f"Course {course_id}", course_id, None))
+        await runner.process_queue(queue)
+        return runner
+
+    runner = asyncio.run(run())
+    assert runner.started == ["b", "c", "a"]
+    journal.close()
+
+
+def test_deadline_plan_fits_most_courses_and_prefers_deferred_ones():
+    model = DurationModel({str(i): {"export_seconds": 0, "download_seconds": seconds}
+                           for i, seconds in enumerate([50, 10, 20, 30, 40])})
+    courses = [(f"Course {i}", str(i), None) for i in range(5)]
+
+    selected, deferred = plan_deadline(courses, model, seconds_left=40, workers=2)
+    assert [c[1] for c in selected] == ["1", "2", "3"]  # 10+30 and 20 fit on two lanes
+    assert [c[1] for c in deferred] == ["4", "0"]
+
+    selected, _ = plan_deadline(courses, model, seconds_left=40, workers=2, priorities={"4": 1})
+    assert [c[1] for c in selected] == ["4", "1", "2"]
+
+
+def test_deadline_run_defers_what_cannot_finish(tmp_path):
+    journal = JobJournal(str(tmp_path / "journal.db"))
+    journal.record_duration("big", export_seconds=3600, download_seconds=3600)
+    journal.record_duration("small", export_seconds=1, download_seconds=1)
+    statuses = {}
+
+    async def run():
+        runner = OrderRunner(None, str(tmp_path), asyncio.Event(), journal=journal,
+                              export_concurrency=2, download_concurrency=1, deadline=time.time() + 60)
+        queue = asyncio.Queue()
+        for course_id in ("big", "small"):
+            queue.put_nowait((course_id, course_id, lambda n, i, status, p: statuses.__setitem__(i, status)))
+        await runner.process_queue(queue)
+        return runner
+
+    runner = asyncio.run(run())
+    assert runner.finished == ["small"]
+    assert statuses["big"] == "Deferred"
+    assert journal.priorities()["big"] == 1
+    assert not runner.deadline_reached
+    journal.close()
+
+
+def test_deadline_cutoff_defers_running_courses_and_counts_planned_ones(tmp_path):
+    journal = JobJournal(str(tmp_path / "journal.db"))
+    journal.record_duration("big", export_seconds=3600, download_seconds=3600)
+    journal.record_duration("slow", export_seconds=0.01, download_seconds=0.01)  # Predicted to fit, but hangs
+    statuses = {}
+
+    class HangingRunner(OrderRunner):
+        async def prepare_export(self, course_name, course_id, status_callback=None):
+            await self.stop_event.wait()
+            await self._notify(status_callback, course_name, course_id, "Stopped", 0)
+
+    async def run():
+        runner = HangingRunner(None, str(tmp_path), asyncio.Event(), journal=journal,
+                               export_concurrency=2, download_concurrency=1, deadline=time.time() + 0.1)
+        rows = [{"sanitized_name": course_id, "course_id": course_id} for course_id in ("big", "slow")]
+        total = await runner.process_source(rows, lambda n, i, status, p: statuses.__setitem__(i, status))
+        return runner, total
+
+    runner, total = asyncio.run(run())
+    assert total == 2  # The course deferred while planning still counts
+    assert runner.deadline_reached
+    assert statuses == {"big": "Deferred", "slow": "Deferred"}
+    assert journal.priorities() == {"big": 1, "slow": 1}
+    journal.close()
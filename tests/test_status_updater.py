@@ -0,0 +1,37 @@
+import threading
+
+from backup_manager.course_store import CourseRecord, CourseStore
+from gui.status_updater import StatusUpdater
+
+
+class FakeTable:
+    def __init__(self):
+        self.refreshed = []
+
+    def refresh_rows(self, course_ids):
+        self.refreshed.append(sorted(course_ids))
+
+
+def test_changes_are_coalesced_until_the_next_frame():
+    store, table, overall = CourseStore(), FakeTable(), []
+    store.load([CourseRecord(i, f"Course {i}") for i in range(4)])
+    store.update(3, status="Completed")
+    updater = StatusUpdater(None, table, store, overall.append)
+
+    # Posted from another thread, as the backup engine does
+    def engine():
+        for progress in range(10, 100, 10):
+            updater.post("Course 0", 0, "Downloading", progress)
+        store.update(2, status="Completed", progress=100)
+
+    thread = threading.Thread(target=engine)
+    thread.start()
+    thread.join()
+
+    updater.flush()
+    assert table.refreshed == [["0", "2", "3"]]
+    assert store.get(0).progress == 90
+    assert overall[-1] == 50
+
+    updater.flush()  # Nothing changed, nothing redrawn
+    assert len(table.refreshed) == 1
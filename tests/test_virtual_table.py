@@ -0,0 +1,87 @@
+from backup_manager.course_store import CourseRecord, CourseStatus
+from gui.course_index import CourseIndex
+from gui.ui_components import VirtualTable
+
+
+class FakeTree:
+    """Just enough of ttk.Treeview to count the items a VirtualTable creates and redraws."""
+
+    def __init__(self):
+        self.items = {}
+        self.writes = 0
+        self.next_id = 0
+
+    def insert(self, parent, index, values=()):
+        self.next_id += 1
+        item = f"I{self.next_id}"
+        self.items[item] = values
+        return item
+
+    def item(self, item, values):
+        self.writes += 1
+        self.items[item] = values
+
+    def delete(self, item):
+        del self.items[item]
+
+
+class FakeScrollbar:
+    def set(self, first, last):
+        self.position = (first, last)
+
+
+def make_rows(count):
+    return [CourseRecord(i, f"Course {i}") for i in range(count)]
+
+
+def test_only_visible_rows_become_items():
+    tree, scrollbar = FakeTree(), FakeScrollbar()
+    table = VirtualTable(tree, scrollbar)
+    table.visible_rows = 10
+    rows = make_rows(20000)
+    table.set_rows(rows)
+    assert len(tree.items) == 10
+
+    table.yview("moveto", "0.5")
+    assert [values[1] for values in tree.items.values()] == [str(i) for i in range(10000, 10010)]
+    assert scrollbar.position == (0.5, 0.5005)
+
+    tree.writes = 0
+    rows[10003].status = CourseStatus.COMPLETED
+    rows[5].status = CourseStatus.COMPLETED  # Off screen, so nothing to redraw
+    table.refresh_rows(["10003", "5"])
+    assert tree.writes == 1
+
+    table.yview("scroll", 1, "pages")
+    assert table.top == 10010
+    table.set_rows(rows[:3])
+    assert len(tree.items) == 3 and table.top == 0
+
+
+def test_sort_reorders_the_model():
+    table = VirtualTable(FakeTree(), FakeScrollbar())
+    rows = make_rows(3)
+    for row, progress in zip(rows, (50, 5, 100)):
+        row.progress = progress
+    table.model = CourseIndex(rows)
+    table.set_rows(rows)
+    assert table.sort_by("Progress") == "asc"
+    assert [row.progress for row in table.rows] == [5, 50, 100]
+    assert table.positions["2"] == 2
+    assert table.sort_by("Progress") == "desc"
+    assert table.rows[0].progress == 100
+
+
+def test_new_model_keeps_the_current_sort():
+    table = VirtualTable(FakeTree(), FakeScrollbar())
+    rows = make_rows(3)
+    table.model = CourseIndex(rows)
+    table.sort_by("Course ID")
+    table.sort_by("Course ID")  # Descending
+
+    rows += [CourseRecord(10, "Course 10")]  # Courses appended while a backup runs
+    index = CourseIndex(rows)
+    table.set_model(index)
+    table.set_rows(index.view())
+    assert [row.course_id for row in table.rows] == ["10", "2", "1", "0"]
+    assert table.sort_state == {"Course ID": "desc"}
@@ -0,0 +1,67 @@
+import asyncio
+
+from backup_manager.backup_runner import BackupRunner
+from backup_manager.worker_pool import CoursePool
+
+
+class SlowRunner(BackupRunner):
+    """BackupRunner whose exports take a moment, so courses are still running when more arrive."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.finished = []
+
+    async def prepare_export(self, course_name, course_id, status_callback=None):
+        await asyncio.sleep(0.02)
+        return ("export_ready", f"https://files/{course_id}.zip")
+
+    async def finish_download(self, course_name, course_id, phase, export_url, status_callback=None):
+        self.finished.append(course_id)
+        return True
+
+
+def test_courses_submitted_mid_run_are_drained(tmp_path):
+    async def run():
+        runner = SlowRunner(None, str(tmp_path), asyncio.Event(), export_concurrency=2, download_concurrency=1)
+        pool = CoursePool(runner, maxsize=2).start()
+        peak_queue = 0
+
+        async def producer(first, last):
+            nonlocal peak_queue
+            for i in range(first, last):
+                await pool.submit(f"Course {i}", str(i))
+                peak_queue = max(peak_queue, pool.queue.qsize())
+
+        await producer(0, 5)
+        await asyncio.sleep(0.03)  # First courses are already running
+        late = asyncio.create_task(producer(5, 10))
+        await pool.drain()
+        await late
+        return runner, peak_queue
+
+    runner, peak_queue = asyncio.run(run())
+    assert sorted(runner.finished, key=int) == [str(i) for i in range(10)]
+    assert peak_queue <= 2
+
+
+def test_stop_reports_queued_courses_and_drain_returns(tmp_path):
+    statuses = {}
+
+    def status_callback(course_name, course_id, status, progress):
+        statuses[course_id] = status
+
+    async def run():
+        stop_event = asyncio.Event()
+        runner = SlowRunner(None, str(tmp_path), stop_event, export_concurrency=1, download_concurrency=1)
+        pool = CoursePool(runner, maxsize=3).start()
+        for i in range(4):
+            await pool.submit(f"Course {i}", str(i), status_callback)
+        stop_event.set()
+        await asyncio.wait_for(pool.drain(), timeout=2)
+        assert pool.closed
+        return runner
+
+    runner = asyncio.run(run())
+    assert len(runner.finished) <= 1
+    stopped = [course_id for course_id, status in statuses.items() if status == "Stopped"]
+    assert len(stopped) + len(runner.finished) == 4